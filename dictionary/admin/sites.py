@@ -2,7 +2,7 @@ from django.conf import settings
 from django.contrib import admin
 from django.urls import path
 
-from dictionary.admin.views.sites import ClearCache
+from dictionary.admin.views.sites import ClearCache, Instrumentation
 
 
 class SiteAdmin(admin.ModelAdmin):
@@ -15,6 +15,7 @@ class SiteAdmin(admin.ModelAdmin):
         urls = super().get_urls()
         custom_urls = [
             path("cache/", self.admin_site.admin_view(ClearCache.as_view()), name="clear-cache"),
+            path("instrumentation/", self.admin_site.admin_view(Instrumentation.as_view()), name="instrumentation"),
         ]
         return custom_urls + urls
 
@@ -1,5 +1,7 @@
+from django import forms
 from django.contrib import admin
 from django.contrib.admin import DateFieldListFilter, EmptyFieldListFilter
+from django.contrib.admin.widgets import AutocompleteSelectMultiple
 from django.urls import path
 from django.utils.translation import gettext_lazy as _
 
@@ -8,8 +10,33 @@ from dictionary.models import Topic, Wish
 from dictionary.utils.admin import intermediate
 
 
+class TopicAdminForm(forms.ModelForm):
+    mirrors = forms.ModelMultipleChoiceField(
+        queryset=Topic.objects.all(),
+        required=False,
+        label=_("Title disambiguation"),
+        help_text=_(
+            "Topics with the same title. The topics that you enter will be grouped with this topic, along with"
+            " their own disambiguations. Removing a topic will only remove that topic from the group."
+        ),
+        # Autocompletion needs a relation to topics, any of them will do.
+        widget=AutocompleteSelectMultiple(Wish._meta.get_field("topic"), admin.site),
+    )
+
+    class Meta:
+        model = Topic
+        fields = "__all__"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        if self.instance.pk is not None:
+            self.fields["mirrors"].initial = self.instance.mirrors
+
+
 @admin.register(Topic)
 class TopicAdmin(admin.ModelAdmin):
+    form = TopicAdminForm
     fieldsets = (
         (None, {"fields": ("title", "category", "mirrors")}),
         (
@@ -55,13 +82,17 @@ class TopicAdmin(admin.ModelAdmin):
     )
     search_fields = ("title",)
     ordering = ("-date_created",)
-    autocomplete_fields = ("category", "mirrors")
+    autocomplete_fields = ("category",)
     actions = ("move_topic",)
 
     def get_queryset(self, request):
         queryset = super().get_queryset(request)
         return queryset.select_related("created_by")
 
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        form.instance.set_mirrors(form.cleaned_data["mirrors"])
+
     def get_readonly_fields(self, request, obj=None):
         readonly = ("created_by", "date_created")
         return readonly + ("title",) if obj else readonly
@@ -18,8 +18,7 @@ class SuspendUser(IntermediateActionView):
     from 'time_choices' and also provides some information. For each suspended user,
     a LogEntry object is created. get_queryset is not modified so it is possible
     to select already suspended users, but latest submission will be taken into
-    account. Note that composing a message to each banned user is an expensive action,
-    large inputs (> 100) may take time (~7 sec for 800 users).
+    account. Messages to suspended users are sent in bulk.
     """
 
     permission_required = ("dictionary.suspend_user", "dictionary.change_author")
@@ -60,11 +59,11 @@ class SuspendUser(IntermediateActionView):
         for user in user_list_raw:
             user.suspended_until = suspended_until
             log_list.append(logentry_instance(message_for_log, request.user, Author, user))
-            Message.objects.compose(generic_superuser, user, message_for_user)
 
         # Bulk creation/updates
         Author.objects.bulk_update(user_list_raw, ["suspended_until"])  # Update Author, does not call save()
         logentry_bulk_create(log_list)  # Log user suspension for admin history
+        Message.objects.bulk_compose((generic_superuser, user, message_for_user) for user in user_list_raw)
 
         count = len(user_list_raw)
         notifications.success(
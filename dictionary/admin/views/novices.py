@@ -5,7 +5,7 @@ from django.utils.translation import gettext as _
 from django.views.generic import ListView
 
 from dictionary.conf import settings
-from dictionary.models import Author, Entry, Message
+from dictionary.models import Author, Entry, Message, TopicActivity
 from dictionary.utils import get_generic_superuser
 from dictionary.utils.admin import log_admin
 
@@ -87,6 +87,7 @@ class NoviceLookup(PermissionRequiredMixin, ListView):
         user.application_status = Author.Status.APPROVED
         user.is_novice = False
         user.save()
+        TopicActivity.objects.refresh_author(user)
 
         # Log admin info
         admin_info_msg = _("Authorship of the user '%(username)s' was approved.") % {"username": user.username}
@@ -98,7 +99,7 @@ class NoviceLookup(PermissionRequiredMixin, ListView):
             " of authorship has been approved. you can utilize your"
             " authorship by logging in."
         ) % {"username": user.username}
-        Message.objects.compose(get_generic_superuser(), user, user_info_msg)
+        Message.objects.bulk_compose([(get_generic_superuser(), user, user_info_msg)])
         user.email_user(_("your authorship has been approved"), user_info_msg, settings.FROM_EMAIL)
 
         notifications.success(self.request, admin_info_msg)
@@ -107,7 +108,9 @@ class NoviceLookup(PermissionRequiredMixin, ListView):
     def decline_application(self):
         # Alter the user status & delete entries
         user = self.novice
+        topic_ids = set(Entry.objects_published.filter(author=user).values_list("topic_id", flat=True))
         Entry.objects_published.filter(author=user).delete()  # does not trigger model's delete()
+        TopicActivity.objects.refresh(topic_ids)
         user.application_status = Author.Status.ON_HOLD
         user.application_date = None
         user.save()
@@ -122,7 +125,7 @@ class NoviceLookup(PermissionRequiredMixin, ListView):
             " rejected and all of your entries has been deleted. if you"
             " fill up 10 entries, you will be admitted to novice list again."
         ) % {"username": user.username}
-        Message.objects.compose(get_generic_superuser(), user, user_info_msg)
+        Message.objects.bulk_compose([(get_generic_superuser(), user, user_info_msg)])
         user.email_user(_("your authorship has been rejected"), user_info_msg, settings.FROM_EMAIL)
 
         notifications.success(self.request, admin_info_msg)
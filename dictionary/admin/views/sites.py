@@ -6,7 +6,9 @@ from django.shortcuts import redirect, reverse
 from django.utils.translation import gettext as _
 from django.views.generic import TemplateView
 
+from dictionary.conf import settings
 from dictionary.utils.admin import log_admin
+from dictionary.utils.instrumentation import ViewStatistics
 
 
 class ClearCache(PermissionRequiredMixin, TemplateView):
@@ -30,3 +32,21 @@ class ClearCache(PermissionRequiredMixin, TemplateView):
         log_admin(f"Cleared cache. /cache_key: {key}/", request.user, Site, request.site)
         notifications.warning(request, message)
         return redirect(reverse("admin:index"))
+
+
+class Instrumentation(TemplateView):
+    template_name = "admin/sites/instrumentation.html"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context.update(admin.site.each_context(self.request))
+        context["title"] = _("View statistics")
+        context["enabled"] = settings.INSTRUMENTATION
+        context["views"] = ViewStatistics().averages()
+        return context
+
+    def post(self, request, *args, **kwargs):
+        ViewStatistics().reset()
+        log_admin("Reset view statistics.", request.user, Site, request.site)
+        notifications.warning(request, _("View statistics have been reset."))
+        return redirect(reverse("admin:instrumentation"))
@@ -2,7 +2,7 @@ from django.contrib import messages as notifications
 from django.shortcuts import redirect
 from django.utils.translation import gettext, gettext_lazy as _, ngettext, pgettext
 
-from dictionary.models import Author, Entry, Topic
+from dictionary.models import Author, Entry, Topic, TopicActivity
 from dictionary.utils import get_generic_superuser, parse_date_or_none
 from dictionary.utils.admin import log_admin
 from dictionary.utils.views import IntermediateActionView
@@ -59,6 +59,8 @@ class TopicMove(IntermediateActionView):
                 ]
                 Entry.objects.bulk_create(bulk_list)
 
+            TopicActivity.objects.refresh([target_topic.pk, *(obj.pk for obj in topic_list_raw)])
+
             # Admin log
             log_admin(
                 f"TopicMove action, count: {entries_count}. sources->{topic_list_raw},"
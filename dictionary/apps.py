@@ -26,6 +26,14 @@ class DictionaryConfig(AppConfig):
     ENTRIES_PER_PAGE_DEFAULT = 10  # For guests only
     ENTRIES_PER_PAGE_PROFILE = 15  # Global setting
 
+    ENTRY_HTML_CACHE_TIMEOUT = 86400 * 30
+    """
+    ADVANCED: Entries are rendered into HTML (in each language) as they are
+    saved, and kept in cache for this many seconds. Entries whose HTML is
+    missing are rendered on the fly. Use 'manage.py renderentries' to render
+    existing entries beforehand.
+    """
+
     GENERIC_SUPERUSER_USERNAME = "sozluk"
     """
     Give the username of the user who does administrative actions in the site.
@@ -50,6 +58,42 @@ class DictionaryConfig(AppConfig):
     cache timeout, queryset size and nice boundary can be found in views.list.Index
     """
 
+    REDIS_RANDOM_POOL = False
+    """
+    ADVANCED: Set this to True to draw the entries of 'random_records' from a
+    shuffled pool of entry ids kept in Redis and refilled by a periodic task
+    (see dictionary.utils.sampling.EntryPool), instead of guessing ids in the
+    database. Falls back to database queries if the pool is not available.
+    """
+
+    USER_AGENT_CACHE_SIZE = 1000
+    """
+    ADVANCED: Number of distinct user agent strings whose mobile
+    classification is kept in memory (per process) by
+    MobileDetectionMiddleware, see dictionary.utils.useragents.UserAgentCache.
+    """
+
+    REDIS_USER_AGENT_CACHE = False
+    """
+    ADVANCED: Set this to True to share mobile classifications of user
+    agent strings among processes through Redis. User agents that are not
+    in the memory of a process are looked up in Redis before being parsed.
+    Redis keeps USER_AGENT_CACHE_SIZE classifications at most, evicting the
+    least recently used ones. Use 'manage.py useragents' to see the hit ratio
+    of the caches.
+    """
+
+    INSTRUMENTATION = False
+    """
+    ADVANCED: Set this to True to record the number of queries, SQL time,
+    cache gets/hits/sets and template render time of each request (see
+    dictionary.middleware.instrumentation). Metrics are sent to clients in
+    Server-Timing header and logged by 'dictionary.middleware.instrumentation'
+    logger. Per-view averages can be seen in admin. Recording has some
+    overhead and the header reveals timings, so keep this off in production
+    unless you are investigating performance.
+    """
+
     #  <-----> START OF CATEGORY RELATED SETTINGS <----->  #
 
     NON_DB_CATEGORIES_META = {
@@ -174,12 +218,19 @@ class DictionaryConfig(AppConfig):
     DEFAULT_CACHE_TIMEOUT = 90
     """ADVANCED: Set default timeout for category caching."""
 
-    EXCLUSIVE_TIMEOUTS = {"top": 86400, "today-in-history": 86400, "today": 300, "popular": 30}
+    EXCLUSIVE_TIMEOUTS = {"top": 86400, "today-in-history": 86400, "today": 300, "popular": 30, "followups": 30}
     """
     ADVANCED: Set exclusive timeouts (seconds) for categories if you don't want
     them to use the default.
     """
 
+    CATEGORY_CACHE_GRACE = 60
+    """
+    ADVANCED: Keep category caches this many seconds more after they expire.
+    While a single worker recomputes an expired list, the other requests are
+    served the expired (stale) list during this period.
+    """
+
     REFRESH_TIMEOUT = 0.1337
     """
     ADVANCED: For 'today', set the timeout for refresh interval. (This also sets
@@ -190,7 +241,7 @@ class DictionaryConfig(AppConfig):
     fine for production.
     """
 
-    UNCACHED_CATEGORIES = ("drafts", "wishes_owned", "followups")
+    UNCACHED_CATEGORIES = ("drafts", "wishes_owned")
     """
     Don't cache these categories.
     To disable a tab of a category, you can insert "categoryname_tabname",
@@ -210,6 +261,34 @@ class DictionaryConfig(AppConfig):
     YEAR_RANGE = tuple(range(now.year - 1, 2018 - 1, -1))
     """Years available for today-in-history"""
 
+    TOPIC_LIST_ROLLUP = False
+    """
+    ADVANCED: Set this to True to serve 'today', 'popular', 'novices',
+    'uncategorized' and database categories from topic activity rollup
+    (TopicActivity), instead of aggregating over entries. This is much
+    faster on big databases, but entry counts are summed over hourly
+    buckets, so they might include entries that were written up to an
+    hour earlier than the usual 24 hours.
+
+    Rollup is always kept up to date regardless of this setting. Use
+    'manage.py topicactivity check' to compare it against entries.
+    """
+
+    REDIS_POPULAR_RANKING = False
+    """
+    ADVANCED: Set this to True to serve 'popular' from entry counts kept in
+    Redis sorted sets (see dictionary.utils.ranking.PopularRanking). Falls
+    back to database queries if Redis is not available. Takes precedence
+    over TOPIC_LIST_ROLLUP for 'popular'.
+    """
+
+    REDIS_AUTOCOMPLETE = False
+    """
+    ADVANCED: Set this to True to complete topic titles from a prefix index
+    kept in Redis (see dictionary.utils.autocomplete.TopicCompletion). Falls
+    back to database queries if Redis is not available.
+    """
+
     #  <-----> END OF CATEGORY RELATED SETTINGS <----->  #
 
     DISABLE_GENERATIONS = False
@@ -276,6 +355,25 @@ class DictionaryConfig(AppConfig):
     TOTAL_VOTE_LIMIT_PER_USER = 160
     """Similar to daily vote limit per user, but considers all time votes."""
 
+    REDIS_VOTE_LIMITS = False
+    """
+    ADVANCED: Set this to True to check vote limits against sliding window
+    counters kept in Redis (see dictionary.utils.votes.VoteLimits), instead
+    of counting votes in the database. Falls back to database queries if
+    Redis is not available. Use 'manage.py votelimits check' to compare the
+    counters against the database.
+    """
+
+    KARMA_LEDGER = False
+    """
+    ADVANCED: Set this to True to write karma changes (of votes and entry
+    deletions) to an append-only ledger instead of updating the karma of
+    authors on the spot, so that concurrent votes on the entries of the same
+    author don't wait for each other. The ledger is folded into the karma of
+    authors every minute by a periodic task, karma flairs and eligibility
+    lag behind until then.
+    """
+
     KARMA_EXPRESSIONS = {
         range(25, 50): _("chaotic neutral"),
         range(50, 100): _("chronic backup"),
@@ -386,6 +484,11 @@ class DictionaryConfig(AppConfig):
     (Integer from 1 to 95.)
     """
 
+    COMPRESS_BACKUPS = False
+    """
+    Set this to True to gzip-compress backup files of users (backup-*.json.gz).
+    """
+
     XSENDFILE_HEADER_NAME = "X-Accel-Redirect"
     """
     Nginx only. Apache counterpart is 'X-Sendfile' which requires mod_xsendfile.
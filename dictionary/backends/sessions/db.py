@@ -1,4 +1,4 @@
-from django.contrib.auth import get_user_model
+from django.contrib.auth import SESSION_KEY, get_user_model
 from django.contrib.sessions.backends.db import SessionStore as DBStore
 from django.contrib.sessions.base_session import AbstractBaseSession
 from django.db import models
@@ -23,10 +23,9 @@ class SessionStore(DBStore):
     def create_model_instance(self, data):
         obj = super().create_model_instance(data)
 
+        # The id is set as is, without fetching the user.
         try:
-            user_id = int(data.get("_auth_user_id"))
-            user = User.objects.get(pk=user_id)
-        except (ValueError, TypeError, User.DoesNotExist):
-            user = None
-        obj.user = user
+            obj.user_id = int(data.get(SESSION_KEY))
+        except (ValueError, TypeError):
+            obj.user_id = None
         return obj
@@ -0,0 +1,93 @@
+from contextlib import suppress
+
+from django.contrib.auth import SESSION_KEY
+
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+
+from .cached_db import SessionStore as CachedDBStore
+
+KEY_PREFIX = "dictionary.indexed_session"
+
+
+class SessionIndex:
+    """
+    Redis set of the session keys of a user, so that all the sessions of the
+    user can be invalidated in a constant number of round trips (see
+    utils.flush_all_sessions). The set expires along with the longest lasting
+    session in it. Keys of the sessions that are already gone are harmless.
+    """
+
+    prefix = "sessionindex"
+
+    def __init__(self, user_id):
+        self.redis = get_redis_connection("default")
+        self.key = f"{self.prefix}:{user_id}"
+
+    def add(self, session_key, age):
+        pipe = self.redis.pipeline()
+        pipe.sadd(self.key, session_key)
+        pipe.ttl(self.key)
+        _, ttl = pipe.execute()
+
+        if ttl < age:
+            self.redis.expire(self.key, age)
+
+    def discard(self, session_key):
+        self.redis.srem(self.key, session_key)
+
+    def pop(self, keep=None):
+        """Empty the set, except given session key, and return the session keys that were in it."""
+        pipe = self.redis.pipeline()
+        pipe.smembers(self.key)
+        pipe.delete(self.key)
+
+        if keep is not None:
+            pipe.sadd(self.key, keep)
+
+        keys = {key.decode() for key in pipe.execute()[0]}
+        keys.discard(keep)
+        return keys
+
+
+class SessionStore(CachedDBStore):
+    """
+    Cached database sessions whose keys are indexed per user (see
+    SessionIndex). Sessions are indexed as they are saved, or when they are
+    read from the database, which also covers the sessions created before
+    switching to this engine, as they are cached under a different prefix.
+    """
+
+    cache_key_prefix = KEY_PREFIX
+
+    def _index(self, method, user_id, *args):
+        if user_id is not None:
+            with suppress(RedisError):
+                getattr(SessionIndex(user_id), method)(*args)
+
+    def _get_session_from_db(self):
+        session = super()._get_session_from_db()
+
+        if session is not None:
+            self._index("add", session.user_id, session.session_key, self.get_expiry_age(expiry=session.expire_date))
+
+        return session
+
+    def save(self, must_create=False):
+        super().save(must_create)
+        self._index("add", self._session.get(SESSION_KEY), self.session_key, self.get_expiry_age())
+
+    def delete(self, session_key=None):
+        user_id = getattr(self, "_session_cache", {}).get(SESSION_KEY)
+        super().delete(session_key)
+
+        if session_key := session_key or self.session_key:
+            self._index("discard", user_id, session_key)
+
+    def flush(self):
+        # Session data is cleared before the deletion.
+        user_id, session_key = self._session.get(SESSION_KEY), self.session_key
+        super().flush()
+
+        if session_key is not None:
+            self._index("discard", user_id, session_key)
@@ -3,17 +3,21 @@ from django.core.cache import cache
 
 from .cached_db import KEY_PREFIX, __name__ as cached_db_name
 from .db import PairedSession
+from .indexed import KEY_PREFIX as INDEXED_KEY_PREFIX, SessionIndex, __name__ as indexed_name
 
 
-def flush_all_sessions(user):
-    """Invalidate ALL sessions of a user."""
+def flush_all_sessions(user, keep=None):
+    """
+    Invalidate ALL sessions of a user, except the one with given key. Takes
+    a constant number of round trips, regardless of the number of sessions.
+    """
 
-    sessions = PairedSession.objects.filter(user=user)
-    cached = settings.SESSION_ENGINE == cached_db_name
+    sessions = PairedSession.objects.filter(user=user).exclude(session_key=keep)
 
-    for session in sessions:
-        if cached:
-            cache_key = KEY_PREFIX + session.session_key  # Determined in DjangoCachedDBStore
-            cache.delete(cache_key)
+    if settings.SESSION_ENGINE == indexed_name:
+        cache.delete_many([INDEXED_KEY_PREFIX + key for key in SessionIndex(user.pk).pop(keep=keep)])
+    elif settings.SESSION_ENGINE == cached_db_name:
+        # Determined in DjangoCachedDBStore
+        cache.delete_many([KEY_PREFIX + key for key in sessions.values_list("session_key", flat=True)])
 
-        session.delete()
+    sessions.delete()
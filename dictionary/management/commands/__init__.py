@@ -1,5 +1,9 @@
+import statistics
+import time
+
 from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 
 
 class BaseDebugCommand(BaseCommand):
@@ -11,3 +15,39 @@ class BaseDebugCommand(BaseCommand):
 
     def handle(self, *args, **options):
         raise NotImplementedError("Provide a handle() method yourself!")
+
+
+class BaseBenchmarkCommand(BaseDebugCommand):
+    """
+    Benchmarks run in a transaction that gets rolled back at the end, so the
+    synthetic data they create doesn't persist.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=5, help="Number of times to run each case.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.benchmark(**options)
+            transaction.set_rollback(True)
+
+    def benchmark(self, **options):
+        raise NotImplementedError("Provide a benchmark() method yourself!")
+
+    def measure(self, label, func, repeat):
+        """Call func repeatedly, report and return the best timing (seconds) along with the result."""
+        timings = []
+
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func()
+            timings.append(time.perf_counter() - start)
+
+        self.stdout.write(
+            f"{label:<40} best: {min(timings) * 1000:10.2f}ms  median: {statistics.median(timings) * 1000:10.2f}ms"
+        )
+        return min(timings), result
+
+    def compare(self, baseline, candidate):
+        """Report the speedup of candidate over baseline timings."""
+        self.stdout.write(self.style.SUCCESS(f"Speedup: {baseline / candidate:.1f}x"))
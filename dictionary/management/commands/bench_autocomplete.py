@@ -0,0 +1,108 @@
+import random
+import statistics
+import time
+from unittest import mock
+
+from django.db import connection
+from django.db.models import Q
+
+from dictionary.conf import settings
+from dictionary.management.commands import BaseBenchmarkCommand
+from dictionary.models import Author, Entry, Topic, TopicActivity
+from dictionary.utils.autocomplete import TopicCompletion, complete_authors, complete_topics
+
+SYLLABLES = ("ka", "le", "mi", "no", "pu", "ra", "se", "ti", "vo", "ya", "zu", "bel", "dor", "gan", "hus", "lim")
+
+
+def legacy_topics(lookup, limit):
+    return list(
+        Topic.objects_published.filter(Q(title__istartswith=lookup) | Q(title__icontains=lookup), is_censored=False)
+        .only("title")[:limit]
+        .values_list("title", flat=True)
+    )
+
+
+def legacy_authors(user, lookup, limit):
+    queryset = Author.objects_accessible.filter(username__istartswith=lookup).only("username", "slug", "is_novice")
+    blocked, blocked_by = user.blocked.all(), user.blocked_by.all()
+    return list(queryset.exclude(Q(pk__in=blocked) | Q(pk__in=blocked_by))[:limit])
+
+
+class Command(BaseBenchmarkCommand):
+    help = "Compares autocompletion latency per keystroke, as the lookups of typing words letter by letter."
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("--topics", type=int, default=200000)
+        parser.add_argument("--authors", type=int, default=50000)
+        parser.add_argument("--words", type=int, default=50, help="Number of words to type.")
+
+    def benchmark(self, **options):
+        self.stdout.write("Creating synthetic dataset...")
+        rng = random.Random(0)
+
+        def word():
+            return "".join(rng.choices(SYLLABLES, k=rng.randint(2, 4)))
+
+        authors = Author.objects.bulk_create(
+            (
+                Author(username=f"{word()} {i}", slug=f"bench-{i}", email=f"bench{i}@bench", is_novice=False)
+                for i in range(options["authors"])
+            ),
+            batch_size=5000,
+        )
+        topics = Topic.objects.bulk_create(
+            (
+                Topic(title=f"{word()} {word()} {i}", slug=f"bench-{i}", is_censored=i % 50 == 0)
+                for i in range(options["topics"])
+            ),
+            batch_size=5000,
+        )
+        # Every third topic is published.
+        Entry.objects_all.bulk_create(
+            (Entry(topic=topic, author=authors[i % len(authors)]) for i, topic in enumerate(topics) if i % 3),
+            batch_size=5000,
+        )
+        TopicActivity.objects.rebuild()
+        user = authors[0]
+        user.blocked.add(*rng.sample(authors, 20))
+        rng.choice(authors).blocked.add(user)
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE dictionary_author, dictionary_topic, dictionary_entry, dictionary_topicactivity")
+
+        completion = TopicCompletion()
+        completion.redis.delete(f"{completion.prefix}:fresh")
+        completion.rebuild()
+
+        words = [word() for _ in range(options["words"])]
+        keystrokes = [text[:length] for text in words for length in range(1, len(text) + 1)]
+        self.stdout.write(f"{len(keystrokes)} keystrokes, typing {len(words)} words:\n")
+
+        self.type("topics (legacy)", keystrokes, lambda lookup: legacy_topics(lookup, 7), options["repeat"])
+        self.type("topics (database)", keystrokes, lambda lookup: complete_topics(lookup, 7), options["repeat"])
+
+        try:
+            with mock.patch.object(settings, "REDIS_AUTOCOMPLETE", True):
+                self.type("topics (redis)", keystrokes, lambda lookup: complete_topics(lookup, 7), options["repeat"])
+        finally:
+            # Synthetic titles shouldn't outlive the benchmark.
+            completion.redis.delete(completion.key, f"{completion.prefix}:fresh")
+
+        self.type("authors (legacy)", keystrokes, lambda lookup: legacy_authors(user, lookup, 3), options["repeat"])
+        self.type("authors", keystrokes, lambda lookup: complete_authors(user, lookup, 3), options["repeat"])
+
+    def type(self, label, keystrokes, func, repeat):
+        timings = []
+
+        for _ in range(repeat):
+            for lookup in keystrokes:
+                start = time.perf_counter()
+                func(lookup)
+                timings.append(time.perf_counter() - start)
+
+        quantiles = statistics.quantiles(timings, n=100)
+        self.stdout.write(
+            f"{label:<25} p50: {quantiles[49] * 1000:8.2f}ms  p99: {quantiles[98] * 1000:8.2f}ms"
+            f"  max: {max(timings) * 1000:8.2f}ms"
+        )
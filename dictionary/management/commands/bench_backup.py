@@ -0,0 +1,103 @@
+import json
+import random
+import tempfile
+import time
+import tracemalloc
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.test import override_settings
+
+from dictionary.conf import settings
+from dictionary.management.commands import BaseBenchmarkCommand
+from dictionary.models import Author, BackUp, ConversationArchive, Entry, Topic
+from dictionary.utils.serializers import ArchiveSerializer
+
+
+def legacy_process(backup):
+    """Former implementation of BackUp.process, for comparison (without the message)."""
+    serializer = ArchiveSerializer()
+    entries = backup.author.entry_set(manager="objects_published").select_related("topic")
+    conversations = backup.author.conversationarchive_set.all()
+
+    entries_text = serializer.serialize(entries, fields=("topic__title", "content", "date_created", "date_edited"))
+    conversations_text = (
+        "[%s]"
+        % "".join('{"target": "%s", "messages": %s},' % (item.target, item.messages) for item in conversations)[:-1]
+    )
+
+    content = '{"entries": %s, "conversations": %s}' % (entries_text, conversations_text)
+    backup.is_ready = True
+    backup.file.save("backup", ContentFile(content.encode("utf-8")), save=True)
+
+
+class Command(BaseBenchmarkCommand):
+    help = "Compares duration and peak (Python) memory usage of building backup files."
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("--entries", type=int, default=50000)
+        parser.add_argument("--conversations", type=int, default=100)
+        parser.add_argument("--size", type=int, default=1000, help="Approximate size of entries, in characters.")
+
+    def benchmark(self, **options):
+        self.stdout.write("Creating synthetic dataset...")
+        rng = random.Random(0)
+        words = ["lorem", "ipsum", "dolor", "sit", "amet", "çağ", "ünlü", "şey"]
+
+        def text(size):
+            return " ".join(rng.choices(words, k=size // 5))
+
+        author = Author.objects.create(username="benchbackup", slug="benchbackup", email="benchbackup@bench")
+        topics = Topic.objects.bulk_create(Topic(title=f"benchbackup {i}", slug=f"benchbackup-{i}") for i in range(500))
+        Entry.objects_all.bulk_create(
+            (
+                Entry(topic=topics[i % len(topics)], author=author, content=text(options["size"]))
+                for i in range(options["entries"])
+            ),
+            batch_size=5000,
+        )
+        ConversationArchive.objects.bulk_create(
+            ConversationArchive(
+                holder=author,
+                target=f"bench{i}",
+                slug=f"bench{i}",
+                messages=json.dumps([{"body": text(200)} for _ in range(100)]),
+            )
+            for i in range(options["conversations"])
+        )
+
+        with (
+            tempfile.TemporaryDirectory() as media,
+            override_settings(
+                STORAGES={
+                    "default": {
+                        "BACKEND": "django.core.files.storage.FileSystemStorage",
+                        "OPTIONS": {"location": media},
+                    }
+                }
+            ),
+            # Only the files are of interest.
+            mock.patch("dictionary.models.author.get_generic_superuser", return_value=author),
+        ):
+            for label, process in (
+                ("legacy", legacy_process),
+                ("streaming", BackUp.process),
+                ("streaming (gzip)", BackUp.process),
+            ):
+                with mock.patch.object(settings, "COMPRESS_BACKUPS", label.endswith("(gzip)")):
+                    self.run(label, process, author)
+
+    def run(self, label, process, author):
+        backup = BackUp.objects.create(author=author)
+        tracemalloc.start()
+        start = time.perf_counter()
+        process(backup)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        size = backup.file.size
+        backup.delete()
+        self.stdout.write(
+            f"{label:<20} {elapsed * 1000:10.2f}ms  peak memory: {peak / 2**20:8.2f}MB  file: {size / 2**20:8.2f}MB"
+        )
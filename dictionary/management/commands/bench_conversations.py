@@ -0,0 +1,99 @@
+import random
+
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import Count, Max, Prefetch, Q
+
+from dictionary.management.commands import BaseBenchmarkCommand
+from dictionary.models import Author, Conversation, Message
+
+
+def legacy_list_for_user(user):
+    """Former implementation of ConversationManager.list_for_user, for comparison."""
+    return (
+        Conversation.objects.filter(holder=user)
+        .annotate(
+            message_sent_last=Max("messages__sent_at"),
+            unread_count_=Count("messages", filter=Q(messages__recipient=user, messages__read_at__isnull=True)),
+        )
+        .order_by("-message_sent_last")
+    )
+
+
+def legacy_inbox(user, page):
+    # Like the former ConversationList view and inbox template.
+    queryset = (
+        legacy_list_for_user(user)
+        .select_related("target")
+        .prefetch_related(Prefetch("messages", queryset=Message.objects.select_related("recipient")))
+    )
+    chats = Paginator(queryset, 10).page(page)
+    return [(chat.pk, chat.messages.latest().pk, chat.unread_count_) for chat in chats]
+
+
+def inbox(user, page):
+    queryset = Conversation.objects.list_for_user(user).select_related("target", "latest_message")
+    chats = Paginator(queryset, 10).page(page)
+    return [(chat.pk, chat.latest_message.pk, chat.unread_count) for chat in chats]
+
+
+class Command(BaseBenchmarkCommand):
+    help = "Compares inbox page loads and unread message counts of an author with thousands of conversations."
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("--conversations", type=int, default=3000)
+        parser.add_argument("--messages", type=int, default=20, help="Number of messages per conversation.")
+
+    def benchmark(self, **options):
+        self.stdout.write("Creating synthetic dataset...")
+        rng = random.Random(0)
+        user = Author.objects.create(username="benchuser", slug="benchuser", email="benchuser@bench")
+        targets = Author.objects.bulk_create(
+            Author(username=f"bench{i}", slug=f"bench{i}", email=f"bench{i}@bench")
+            for i in range(options["conversations"])
+        )
+
+        for _ in range(options["messages"]):
+            # Each round messages every target, in random order and direction.
+            batch = []
+
+            for target in rng.sample(targets, len(targets)):
+                sender, recipient = (user, target) if rng.random() < 0.5 else (target, user)
+                batch.append(Message(sender=sender, recipient=recipient, body="bench"))
+
+            Message.objects.bulk_deliver(batch)
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE dictionary_conversation, dictionary_conversation_messages, dictionary_message")
+
+        pages = (1, options["conversations"] // 20)
+
+        for page in pages:
+            self.stdout.write(f"\nInbox page {page}:")
+            baseline, expected = self.measure("legacy", lambda p=page: legacy_inbox(user, p), options["repeat"])
+            candidate, result = self.measure("list_for_user", lambda p=page: inbox(user, p), options["repeat"])
+
+            if expected != result:
+                self.stdout.write(self.style.ERROR("Results differ!"))
+
+            self.compare(baseline, candidate)
+
+        self.stdout.write("\nUnread message count:")
+        baseline, expected = self.measure(
+            "legacy",
+            lambda: user.conversations.aggregate(
+                count=Count("messages", filter=Q(messages__recipient=user, messages__read_at__isnull=True))
+            )["count"],
+            options["repeat"],
+        )
+        candidate, result = self.measure(
+            "unread_count column",
+            lambda: Author.unread_message_count.func(user),
+            options["repeat"],
+        )
+
+        if expected != result:
+            self.stdout.write(self.style.ERROR("Results differ!"))
+
+        self.compare(baseline, candidate)
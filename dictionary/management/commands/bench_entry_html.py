@@ -0,0 +1,55 @@
+import random
+
+from dictionary.management.commands import BaseBenchmarkCommand
+from dictionary.models import Author, Entry, Topic
+from dictionary.templatetags.filters import formatted, formatted_entry, prefetch_entry_html
+
+CORPUS = (
+    "i think this is the best answer so far (see: #{n}). also see `:some reference` for more.",
+    "long story short: (see: other topic) and (search: keywords here) and `swh` `#{n}`.",
+    "check this out https://www.example.com/path/to/some/article-{n}?utm=source&page=2 it's great",
+    "[https://www.example.com/labelled/link/{n} labelled link] and (image: abcd{n:04d}) too",
+    "internal links: https://sozluk.me/entry/{n}/ and https://sozluk.me/topic/some-topic-{n}/",
+    "plain text with no formatting at all, just some words here and there, nothing else to see. " * 4,
+    "a list of references: `first`, `second`, `third`, (see: fourth) (see: @author{n}) `@author`",
+)
+"""Entry contents that are meant to represent the common usage of the formatting syntax."""
+
+
+class Command(BaseBenchmarkCommand):
+    help = "Compares per-entry render cost of formatting entries on the fly and reading their stored HTML."
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("--entries", type=int, default=1000)
+
+    def benchmark(self, **options):
+        self.stdout.write("Creating synthetic dataset...")
+        author = Author.objects.create(username="bench", slug="bench", email="bench@bench", is_novice=False)
+        topic = Topic.objects.create(title="bench")
+
+        for n in range(options["entries"]):
+            Entry.objects.create(topic=topic, author=author, content=random.choice(CORPUS).format(n=n))
+
+        entries = list(Entry.objects.filter(topic=topic))
+        size = len(entries)
+
+        def live():
+            return [formatted(entry.content) for entry in entries]
+
+        def stored():
+            for entry in entries:
+                del entry.html  # Drop prefetched HTML from the previous run.
+
+            prefetch_entry_html(entries)
+            return [formatted_entry(entry) for entry in entries]
+
+        prefetch_entry_html(entries)
+        live_time, expected = self.measure("formatted (live)", live, options["repeat"])
+        stored_time, result = self.measure("formatted_entry (stored)", stored, options["repeat"])
+
+        if expected != result:
+            self.stdout.write(self.style.ERROR("Results differ!"))
+
+        self.stdout.write(f"Per entry: {live_time / size * 1e6:.1f}µs -> {stored_time / size * 1e6:.1f}µs")
+        self.compare(live_time, stored_time)
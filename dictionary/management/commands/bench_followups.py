@@ -0,0 +1,129 @@
+import random
+
+from django.db import connection
+
+from dictionary.management.commands import BaseBenchmarkCommand
+from dictionary.models import Author, Entry, Topic, TopicActivity
+from dictionary.utils import time_threshold
+from dictionary.utils.managers import TopicQueryHandler
+
+
+def legacy_followups(user):
+    """The raw SQL implementation of followups, prior to FollowupMarker."""
+
+    pk = user.pk
+    threshold = time_threshold(hours=120)  # in 5 days
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+        select
+          s.title,
+          s.slug,
+          s.count
+        from
+          (
+            select
+              tt.title,
+              tt.slug,
+              e.count,
+              e.max_id
+            from
+              (
+                select
+                  z.topic_id,
+                  count(
+                    case
+                    when z.id > k.max_id
+                    and not z.is_draft
+                    and z.author_id not in (
+                      select to_author_id
+                      from dictionary_author_blocked
+                      where from_author_id = k.sender_id
+                    )
+                    and case
+                        when not k.sender_is_novice then
+                        not (select is_novice from dictionary_author where id = z.author_id)
+                        else true end
+                    then z.id end
+                  ) as count,
+                  k.max_id
+                from
+                  dictionary_entry z
+                  inner join (
+                    select
+                      topic_id,
+                      max(de.id) as max_id,
+                      de.author_id as sender_id,
+                      (select is_novice from dictionary_author where id = de.author_id) as sender_is_novice
+                    from
+                      dictionary_entry de
+                    where
+                      de.date_created >= %s
+                      and de.author_id = %s
+                    group by
+                      author_id,
+                      topic_id
+                  ) k on k.topic_id = z.topic_id
+                group by
+                  z.topic_id,
+                  k.max_id
+              ) e
+              inner join dictionary_topic tt on tt.id = e.topic_id
+          ) s
+        where
+          s.count > 0
+        order by
+          s.max_id desc
+        """,
+            [threshold, pk],
+        )
+
+        columns = [col[0] for col in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+class Command(BaseBenchmarkCommand):
+    help = "Compares the followups query against the raw SQL it replaced, on a synthetic dataset."
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("--topics", type=int, default=10000)
+        parser.add_argument("--entries", type=int, default=10, help="Number of entries per topic.")
+        parser.add_argument("--authors", type=int, default=500)
+        parser.add_argument("--followed", type=int, default=1000, help="Number of topics the user has entries in.")
+
+    def benchmark(self, **options):
+        self.stdout.write("Creating synthetic dataset...")
+        authors = Author.objects.bulk_create(
+            Author(username=f"bench{i}", slug=f"bench{i}", email=f"bench{i}@bench", is_novice=i % 10 == 0)
+            for i in range(options["authors"])
+        )
+        topics = Topic.objects.bulk_create(
+            Topic(title=f"bench {i}", slug=f"bench-{i}") for i in range(options["topics"])
+        )
+        user, others = authors[1], authors[2:]
+        followed = set(random.sample(range(len(topics)), min(options["followed"], len(topics))))
+
+        entries = []
+
+        for index, topic in enumerate(topics):
+            entries.extend(Entry(topic=topic, author=random.choice(others)) for _ in range(options["entries"]))
+
+            if index in followed:
+                entries.insert(len(entries) - random.randrange(options["entries"] + 1), Entry(topic=topic, author=user))
+
+        Entry.objects_all.bulk_create(entries, batch_size=5000)
+
+        user.blocked.add(*random.sample(others, 10))
+        TopicActivity.objects.rebuild()
+
+        legacy, expected = self.measure("raw SQL", lambda: legacy_followups(user), options["repeat"])
+        indexed, result = self.measure(
+            "FollowupMarker", lambda: list(TopicQueryHandler().followups(user)), options["repeat"]
+        )
+
+        if result != expected:
+            self.stdout.write(self.style.ERROR("Results differ!"))
+
+        self.compare(legacy, indexed)
@@ -0,0 +1,104 @@
+import random
+import re
+
+from django.utils.html import escape, mark_safe
+
+from dictionary.management.commands import BaseBenchmarkCommand
+from dictionary.management.commands.bench_entry_html import CORPUS
+from dictionary.templatetags.filters import (
+    IMAGE,
+    IMAGE_REGEX,
+    RE_ENTRY_CHARSET,
+    RE_TOPIC_CHARSET,
+    SEARCH,
+    SEARCH_EXPR,
+    SEE,
+    SEE_EXPR,
+    formatted,
+    linkify,
+    q_unescape,
+)
+from dictionary.utils import RE_WEBURL, RE_WEBURL_NC, i18n_lower, smart_lower
+
+
+def legacy_formatted(raw_entry):
+    """The implementation of 'formatted' prior to Formatter, which applied each rule separately."""
+
+    if not raw_entry:
+        return ""
+
+    entry = escape(raw_entry)
+    replacements = (
+        (rf"\({SEE_EXPR}: #{RE_ENTRY_CHARSET}\)", rf'({SEE}: <a href="/entry/\1/">#\1</a>)'),
+        (
+            rf"\({SEE_EXPR}: (?!<)(@?{RE_TOPIC_CHARSET})\)",
+            lambda m: rf'({SEE}: <a href="/topic/?q={q_unescape(m.group(1))}">{m.group(1)}</a>)',
+        ),
+        (
+            rf"`:{RE_TOPIC_CHARSET}`",
+            lambda m: rf'<a data-sup="({SEE}: {m.group(1)})" href="/topic/?q={q_unescape(m.group(1))}" title="({SEE}: {m.group(1)})">*</a>',  # noqa
+        ),
+        (rf"`#{RE_ENTRY_CHARSET}`", r'<a href="/entry/\1/">#\1</a>'),
+        (rf"`(@?{RE_TOPIC_CHARSET})`", lambda m: rf'<a href="/topic/?q={q_unescape(m.group(1))}">{m.group(1)}</a>'),
+        (
+            rf"\({SEARCH_EXPR}: (@?{RE_TOPIC_CHARSET})\)",
+            rf'({SEARCH}: <a data-keywords="\1" class="quicksearch" role="button" tabindex="0">\1</a>)',
+        ),
+        (IMAGE_REGEX, rf'<a role="button" tabindex="0" data-img="/img/\1" aria-expanded="false">{IMAGE}</a>'),
+        (
+            rf"\[{RE_WEBURL} (?!\s|{RE_WEBURL_NC})([a-z0-9 ğçıöşü#&@()_+=':%/\",.!?*~`\[{{}}<>^;\\|-]+)(?<!\s)\]",
+            r'<a rel="ugc nofollow noopener" target="_blank" href="\1\2">\3</a>',
+        ),
+        (rf"(?<!\"){RE_WEBURL}", lambda m: linkify(m.group(1), m.group(2))),
+    )
+
+    for tag in replacements:
+        entry = re.sub(*tag, entry)
+
+    return mark_safe(entry)
+
+
+def legacy_smart_lower(value):
+    """The implementation of smart_lower prior to precompiling its regex."""
+    url_nc = re.compile(f"({RE_WEBURL_NC})")
+
+    if url_nc.search(value):
+        substrings = url_nc.split(value)
+        for idx, substr in enumerate(substrings):
+            if not url_nc.match(substr):
+                substrings[idx] = i18n_lower(substr)
+        return "".join(substrings)
+
+    return i18n_lower(value)
+
+
+class Command(BaseBenchmarkCommand):
+    help = "Compares the throughput of 'formatted' and 'smart_lower' against their former implementations."
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("--entries", type=int, default=5000, help="Size of the corpus.")
+
+    def benchmark(self, **options):
+        corpus = [random.choice(CORPUS).format(n=n) for n in range(options["entries"])]
+        size, repeat = len(corpus), options["repeat"]
+
+        def report(label, baseline, candidate):
+            self.stdout.write(f"{label}: {size / baseline:.0f} -> {size / candidate:.0f} entries/second")
+            self.compare(baseline, candidate)
+
+        legacy, expected = self.measure("formatted (sequential)", lambda: list(map(legacy_formatted, corpus)), repeat)
+        compiled, result = self.measure("formatted (single pass)", lambda: list(map(formatted, corpus)), repeat)
+
+        if result != expected:
+            self.stdout.write(self.style.ERROR("Results differ!"))
+
+        report("formatted", legacy, compiled)
+
+        legacy, expected = self.measure("smart_lower (former)", lambda: list(map(legacy_smart_lower, corpus)), repeat)
+        compiled, result = self.measure("smart_lower", lambda: list(map(smart_lower, corpus)), repeat)
+
+        if result != expected:
+            self.stdout.write(self.style.ERROR("Results differ!"))
+
+        report("smart_lower", legacy, compiled)
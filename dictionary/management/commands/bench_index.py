@@ -0,0 +1,103 @@
+import random
+from unittest import mock
+
+from django.db import connection
+from django.db.models import Max, Min
+
+from dictionary.conf import settings
+from dictionary.management.commands import BaseBenchmarkCommand
+from dictionary.models import Author, Entry, Topic
+from dictionary.utils.managers import entry_prefetch
+from dictionary.utils.sampling import EntryPool, random_entry_ids
+
+
+def legacy_random_records(size):
+    """Former implementation of Index.random_records, for comparison."""
+    qs = Entry.objects.order_by()
+
+    max_pk = qs.aggregate(Max("pk"))["pk__max"]
+    min_pk = qs.aggregate(Min("pk"))["pk__min"]
+
+    if not (min_pk and max_pk):
+        return
+
+    seen, found, attempts = set(), 0, 0
+    while found < size:
+        if attempts > 200:
+            return
+        attempts += 1
+
+        next_pk = random.randint(min_pk, max_pk)  # nosec
+        if next_pk in seen:
+            continue
+        seen.add(next_pk)
+
+        if Entry.objects.filter(pk=next_pk).exists():
+            found += 1
+            yield next_pk
+
+
+class Command(BaseBenchmarkCommand):
+    help = "Compares the latency of selecting and fetching the random entries of the home page."
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("--entries", type=int, default=100000)
+        parser.add_argument("--density", type=float, default=0.05, help="Ratio of the ids in use in sparse run.")
+        parser.add_argument("--loads", type=int, default=50, help="Number of page loads per run.")
+
+    def benchmark(self, **options):
+        self.stdout.write("Creating synthetic dataset...")
+        authors = Author.objects.bulk_create(
+            Author(username=f"bench{i}", slug=f"bench{i}", email=f"bench{i}@bench", is_novice=False) for i in range(50)
+        )
+        topic = Topic.objects.create(title="benchindex")
+        start = (Entry.objects_all.aggregate(Max("pk"))["pk__max"] or 0) + 1
+        ids = range(start, start + options["entries"])
+        step = round(1 / options["density"])
+        user = authors[0]
+        pool = EntryPool()
+
+        def create(pks):
+            Entry.objects_all.bulk_create(
+                (Entry(pk=pk, topic=topic, author=authors[pk % len(authors)], content="bench") for pk in pks),
+                batch_size=5000,
+            )
+
+        # Entries are inserted with explicit ids rather than deleted, as deleted
+        # rows can't be vacuumed within the transaction of the benchmark.
+        try:
+            create(ids[::step])
+            self.stdout.write(f"\nSparse ids ({len(ids[::step])} entries, 1 in {step} ids in use):")
+            self.run(user, pool, **options)
+
+            create(pk for pk in ids if (pk - start) % step)
+            self.stdout.write(f"\nDense ids ({len(ids)} entries):")
+            self.run(user, pool, **options)
+        finally:
+            # Synthetic ids shouldn't outlive the benchmark.
+            pool.redis.delete(pool.key, f"{pool.prefix}:fresh")
+
+    def run(self, user, pool, loads, repeat, **_options):
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE dictionary_entry")
+
+        def page(records):
+            return len(entry_prefetch(Entry.objects.filter(pk__in=list(records)).order_by(), user))
+
+        def load(select):
+            return sum(page(select()) for _ in range(loads)) / loads
+
+        baseline, shown = self.measure("legacy", lambda: load(lambda: legacy_random_records(15)), repeat)
+        self.stdout.write(f"{'':<40} {shown:.1f} entries per page")
+        candidate, shown = self.measure("random_entry_ids", lambda: load(lambda: random_entry_ids(15)), repeat)
+        self.stdout.write(f"{'':<40} {shown:.1f} entries per page")
+        self.compare(baseline, candidate)
+
+        pool.fill()
+
+        with mock.patch.object(settings, "REDIS_RANDOM_POOL", True):
+            redis, shown = self.measure("random_entry_ids (pool)", lambda: load(lambda: random_entry_ids(15)), repeat)
+
+        self.stdout.write(f"{'':<40} {shown:.1f} entries per page")
+        self.compare(baseline, redis)
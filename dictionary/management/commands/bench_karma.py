@@ -0,0 +1,34 @@
+import time
+from unittest import mock
+
+from dictionary.conf import settings
+from dictionary.management.commands.bench_votes import Command as VoteBenchmarkCommand
+from dictionary.models import KarmaChange
+from dictionary.utils.votes import EntryVote
+
+
+class Command(VoteBenchmarkCommand):
+    help = (
+        "Compares vote throughput (votes per second) of concurrent voters on the entries of a single author, updating"
+        " karma on the spot against appending to the karma ledger."
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.set_defaults(authors=1, threads=16)
+
+    def benchmark(self, **options):
+        def vote(*args):
+            return EntryVote(*args).vote()
+
+        for _ in range(options["repeat"]):
+            baseline = self.run("on the spot", vote, **options)
+
+            with mock.patch.object(settings, "KARMA_LEDGER", True):
+                candidate = self.run("ledger", vote, **options)
+
+            self.compare(1 / baseline, 1 / candidate)
+
+            start = time.perf_counter()
+            folded = KarmaChange.objects.fold()
+            self.stdout.write(f"Folded {folded} ledger rows in {(time.perf_counter() - start) * 1000:.2f}ms")
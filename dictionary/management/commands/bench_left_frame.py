@@ -0,0 +1,60 @@
+from django.core.cache import cache
+from django.template.loader import render_to_string
+
+from dictionary.management.commands import BaseBenchmarkCommand
+from dictionary.models import Author, Entry, Topic, TopicActivity
+from dictionary.utils.managers import TopicListManager
+from dictionary.utils.serializers import LeftFrame
+
+
+def legacy_left_frame(slug, page):
+    # Like the former left frame template, which serialized and rendered the frame on each page view.
+    frame = LeftFrame(TopicListManager(slug), page)
+    return render_to_string("dictionary/includes/left_frame_content.html", {"lf": frame.as_context()})
+
+
+def left_frame(slug, page):
+    return LeftFrame(TopicListManager(slug), page).as_html()
+
+
+class Command(BaseBenchmarkCommand):
+    help = "Compares left frame renders of cached topic lists, with and without caching the rendered fragment."
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("--topics", type=int, default=5000)
+        parser.add_argument("--views", type=int, default=200, help="Number of page views per run.")
+
+    def benchmark(self, **options):
+        self.stdout.write("Creating synthetic dataset...")
+        author = Author.objects.create(username="benchauthor", slug="benchauthor", email="bench@bench", is_novice=False)
+        topics = Topic.objects.bulk_create(
+            (Topic(title=f"benchframe {i}", slug=f"benchframe-{i}") for i in range(options["topics"])),
+            batch_size=5000,
+        )
+        Entry.objects_all.bulk_create((Entry(topic=topic, author=author) for topic in topics), batch_size=5000)
+        TopicActivity.objects.rebuild()
+
+        slug, views = "uncategorized", options["views"]
+        manager = TopicListManager(slug)
+        cache.delete(manager.cache_key)
+
+        try:
+            for page in (1, 2):
+                self.stdout.write(f"\n{views} page views, left frame page {page}:")
+                baseline, expected = self.measure(
+                    "serialize + render",
+                    lambda p=page: [legacy_left_frame(slug, p) for _ in range(views)],
+                    options["repeat"],
+                )
+                candidate, result = self.measure(
+                    "cached fragment", lambda p=page: [left_frame(slug, p) for _ in range(views)], options["repeat"]
+                )
+
+                if expected != result:
+                    self.stdout.write(self.style.ERROR("Results differ!"))
+
+                self.compare(baseline, candidate)
+        finally:
+            # Fragments expire along with the list.
+            cache.delete(manager.cache_key)
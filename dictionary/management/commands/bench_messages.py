@@ -0,0 +1,54 @@
+from dictionary.conf import settings
+from dictionary.management.commands import BaseBenchmarkCommand
+from dictionary.models import Author, Conversation, Message
+
+
+class Command(BaseBenchmarkCommand):
+    help = "Compares sending a message to many recipients one by one (compose) against bulk_compose."
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("--recipients", type=int, default=1000)
+
+    def benchmark(self, **options):
+        self.stdout.write("Creating synthetic dataset...")
+        recipients = Author.objects.bulk_create(
+            Author(username=f"bench{i}", slug=f"bench{i}", email=f"bench{i}@bench", is_active=True, is_novice=False)
+            for i in range(options["recipients"])
+        )
+        superuser = Author.objects.filter(username=settings.GENERIC_SUPERUSER_USERNAME).first()
+
+        if superuser is None:
+            superuser = Author.objects.create(username=settings.GENERIC_SUPERUSER_USERNAME, email="bench@bench")
+
+        sender = Author.objects.create(username="benchsender", slug="benchsender", email="benchsender@bench")
+        # Every tenth recipient blocks the sender, conversations with half of the recipients exist.
+        sender.blocked_by.add(*recipients[::10])
+        Conversation.objects.bulk_create(
+            Conversation(holder=holder, target=target)
+            for recipient in recipients[::2]
+            for holder, target in (
+                (sender, recipient),
+                (recipient, sender),
+                (superuser, recipient),
+                (recipient, superuser),
+            )
+        )
+
+        for label, author in (("generic superuser", superuser), ("author", sender)):
+            self.stdout.write(f"\nMessaging {len(recipients)} recipients as {label}:")
+            baseline, expected = self.measure(
+                "compose",
+                lambda a=author: sum(bool(Message.objects.compose(a, r, "bench")) for r in recipients),
+                options["repeat"],
+            )
+            candidate, result = self.measure(
+                "bulk_compose",
+                lambda a=author: len(Message.objects.bulk_compose((a, r, "bench") for r in recipients)),
+                options["repeat"],
+            )
+
+            if expected != result:
+                self.stdout.write(self.style.ERROR("Results differ!"))
+
+            self.compare(baseline, candidate)
@@ -0,0 +1,112 @@
+import random
+
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import F
+
+from dictionary.management.commands import BaseBenchmarkCommand
+from dictionary.models import Author, Entry, Topic
+from dictionary.utils.managers import TopicQueryHandler
+from dictionary.utils.search import search_query
+
+
+class Command(BaseBenchmarkCommand):
+    help = (
+        "Compares full-text search latency of on the fly vectors (the former title__search and content__search"
+        " lookups) against the stored, GIN indexed search vectors."
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("--entries", type=int, default=1000000)
+        parser.add_argument("--topics", type=int, default=50000)
+        parser.add_argument("--words", type=int, default=20, help="Number of words in each entry.")
+
+    def benchmark(self, **options):
+        self.stdout.write("Creating synthetic dataset...")
+        rng = random.Random(0)
+        vocabulary = [f"w{i}" for i in range(20000)]
+        weights = [1 / (rank + 1) for rank in range(len(vocabulary))]  # Zipfian, like natural language.
+
+        def text(length):
+            return " ".join(rng.choices(vocabulary, weights, k=length))
+
+        authors = Author.objects.bulk_create(
+            Author(username=f"bench{i}", slug=f"bench{i}", email=f"bench{i}@bench", is_novice=False) for i in range(50)
+        )
+        topics = Topic.objects.bulk_create(
+            (Topic(title=f"{text(3)} {i}", slug=f"bench-{i}") for i in range(options["topics"])), batch_size=5000
+        )
+        Entry.objects_all.bulk_create(
+            (
+                Entry(topic=topics[i % len(topics)], author=authors[i % len(authors)], content=text(options["words"]))
+                for i in range(options["entries"])
+            ),
+            batch_size=5000,
+        )
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE dictionary_author, dictionary_topic, dictionary_entry")
+
+        repeat = options["repeat"]
+        handler = TopicQueryHandler()
+        # A common, an average and a rare word.
+        keywords = (vocabulary[1], vocabulary[500], vocabulary[15000])
+
+        for keyword in keywords:
+            self.stdout.write(f"\nEntries matching '{keyword}' (top 10 by rank):")
+            query = search_query(keyword)
+            baseline, _ = self.measure(
+                "on the fly",
+                lambda k=keyword: list(
+                    Entry.objects_all.annotate(vector=SearchVector("content"))
+                    .filter(vector=SearchQuery(k))
+                    .annotate(rank=SearchRank(F("vector"), SearchQuery(k)))
+                    .order_by("-rank", "pk")
+                    .values_list("pk", flat=True)[:10]
+                ),
+                repeat,
+            )
+            stored, _ = self.measure(
+                "stored",
+                lambda q=query: list(
+                    Entry.objects_all.filter(search_vector=q)
+                    .annotate(rank=SearchRank(F("search_vector"), q))
+                    .order_by("-rank", "pk")
+                    .values_list("pk", flat=True)[:10]
+                ),
+                repeat,
+            )
+            self.compare(baseline, stored)
+
+            self.stdout.write(f"\nNumber of entries matching '{keyword}':")
+            baseline, expected = self.measure(
+                "on the fly", lambda k=keyword: Entry.objects_all.filter(content__search=k).count(), repeat
+            )
+            stored, result = self.measure(
+                "stored", lambda q=query: Entry.objects_all.filter(search_vector=q).count(), repeat
+            )
+
+            if expected != result:
+                self.stdout.write(self.style.ERROR("Results differ!"))
+
+            self.compare(baseline, stored)
+
+            self.stdout.write(f"\nAdvanced search for '{keyword}':")
+            baseline, _ = self.measure(
+                "on the fly",
+                lambda k=keyword: list(Topic.objects.filter(title__search=k).values_list("pk", flat=True)[:50]),
+                repeat,
+            )
+            stored, _ = self.measure(
+                "stored",
+                lambda q=query: list(Topic.objects.filter(search_vector=q).values_list("pk", flat=True)[:50]),
+                repeat,
+            )
+            self.compare(baseline, stored)
+            self.measure(
+                "TopicQueryHandler (by relevance)",
+                lambda k=keyword: list(handler.search(AnonymousUser(), {"keywords": k, "ordering": "relevance"})),
+                repeat,
+            )
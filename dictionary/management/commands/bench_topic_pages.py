@@ -0,0 +1,65 @@
+import datetime
+
+from django.db import connection
+from django.utils import timezone
+
+from dictionary.management.commands import BaseBenchmarkCommand
+from dictionary.models import Author, Entry, Topic, TopicActivity
+from dictionary.utils.views import KeysetPaginator, SafePaginator
+
+
+class Command(BaseBenchmarkCommand):
+    help = "Compares page latency of a large topic for offset (SafePaginator) and keyset (KeysetPaginator) pagination."
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("--entries", type=int, default=50000, help="Number of entries in the topic.")
+        parser.add_argument("--per-page", type=int, default=10)
+
+    def benchmark(self, **options):
+        self.stdout.write("Creating synthetic dataset...")
+        authors = Author.objects.bulk_create(
+            Author(username=f"bench{i}", slug=f"bench{i}", email=f"bench{i}@bench", is_novice=i % 10 == 0)
+            for i in range(50)
+        )
+        topic = Topic.objects.create(title="bench")
+        start = timezone.now() - datetime.timedelta(days=365)
+        Entry.objects_all.bulk_create(
+            (
+                Entry(topic=topic, author=authors[i % len(authors)], date_created=start + datetime.timedelta(minutes=i))
+                for i in range(options["entries"])
+            ),
+            batch_size=5000,
+        )
+        TopicActivity.objects.rebuild()
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE dictionary_author, dictionary_entry")
+
+        queryset = Entry.objects.filter(topic=topic)
+        per_page, repeat = options["per_page"], options["repeat"]
+        num_pages = SafePaginator(queryset, per_page).num_pages
+
+        def offset(number):
+            return list(SafePaginator(queryset, per_page).page(number))
+
+        def keyset(number, cursor=None):
+            paginator = KeysetPaginator(
+                queryset, per_page, cursor=cursor, cached_count=TopicActivity.objects.entry_count(topic.pk)
+            )
+            return list(paginator.page(number))
+
+        for number in (2, num_pages // 4, num_pages // 2, num_pages * 3 // 4, num_pages - 1, num_pages):
+            self.stdout.write(f"\nPage {number} of {num_pages}:")
+            baseline, expected = self.measure("offset", lambda n=number: offset(n), repeat)
+
+            # Simulates following the 'next page' link of the previous page.
+            previous = KeysetPaginator(queryset, per_page).page(number - 1)
+            cursor = previous.cursor(number)
+            seeked, result = self.measure("keyset (cursor)", lambda n=number, c=cursor: keyset(n, c), repeat)
+            sliced, sliced_result = self.measure("keyset (page selector)", lambda n=number: keyset(n), repeat)
+
+            if not (expected == result == sliced_result):
+                self.stdout.write(self.style.ERROR("Results differ!"))
+
+            self.compare(baseline, min(seeked, sliced))
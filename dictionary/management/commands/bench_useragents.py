@@ -0,0 +1,108 @@
+import itertools
+import random
+from unittest import mock
+
+from django_redis import get_redis_connection
+from user_agents import parse
+
+from dictionary.conf import settings
+from dictionary.management.commands import BaseBenchmarkCommand
+from dictionary.utils.useragents import UserAgentCache
+
+TEMPLATES = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/{v}.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/{v}.0.0.0 Safari/537.36"
+    " Edg/{v}.0.{b}.{p}",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:{v}.0) Gecko/20100101 Firefox/{v}.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/{v}.0.0.0"
+    " Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/{m}.{p}"
+    " Safari/605.1.15",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/{v}.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:{v}.0) Gecko/20100101 Firefox/{v}.0",
+    "Mozilla/5.0 (Linux; Android {a}; K) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/{v}.0.0.0 Mobile Safari/537.36",
+    "Mozilla/5.0 (Linux; Android {a}; SM-S91{p}B) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/{v}.0.{b}.{p}"
+    " Mobile Safari/537.36",
+    "Mozilla/5.0 (Linux; Android {a}; SAMSUNG SM-A{b}F) AppleWebKit/537.36 (KHTML, like Gecko) SamsungBrowser/{m}.0"
+    " Chrome/{v}.0.0.0 Mobile Safari/537.36",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS {m}_{p} like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko)"
+    " Version/{m}.{p} Mobile/15E148 Safari/604.1",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS {m}_{p} like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko)"
+    " CriOS/{v}.0.{b}.{p} Mobile/15E148 Safari/604.1",
+    "Mozilla/5.0 (iPad; CPU OS {m}_{p} like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/{m}.{p}"
+    " Mobile/15E148 Safari/604.1",
+    "Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)",
+    "Mozilla/5.0 (compatible; bingbot/2.0; +http://www.bing.com/bingbot.htm)",
+)
+
+
+def corpus(rng, distinct):
+    """Return given number of distinct user agent strings."""
+    agents = set()
+
+    while len(agents) < distinct:
+        template = rng.choice(TEMPLATES)
+        agents.add(
+            template.format(
+                v=rng.randint(110, 126),
+                b=rng.randint(1000, 6500),
+                p=rng.randint(0, 9),
+                m=rng.randint(15, 17),
+                a=rng.randint(10, 14),
+            )
+        )
+
+    return sorted(agents)
+
+
+class Command(BaseBenchmarkCommand):
+    help = "Compares mobile detection latency per request, parsing user agents against caching their classification."
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("--requests", type=int, default=20000)
+        parser.add_argument("--distinct", type=int, default=2000, help="Number of distinct user agents.")
+
+    def benchmark(self, **options):
+        rng = random.Random(0)
+        agents = corpus(rng, options["distinct"])
+        # A few hundred user agents make up almost all traffic (Zipf distribution).
+        weights = list(itertools.accumulate(1 / rank**1.2 for rank in range(1, len(agents) + 1)))
+        traffic = rng.choices(agents, cum_weights=weights, k=options["requests"])
+        self.stdout.write(f"{len(traffic)} requests, {len(set(traffic))} distinct user agents:\n")
+
+        baseline, expected = self.measure(
+            "user_agents.parse", lambda: [parse(ua).is_mobile for ua in traffic], options["repeat"]
+        )
+
+        def run(label, size, shared=False):
+            caches = []
+
+            def requests():
+                # Each run starts with a cold cache, like a newly started worker.
+                caches.append(UserAgentCache(size))
+                return [caches[-1].is_mobile(ua) for ua in traffic]
+
+            with mock.patch.object(settings, "REDIS_USER_AGENT_CACHE", shared):
+                candidate, result = self.measure(label, requests, options["repeat"])
+
+            if expected != result:
+                self.stdout.write(self.style.ERROR("Results differ!"))
+
+            self.stdout.write(f"{'':<40} hit ratio: {caches[-1].stats()['hit_ratio']:.1%}")
+            self.compare(baseline, candidate)
+
+        # Counters of the benchmark shouldn't be reported.
+        with mock.patch.object(UserAgentCache, "report_every", float("inf")):
+            run(f"LRU ({settings.USER_AGENT_CACHE_SIZE})", settings.USER_AGENT_CACHE_SIZE)
+            run("LRU (100)", 100)
+
+            try:
+                # Classifications stored in the first run are shared with the next ones, like other workers.
+                run("LRU (100) + redis", 100, shared=True)
+            finally:
+                redis = get_redis_connection("default")
+                stored = redis.scan_iter(match=f"{UserAgentCache.prefix}:*")
+
+                if keys := [key for key in stored if not key.endswith(b":stats")]:
+                    redis.delete(*keys)
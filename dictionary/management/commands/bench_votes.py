@@ -0,0 +1,158 @@
+import random
+import threading
+import time
+from unittest import mock
+
+from django.db import connection
+from django.db.models import F
+
+from dictionary.conf import settings
+from dictionary.management.commands import BaseBenchmarkCommand
+from dictionary.models import Author, Entry, Topic
+from dictionary.utils.votes import EntryVote, VoteLimits, vote_counts
+
+
+def legacy_vote(sender, entry, direction):
+    """Former implementation of UpvoteEntry and DownvoteEntry mutations, for comparison."""
+    entry = Entry.objects_published.select_related("author").only("id", "author_id", "author__karma").get(pk=entry.pk)
+    upvoted, downvoted = sender.upvoted_entries, sender.downvoted_entries
+
+    if direction == "downvote":
+        upvoted, downvoted = downvoted, upvoted
+
+    in_upvoted, in_downvoted = upvoted.filter(pk=entry.pk).exists(), downvoted.filter(pk=entry.pk).exists()
+    exceeded, reason = sender.has_exceeded_vote_limit(against=entry.author)
+    karma, cost = F("karma"), settings.KARMA_RATES["cost"]
+    rate = settings.KARMA_RATES[direction] * (1 if direction == "upvote" else -1)
+    change = settings.KARMA_RATES["downvote"] + settings.KARMA_RATES["upvote"]
+
+    if in_upvoted:
+        upvoted.remove(entry)
+
+        if sender.is_karma_eligible:
+            sender.karma = karma + cost
+            entry.author.karma = karma - rate
+            sender.save(update_fields=["karma"])
+            entry.author.save(update_fields=["karma"])
+
+        return None
+
+    if in_downvoted:
+        downvoted.remove(entry)
+        upvoted.add(entry)
+
+        if sender.is_karma_eligible:
+            entry.author.karma = karma + change * (1 if direction == "upvote" else -1)
+            entry.author.save(update_fields=["karma"])
+
+        return None
+
+    if exceeded:
+        return reason
+
+    upvoted.add(entry)
+
+    if sender.is_karma_eligible:
+        sender.karma = karma - cost
+        entry.author.karma = karma + rate
+        sender.save(update_fields=["karma"])
+        entry.author.save(update_fields=["karma"])
+
+    return None
+
+
+class Command(BaseBenchmarkCommand):
+    """
+    Unlike other benchmarks, this one commits its synthetic data so that the
+    threads (each having their own database connection) can see it. The data
+    is deleted at the end.
+    """
+
+    help = "Compares vote throughput (votes per second) of concurrent voters."
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--votes", type=int, default=300, help="Number of votes per thread.")
+        parser.add_argument("--entries", type=int, default=500)
+        parser.add_argument("--authors", type=int, default=20, help="Number of authors the entries belong to.")
+
+    def handle(self, *args, **options):
+        self.stdout.write("Creating synthetic dataset...")
+        voters = Author.objects.bulk_create(
+            Author(username=f"benchvoter{i}", slug=f"benchvoter{i}", email=f"benchvoter{i}@bench", is_novice=False)
+            for i in range(options["threads"])
+        )
+        authors = Author.objects.bulk_create(
+            Author(username=f"benchauthor{i}", slug=f"benchauthor{i}", email=f"benchauthor{i}@bench", is_novice=False)
+            for i in range(options["authors"])
+        )
+        topic = Topic.objects.create(title="benchvotes")
+        entries = Entry.objects_all.bulk_create(
+            Entry(topic=topic, author=authors[i % len(authors)]) for i in range(options["entries"])
+        )
+
+        try:
+            with (
+                mock.patch.object(settings, "DAILY_VOTE_LIMIT", 10**6),
+                mock.patch.object(settings, "DAILY_VOTE_LIMIT_PER_USER", 10**6),
+                mock.patch.object(settings, "TOTAL_VOTE_LIMIT_PER_USER", 10**6),
+            ):
+                self.benchmark(voters=voters, targets=entries, **options)
+        finally:
+            for voter in voters:
+                VoteLimits(voter.pk).clear()
+
+            topic.delete()
+            Author.objects.filter(pk__in=[author.pk for author in voters + authors]).delete()
+
+    def benchmark(self, **options):
+        for _ in range(options["repeat"]):
+            baseline = self.run("legacy", legacy_vote, **options)
+            candidate = self.run("EntryVote", lambda *args: EntryVote(*args).vote(), **options)
+            self.compare(1 / baseline, 1 / candidate)
+
+            with mock.patch.object(settings, "REDIS_VOTE_LIMITS", True):
+                redis = self.run("EntryVote (redis limits)", lambda *args: EntryVote(*args).vote(), **options)
+
+            self.compare(1 / candidate, 1 / redis)
+
+        self.stdout.write("\nLimit checks against the author of an entry:")
+        voter, targets = options["voters"][0], options["targets"]
+        checks = [(voter.pk, entry.author_id) for entry in targets[:100]]
+        database, expected = self.measure(
+            "database", lambda: [vote_counts(*args) for args in checks], options["repeat"]
+        )
+
+        with mock.patch.object(settings, "REDIS_VOTE_LIMITS", True):
+            redis, result = self.measure("redis", lambda: [vote_counts(*args) for args in checks], options["repeat"])
+
+        if expected != result:
+            self.stdout.write(self.style.ERROR("Results differ!"))
+
+        self.compare(database, redis)
+
+    def run(self, label, vote, voters, targets, threads, votes, **_options):
+        def work(voter, seed):
+            rng = random.Random(seed)
+
+            try:
+                for _ in range(votes):
+                    # Like the authentication middleware, fetch the voter for each request.
+                    sender = Author.objects.get(pk=voter.pk)
+                    vote(sender, rng.choice(targets), rng.choice(("upvote", "downvote")))
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=work, args=(voter, seed)) for seed, voter in enumerate(voters)]
+        start = time.perf_counter()
+
+        for worker in workers:
+            worker.start()
+
+        for worker in workers:
+            worker.join()
+
+        throughput = threads * votes / (time.perf_counter() - start)
+        self.stdout.write(f"{label:<40} {throughput:10.1f} votes/s")
+        return throughput
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from dictionary.models import Entry
+from dictionary.templatetags.filters import store_entry_html
+from dictionary.utils import batched
+
+# Stores the HTML of existing entries, see ENTRY_HTML_CACHE_TIMEOUT setting.
+
+
+class Command(BaseCommand):
+    help = "Renders entries and stores their HTML, so that they don't get formatted on the fly."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, **options):
+        entries = Entry.objects_all.order_by("pk").only("content", "date_edited")
+        count = 0
+
+        for batch in batched(entries.iterator(chunk_size=options["batch_size"]), options["batch_size"]):
+            store_entry_html(batch)
+            count += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Rendered {count} entries."))
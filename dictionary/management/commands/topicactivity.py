@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from dictionary.models import TopicActivity
+
+# Maintains topic activity rollup, see TOPIC_LIST_ROLLUP setting.
+
+
+class Command(BaseCommand):
+    help = "Rebuilds topic activity rollup or checks it against entries."
+
+    def add_arguments(self, parser):
+        parser.add_argument("action", choices=("rebuild", "check"))
+        parser.add_argument("--fix", action="store_true", help="Refresh inconsistent topics found while checking.")
+
+    def handle(self, **options):
+        if options["action"] == "rebuild":
+            TopicActivity.objects.rebuild()
+            self.stdout.write(self.style.SUCCESS("Topic activity rollup was rebuilt."))
+            return
+
+        inconsistent = list(TopicActivity.objects.inconsistent())
+
+        if not inconsistent:
+            self.stdout.write(self.style.SUCCESS("Topic activity rollup is consistent."))
+            return
+
+        self.stdout.write(self.style.WARNING(f"Found {len(inconsistent)} inconsistent topic(s): {inconsistent}"))
+
+        if options["fix"]:
+            TopicActivity.objects.refresh(inconsistent)
+            self.stdout.write(self.style.SUCCESS("Inconsistent topics were refreshed."))
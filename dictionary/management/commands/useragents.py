@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from dictionary.utils.useragents import UserAgentCache
+
+# Reports the hit ratio of user agent classification caches, see USER_AGENT_CACHE_SIZE setting.
+
+
+class Command(BaseCommand):
+    help = "Shows (or resets) the lookup counters of user agent classification caches, as reported by the workers."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true", help="Reset the counters.")
+
+    def handle(self, **options):
+        if options["reset"]:
+            UserAgentCache.reset()
+            self.stdout.write(self.style.SUCCESS("User agent cache counters were reset."))
+            return
+
+        totals = UserAgentCache.totals()
+        self.stdout.write(
+            f"hits: {totals['hits']}  shared hits: {totals['shared_hits']}  misses: {totals['misses']}"
+            f"  hit ratio: {totals['hit_ratio']:.1%}"
+        )
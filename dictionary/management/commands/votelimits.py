@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from dictionary.utils.votes import VoteLimits
+
+# Maintains vote limit counters, see REDIS_VOTE_LIMITS setting.
+
+
+class Command(BaseCommand):
+    help = "Resets vote limit counters or checks them against votes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("action", choices=("reset", "check"))
+        parser.add_argument("--fix", action="store_true", help="Reload inconsistent counters found while checking.")
+
+    def handle(self, **options):
+        if options["action"] == "reset":
+            VoteLimits.reset()
+            self.stdout.write(self.style.SUCCESS("Vote limit counters were reset, they will be loaded as needed."))
+            return
+
+        inconsistent = list(VoteLimits.inconsistent())
+
+        if not inconsistent:
+            self.stdout.write(self.style.SUCCESS("Vote limit counters are consistent."))
+            return
+
+        self.stdout.write(self.style.WARNING(f"Found {len(inconsistent)} inconsistent voter(s): {inconsistent}"))
+
+        if options["fix"]:
+            for voter_id in inconsistent:
+                VoteLimits(voter_id).load()
+
+            self.stdout.write(self.style.SUCCESS("Inconsistent counters were reloaded."))
@@ -1,16 +1,16 @@
 from django.utils import timezone
 
-from user_agents import parse
-
 from dictionary.conf import settings
 from dictionary.utils import get_theme_from_cookie
 from dictionary.utils.context_processors import lf_proxy
+from dictionary.utils.useragents import UserAgentCache
 
 
 class MobileDetectionMiddleware:
     # Simple middleware to detect if the user is using a mobile device.
     def __init__(self, get_response):
         self.get_response = get_response  # One-time configuration and initialization.
+        self.user_agents = UserAgentCache(settings.USER_AGENT_CACHE_SIZE)
 
     def __call__(self, request):
         if request.user.is_authenticated:
@@ -18,10 +18,7 @@ class MobileDetectionMiddleware:
         else:
             theme = get_theme_from_cookie(request)
 
-        ua_string = request.headers.get("User-Agent", "")
-        user_agent = parse(ua_string)
-
-        request.is_mobile = user_agent.is_mobile
+        request.is_mobile = self.user_agents.is_mobile(request.headers.get("User-Agent", ""))
         request.theme = theme
 
         # Code to be executed for each request before
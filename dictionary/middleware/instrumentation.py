@@ -0,0 +1,51 @@
+import json
+import logging
+from contextlib import suppress
+
+from django.core.exceptions import MiddlewareNotUsed
+
+from redis.exceptions import RedisError
+
+from dictionary.conf import settings
+from dictionary.utils.instrumentation import Recorder, ViewStatistics, install
+
+logger = logging.getLogger(__name__)
+
+
+class InstrumentationMiddleware:
+    """
+    Records the queries, cache calls and template render time of each
+    request (see INSTRUMENTATION). Metrics are sent in Server-Timing header,
+    logged as a JSON line and added to per-view statistics, which can be
+    seen in admin. Place it first, so that other middleware is covered too.
+    """
+
+    def __init__(self, get_response):
+        if not settings.INSTRUMENTATION:
+            raise MiddlewareNotUsed
+
+        self.get_response = get_response
+        install()
+
+    def __call__(self, request):
+        with Recorder() as recorder:
+            response = self.get_response(request)
+
+        view = request.resolver_match.view_name if request.resolver_match else "-"
+        response["Server-Timing"] = recorder.server_timing()
+        logger.info(
+            json.dumps(
+                {
+                    "method": request.method,
+                    "path": request.path,
+                    "view": view,
+                    "status": response.status_code,
+                    **{field: round(value, 2) for field, value in recorder.metrics.items()},
+                }
+            )
+        )
+
+        with suppress(RedisError):
+            ViewStatistics().add(view, recorder.metrics)
+
+        return response
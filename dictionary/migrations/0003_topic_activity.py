@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:00
+
+import datetime
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Q
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+
+def populate_topic_activity(apps, schema_editor):
+    Entry = apps.get_model("dictionary", "Entry")
+    TopicActivity = apps.get_model("dictionary", "TopicActivity")
+    TopicActivityBucket = apps.get_model("dictionary", "TopicActivityBucket")
+
+    entries = Entry._default_manager.filter(is_draft=False).order_by()
+    novice = Q(author__is_novice=True)
+    threshold = (timezone.now() - datetime.timedelta(hours=48)).astimezone(datetime.timezone.utc)
+
+    activity = entries.values("topic_id").annotate(
+        last_entry_at=Max("date_created", filter=~novice),
+        last_novice_entry_at=Max("date_created", filter=novice),
+    )
+    buckets = (
+        entries.filter(date_created__gte=threshold.replace(minute=0, second=0, microsecond=0))
+        .annotate(hour=TruncHour("date_created", tzinfo=datetime.timezone.utc))
+        .values("topic_id", "hour")
+        .annotate(entry_count=Count("pk", filter=~novice), novice_entry_count=Count("pk", filter=novice))
+    )
+
+    TopicActivity.objects.bulk_create((TopicActivity(**values) for values in activity.iterator()), batch_size=2000)
+    TopicActivityBucket.objects.bulk_create(
+        (TopicActivityBucket(**values) for values in buckets.iterator()), batch_size=2000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dictionary', '0002_author_unique_author_lower_email'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TopicActivity',
+            fields=[
+                ('topic', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='activity', serialize=False, to='dictionary.topic')),
+                ('last_entry_at', models.DateTimeField(db_index=True, null=True)),
+                ('last_novice_entry_at', models.DateTimeField(db_index=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TopicActivityBucket',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField(db_index=True)),
+                ('entry_count', models.PositiveIntegerField(default=0)),
+                ('novice_entry_count', models.PositiveIntegerField(default=0)),
+                ('topic', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity_buckets', to='dictionary.topic')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('topic', 'hour'), name='unique_topicactivitybucket')],
+            },
+        ),
+        migrations.RunPython(populate_topic_activity, migrations.RunPython.noop),
+    ]
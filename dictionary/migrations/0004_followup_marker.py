@@ -0,0 +1,80 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:05
+
+import datetime
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Max, OuterRef, Subquery
+from django.utils import timezone
+
+
+def populate_followup_markers(apps, schema_editor):
+    Entry = apps.get_model("dictionary", "Entry")
+    TopicActivity = apps.get_model("dictionary", "TopicActivity")
+    FollowupMarker = apps.get_model("dictionary", "FollowupMarker")
+
+    published = Entry._default_manager.filter(topic=OuterRef("topic"), is_draft=False).order_by("-pk").values("pk")
+    TopicActivity.objects.update(
+        last_entry_id=Subquery(published.filter(author__is_novice=False)[:1]),
+        last_novice_entry_id=Subquery(published.filter(author__is_novice=True)[:1]),
+    )
+
+    markers = (
+        Entry._default_manager.filter(date_created__gte=timezone.now() - datetime.timedelta(hours=120))
+        .order_by()
+        .values("topic_id", "author_id")
+        .annotate(last_entry_id=Max("pk"), last_entry_at=Max("date_created"))
+    )
+    FollowupMarker.objects.bulk_create((FollowupMarker(**values) for values in markers.iterator()), batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dictionary', '0003_topic_activity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FollowupMarker',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_entry_id', models.IntegerField()),
+                ('last_entry_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='topicactivity',
+            name='last_entry_id',
+            field=models.IntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='topicactivity',
+            name='last_novice_entry_id',
+            field=models.IntegerField(null=True),
+        ),
+        migrations.AddIndex(
+            model_name='entry',
+            index=models.Index(fields=['topic', 'id'], name='dictionary__topic_i_ca0939_idx'),
+        ),
+        migrations.AddField(
+            model_name='followupmarker',
+            name='author',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='followupmarker',
+            name='topic',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='dictionary.topic'),
+        ),
+        migrations.AddIndex(
+            model_name='followupmarker',
+            index=models.Index(fields=['author', 'last_entry_at'], name='dictionary__author__710823_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='followupmarker',
+            constraint=models.UniqueConstraint(fields=('author', 'topic'), name='unique_followupmarker'),
+        ),
+        migrations.RunPython(populate_followup_markers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:09
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_unread_entries(apps, schema_editor):
+    Entry = apps.get_model("dictionary", "Entry")
+    TopicFollowing = apps.get_model("dictionary", "TopicFollowing")
+
+    new_entries = (
+        Entry._default_manager.filter(
+            topic=OuterRef("topic"),
+            date_created__gte=OuterRef("read_at"),
+            is_draft=False,
+            author__is_novice=False,
+        )
+        .exclude(author=OuterRef("author"))
+        .exclude(author__blocked_by=OuterRef("author"))
+        .order_by()
+        .values("topic")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    TopicFollowing.objects.update(unread_count=Coalesce(Subquery(new_entries), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dictionary', '0004_followup_marker'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='topicfollowing',
+            name='unread_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(count_unread_entries, migrations.RunPython.noop),
+    ]
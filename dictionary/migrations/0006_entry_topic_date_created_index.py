@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dictionary', '0005_topicfollowing_unread_count'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='entry',
+            index=models.Index(fields=['topic', 'date_created', 'id'], name='dictionary__topic_i_18c1d1_idx'),
+        ),
+    ]
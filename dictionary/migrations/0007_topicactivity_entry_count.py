@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:16
+
+from django.db import migrations, models
+from django.db.models import OuterRef
+
+from dictionary.utils.db import SubQueryCount
+
+
+def populate_entry_counts(apps, schema_editor):
+    Entry = apps.get_model("dictionary", "Entry")
+    TopicActivity = apps.get_model("dictionary", "TopicActivity")
+
+    published = Entry._default_manager.filter(topic=OuterRef("topic"), is_draft=False).values("pk")
+    TopicActivity.objects.update(
+        entry_count=SubQueryCount(published.filter(author__is_novice=False)),
+        novice_entry_count=SubQueryCount(published.filter(author__is_novice=True)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dictionary', '0006_entry_topic_date_created_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='topicactivity',
+            name='entry_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='topicactivity',
+            name='novice_entry_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_entry_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:06
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('dictionary', '0008_search_vectors'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='author',
+            index=models.Index(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('username'), name='text_pattern_ops'), name='author_username_prefix'),
+        ),
+        migrations.AddIndex(
+            model_name='topic',
+            index=models.Index(fields=['title'], name='topic_title_prefix', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='topic',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['title'], name='topic_title_trigram', opclasses=['gin_trgm_ops']),
+        ),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def group_mirrors(apps, schema_editor):
+    Topic = apps.get_model("dictionary", "Topic")
+    MirrorGroup = apps.get_model("dictionary", "MirrorGroup")
+
+    # Union-find over the (symmetric) pairs of the former m2m relation.
+    parents = {}
+
+    def find(pk):
+        parents.setdefault(pk, pk)
+
+        while parents[pk] != pk:
+            parents[pk] = parents[parents[pk]]
+            pk = parents[pk]
+
+        return pk
+
+    pairs = Topic.mirrors.through.objects.values_list("from_topic_id", "to_topic_id")
+
+    for from_topic, to_topic in pairs.iterator():
+        parents[find(from_topic)] = find(to_topic)
+
+    groups = {}
+
+    for pk in parents:
+        groups.setdefault(find(pk), []).append(pk)
+
+    for members in groups.values():
+        Topic.objects.filter(pk__in=members).update(mirror_group=MirrorGroup.objects.create())
+
+
+def ungroup_mirrors(apps, schema_editor):
+    Topic = apps.get_model("dictionary", "Topic")
+    through = Topic.mirrors.through
+    groups = {}
+
+    for pk, group in Topic.objects.filter(mirror_group__isnull=False).values_list("pk", "mirror_group").iterator():
+        groups.setdefault(group, []).append(pk)
+
+    through.objects.bulk_create(
+        (
+            through(from_topic_id=from_topic, to_topic_id=to_topic)
+            for members in groups.values()
+            for from_topic in members
+            for to_topic in members
+            if from_topic != to_topic
+        ),
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dictionary', '0010_karmachange'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MirrorGroup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='topic',
+            name='mirror_group',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='topics', to='dictionary.mirrorgroup'),
+        ),
+        migrations.RunPython(group_mirrors, ungroup_mirrors),
+        migrations.RemoveField(
+            model_name='topic',
+            name='mirrors',
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def summarize_conversations(apps, schema_editor):
+    Conversation = apps.get_model("dictionary", "Conversation")
+    Message = apps.get_model("dictionary", "Message")
+
+    messages = Message.objects.filter(conversation=OuterRef("pk"))
+    latest = messages.order_by("-sent_at", "-pk")
+    unread = (
+        messages.filter(recipient=OuterRef("holder"), read_at__isnull=True)
+        .order_by()
+        .values("conversation")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    Conversation.objects.update(
+        latest_message=Subquery(latest.values("pk")[:1]),
+        last_message_at=Subquery(latest.values("sent_at")[:1]),
+        unread_count=Coalesce(Subquery(unread), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dictionary', '0011_mirror_groups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='last_message_at',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='latest_message',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='dictionary.message'),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='unread_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(summarize_conversations, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['holder', '-last_message_at'], name='dictionary__holder__7a5e05_idx'),
+        ),
+    ]
@@ -1,6 +1,7 @@
 # flake8: noqa
+from .activity import FollowupMarker, TopicActivity, TopicActivityBucket
 from .announcements import Announcement
-from .author import AccountTerminationQueue, Author, BackUp, Badge, Memento, UserVerification
+from .author import AccountTerminationQueue, Author, BackUp, Badge, KarmaChange, Memento, UserVerification
 from .category import Category, Suggestion
 from .entry import Comment, Entry
 from .flatpages import ExternalURL, MetaFlatPage
@@ -8,6 +9,6 @@ from .images import Image
 from .m2m import DownvotedEntries, EntryFavorites, TopicFollowing, UpvotedEntries
 from .messaging import Conversation, ConversationArchive, Message
 from .reporting import GeneralReport
-from .topic import Topic, Wish
+from .topic import MirrorGroup, Topic, Wish
 
 from ..backends.sessions.db import PairedSession  # isort:skip
@@ -0,0 +1,68 @@
+from django.db import models
+from django.db.models import UniqueConstraint
+
+from dictionary.models.managers.activity import (
+    FollowupMarkerManager,
+    TopicActivityBucketManager,
+    TopicActivityManager,
+)
+
+
+class TopicActivity(models.Model):
+    """
+    Per-topic rollup of published entries, kept up to date by Entry.save(),
+    Entry.delete() and topic moves. Used to list topics and to count their
+    entries without aggregating over entries. Novice entries are accounted
+    separately.
+    """
+
+    topic = models.OneToOneField("Topic", primary_key=True, on_delete=models.CASCADE, related_name="activity")
+    last_entry_at = models.DateTimeField(null=True, db_index=True)
+    last_novice_entry_at = models.DateTimeField(null=True, db_index=True)
+    last_entry_id = models.IntegerField(null=True)
+    last_novice_entry_id = models.IntegerField(null=True)
+    entry_count = models.PositiveIntegerField(default=0)
+    novice_entry_count = models.PositiveIntegerField(default=0)
+
+    objects = TopicActivityManager()
+
+    def __str__(self):
+        return f"{self.__class__.__name__} #{self.topic_id}"
+
+
+class TopicActivityBucket(models.Model):
+    """Published entry counts of a topic, per hour (in UTC)."""
+
+    topic = models.ForeignKey("Topic", on_delete=models.CASCADE, related_name="activity_buckets")
+    hour = models.DateTimeField(db_index=True)
+    entry_count = models.PositiveIntegerField(default=0)
+    novice_entry_count = models.PositiveIntegerField(default=0)
+
+    objects = TopicActivityBucketManager()
+
+    class Meta:
+        constraints = [UniqueConstraint(fields=["topic", "hour"], name="unique_topicactivitybucket")]
+
+    def __str__(self):
+        return f"{self.__class__.__name__} #{self.topic_id} ({self.hour})"
+
+
+class FollowupMarker(models.Model):
+    """
+    The id of the latest entry (drafts included) of an author in a topic,
+    written in the last couple of days. Used to list followups.
+    """
+
+    author = models.ForeignKey("Author", on_delete=models.CASCADE, related_name="+")
+    topic = models.ForeignKey("Topic", on_delete=models.CASCADE, related_name="+")
+    last_entry_id = models.IntegerField()
+    last_entry_at = models.DateTimeField()
+
+    objects = FollowupMarkerManager()
+
+    class Meta:
+        constraints = [UniqueConstraint(fields=["author", "topic"], name="unique_followupmarker")]
+        indexes = [models.Index(fields=["author", "last_entry_at"])]
+
+    def __str__(self):
+        return f"{self.__class__.__name__} #{self.author_id}-{self.topic_id}"
@@ -1,19 +1,23 @@
+import gzip
+import io
 import math
 import random
-from contextlib import suppress
+import tempfile
+from contextlib import nullcontext, suppress
 from decimal import Decimal
 from functools import wraps
 
 from django.apps import apps
 from django.contrib.auth.models import AbstractUser, UserManager
 from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.contrib.postgres.indexes import OpClass
 from django.core.cache import cache
 from django.core.exceptions import ObjectDoesNotExist
-from django.core.files.base import ContentFile
+from django.core.files.base import File
 from django.core.validators import MinLengthValidator
 from django.db import models
-from django.db.models import BooleanField, Case, Count, F, OuterRef, Q, Sum, When
-from django.db.models.functions import Coalesce, Lower
+from django.db.models import BooleanField, Case, F, Q, Sum, When
+from django.db.models.functions import Coalesce, Lower, Upper
 from django.shortcuts import reverse
 from django.template import defaultfilters
 from django.utils import timezone
@@ -24,14 +28,18 @@ from uuslug import uuslug
 
 from dictionary.conf import settings
 from dictionary.models.category import Category
-from dictionary.models.entry import Entry
-from dictionary.models.m2m import DownvotedEntries, UpvotedEntries
-from dictionary.models.managers.author import AccountTerminationQueueManager, AuthorManagerAccessible, InNoviceList
+from dictionary.models.m2m import TopicFollowing
+from dictionary.models.managers.author import (
+    AccountTerminationQueueManager,
+    AuthorManagerAccessible,
+    InNoviceList,
+    KarmaChangeManager,
+)
 from dictionary.utils import get_generic_superuser, parse_date_or_none, time_threshold
-from dictionary.utils.db import SubQueryCount
 from dictionary.utils.decorators import cached_context
-from dictionary.utils.serializers import ArchiveSerializer
+from dictionary.utils.serializers import write_archive
 from dictionary.utils.validators import validate_username_partial
+from dictionary.utils.votes import vote_counts, vote_limit_reason
 
 
 def usercache(initial_func=None, *, timeout=86400):
@@ -186,6 +194,10 @@ class Author(AbstractUser):
     in_novice_list = InNoviceList()
 
     class Meta:
+        indexes = [
+            # Autocompletion, see dictionary.utils.autocomplete
+            models.Index(OpClass(Upper("username"), name="text_pattern_ops"), name="author_username_prefix"),
+        ]
         permissions = (
             ("can_activate_user", _("Can access to the novice list")),
             ("suspend_user", _("Can suspend users")),
@@ -246,14 +258,8 @@ class Author(AbstractUser):
 
     def get_following_topics_with_receipt(self):
         """Get user's following topics with read receipts."""
-        new_entries = (
-            Entry.objects.filter(topic=OuterRef("pk"), date_created__gte=OuterRef("topicfollowing__read_at"))
-            .exclude(Q(author=self) | Q(author__in=self.blocked.all()))
-            .only("id")
-        )
-
         return self.following_topics.annotate(
-            count=SubQueryCount(new_entries),
+            count=F("topicfollowing__unread_count"),
             last_read_at=F("topicfollowing__read_at"),
             is_read=Case(When(Q(count__gt=0), then=False), default=True, output_field=BooleanField()),
         )
@@ -271,34 +277,8 @@ class Author(AbstractUser):
 
     def has_exceeded_vote_limit(self, against=None):
         """Check vote limits. This is done before the vote is registered."""
-
-        # Notice: couldn't filter on unions, so both models are explicitly written.
-        h24 = {"date_created__gte": time_threshold(hours=24)}  # Filter objects that has been created in last 24 hours.
-
-        upvoted = UpvotedEntries.objects.filter(author=self)
-        downvoted = DownvotedEntries.objects.filter(author=self)
-
-        daily_vote_count = upvoted.filter(**h24).count() + downvoted.filter(**h24).count()
-
-        if daily_vote_count >= settings.DAILY_VOTE_LIMIT:
-            return True, gettext("you have used up all the vote claims you have today. try again later.")
-
-        if against:
-            upvoted_against = upvoted.filter(entry__author=against).count()
-            downvoted_against = downvoted.filter(entry__author=against).count()
-            total_votes_against = upvoted_against + downvoted_against
-
-            if total_votes_against >= settings.TOTAL_VOTE_LIMIT_PER_USER:
-                return True, gettext("sorry, you have been haunting this person for a long time.")
-
-            daily_upvoted_against = upvoted.filter(entry__author=against, **h24).count()
-            daily_downvoted_against = downvoted.filter(entry__author=against, **h24).count()
-            daily_votes_against = daily_upvoted_against + daily_downvoted_against
-
-            if daily_votes_against >= settings.DAILY_VOTE_LIMIT_PER_USER:
-                return True, gettext("this person has taken enough of your votes today, maybe try other users?")
-
-        return False, None
+        reason = vote_limit_reason(*vote_counts(self.pk, against.pk if against else None))
+        return reason is not None, reason
 
     def can_send_message(self, recipient=None):
         if self == recipient:
@@ -377,7 +357,11 @@ class Author(AbstractUser):
 
     @property
     def is_karma_eligible(self):
-        """Eligible users will be able to influence other users' karma points by voting."""
+        """
+        Eligible users will be able to influence other users' karma points by
+        voting. Like karma flairs, this doesn't consider the changes pending
+        in the karma ledger (see KarmaChange).
+        """
         return not (self.is_novice or self.is_suspended or self.karma <= settings.KARMA_BOUNDARY_LOWER)
 
     @cached_property
@@ -446,15 +430,14 @@ class Author(AbstractUser):
 
     @cached_property
     def unread_message_count(self):
-        return self.conversations.aggregate(
-            count=Count("messages", filter=Q(messages__recipient=self, messages__read_at__isnull=True))
-        )["count"]
+        return self.conversations.aggregate(count=Coalesce(Sum("unread_count"), 0))["count"]
 
     @cached_property
     @usercache(timeout=60)
     def unread_topic_count(self):
         """
         Find counts for unread topics and announcements (displayed in header when apt).
+        Unread entry counts of topics are kept in TopicFollowing.unread_count.
 
         This query seems to be too expensive to be called in every request. So it is called
         every <timeout> seconds. In following topic list, the cache gets invalidated each
@@ -471,7 +454,8 @@ class Author(AbstractUser):
             if self.allow_site_announcements
             else 0
         )
-        unread_topics = self.get_following_topics_with_receipt().aggregate(sum=Coalesce(Sum("count"), 0))["sum"]
+        unread_topics = TopicFollowing.objects.filter(author=self).aggregate(sum=Coalesce(Sum("unread_count"), 0))
+        unread_topics = unread_topics["sum"]
         return {
             "sum": unread_announcements + unread_topics,
             "announcements": unread_announcements,
@@ -510,6 +494,23 @@ class Author(AbstractUser):
         return 1
 
 
+class KarmaChange(models.Model):
+    """
+    Append-only ledger of karma changes, written in place of updating the
+    karma of authors if KARMA_LEDGER is set. Changes are periodically folded
+    into the karma of their authors, see KarmaChangeManager.fold().
+    """
+
+    author = models.ForeignKey(Author, on_delete=models.CASCADE, related_name="+")
+    amount = models.DecimalField(max_digits=7, decimal_places=2)
+    date_created = models.DateTimeField(auto_now_add=True)
+
+    objects = KarmaChangeManager()
+
+    def __str__(self):
+        return f"{self.__class__.__name__}#{self.id}, {self.amount} to {self.author_id}"
+
+
 class Memento(models.Model):
     body = models.TextField(blank=True)
     holder = models.ForeignKey(Author, on_delete=models.CASCADE)
@@ -588,7 +589,8 @@ class Badge(models.Model):
 
 def user_directory_backup(instance, _filename):
     date_str = defaultfilters.date(timezone.localtime(timezone.now()), "Y-m-d")
-    return f"backup/{instance.author.pk}/backup-{date_str}.json"
+    extension = "json.gz" if settings.COMPRESS_BACKUPS else "json"
+    return f"backup/{instance.author.pk}/backup-{date_str}.{extension}"
 
 
 class BackUp(models.Model):
@@ -601,27 +603,33 @@ class BackUp(models.Model):
         if self.is_ready:
             return
 
-        serializer = ArchiveSerializer()
-        entries = self.author.entry_set(manager="objects_published").select_related("topic")
-        conversations = self.author.conversationarchive_set.all()
-
-        entries_text = serializer.serialize(entries, fields=("topic__title", "content", "date_created", "date_edited"))
-        conversations_text = (
-            "[%s]"
-            % "".join('{"target": "%s", "messages": %s},' % (item.target, item.messages) for item in conversations)[:-1]
-        )  # Formatting already-serialized data ([:-1] removes the trailing comma).
-
-        content = '{"entries": %s, "conversations": %s}' % (entries_text, conversations_text)
-        self.is_ready = True
-        self.file.save("backup", ContentFile(content.encode("utf-8")), save=True)
-
-        settings.get_model("Message").objects.compose(
-            get_generic_superuser(),
-            self.author,
-            gettext(
-                "your backup is now ready. you may download your backup"
-                " file using the link provided in the backup tab of settings."
-            ),
+        with tempfile.TemporaryFile() as archive:
+            if settings.COMPRESS_BACKUPS:
+                output = gzip.GzipFile(fileobj=archive, mode="wb", compresslevel=6)
+            else:
+                output = nullcontext(archive)
+
+            with output as raw:
+                stream = io.TextIOWrapper(raw, encoding="utf-8")
+                write_archive(self.author, stream)
+                stream.flush()
+                stream.detach()  # Leave the file open.
+
+            archive.seek(0)
+            self.is_ready = True
+            self.file.save("backup", File(archive), save=True)
+
+        settings.get_model("Message").objects.bulk_compose(
+            [
+                (
+                    get_generic_superuser(),
+                    self.author,
+                    gettext(
+                        "your backup is now ready. you may download your backup"
+                        " file using the link provided in the backup tab of settings."
+                    ),
+                )
+            ]
         )
 
     def process_async(self):
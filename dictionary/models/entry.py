@@ -1,14 +1,20 @@
 from decimal import Decimal
 
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.db.models import F
 from django.shortcuts import reverse
 from django.utils import timezone
 from django.utils.translation import gettext, gettext_lazy as _
 
+from dictionary.models.activity import FollowupMarker, TopicActivity
+from dictionary.models.m2m import TopicFollowing
 from dictionary.models.managers.entry import EntryManager, EntryManagerAll, EntryManagerOnlyPublished
 from dictionary.models.messaging import Message
+from dictionary.templatetags.filters import store_entry_html
 from dictionary.utils import get_generic_privateuser, get_generic_superuser, smart_lower
+from dictionary.utils.search import search_vector
 from dictionary.utils.validators import validate_user_text
 
 
@@ -20,13 +26,22 @@ class Entry(models.Model):
     date_edited = models.DateTimeField(blank=True, null=True, default=None, verbose_name=_("Date edited"))
     vote_rate = models.DecimalField(max_digits=7, decimal_places=2, default=Decimal(0), verbose_name=_("Vote rate"))
     is_draft = models.BooleanField(db_index=True, default=False, verbose_name=_("Draft status"))
+    search_vector = models.GeneratedField(
+        expression=search_vector("content"),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
 
     objects_all = EntryManagerAll()
     objects_published = EntryManagerOnlyPublished()
     objects = EntryManager()
 
     class Meta:
-        # TODO: add GinIndex with gin_trgm_ops when dropping support for other databases.
+        indexes = [
+            models.Index(fields=["topic", "id"]),
+            models.Index(fields=["topic", "date_created", "id"]),
+            GinIndex(fields=["search_vector"]),
+        ]
         ordering = ["date_created"]
         verbose_name = _("entry")
         verbose_name_plural = _("entries")
@@ -34,14 +49,38 @@ class Entry(models.Model):
     def __str__(self):
         return f"{self.id}#{self.author}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Used to determine whether the entry is getting published on save.
+        instance._was_draft = instance.__dict__.get("is_draft")
+        # Used to determine whether the HTML of the entry needs to be stored again.
+        instance._rendered = (instance.__dict__.get("content"), instance.__dict__.get("date_edited"))
+        return instance
+
     def save(self, *args, **kwargs):
         created = self.pk is None
+        published = not self.is_draft and (created or getattr(self, "_was_draft", False))
         self.content = smart_lower(self.content)
 
         if created:
             self.author.invalidate_entry_counts()
 
         super().save(*args, **kwargs)
+        self._was_draft = self.is_draft
+
+        if (rendered := (self.content, self.date_edited)) != getattr(self, "_rendered", None):
+            store_entry_html([self])
+            self._rendered = rendered
+
+        if created or published:
+            FollowupMarker.objects.register_entry(self)
+
+        if published:
+            TopicActivity.objects.register_entry(self)
+
+            if not self.author.is_novice:
+                TopicFollowing.objects.register_entry(self)
 
         # Check if the user has written 10 entries, If so make them available for novice lookup
         if self.author.is_novice and self.author.application_status == "OH" and self.author.entry_count >= 10:
@@ -70,10 +109,12 @@ class Entry(models.Model):
         if self.comments.exists():
             self.author = get_generic_privateuser()
             self.save()
+            TopicActivity.objects.refresh([self.topic_id])
             return
 
         self.author.invalidate_entry_counts()
         super().delete(*args, **kwargs)
+        TopicActivity.objects.refresh([self.topic_id])
 
         if self.author.is_novice and self.author.application_status == "PN" and self.author.entry_count < 10:
             # If the entry count drops less than 10, remove user from novice lookup.
@@ -89,8 +130,7 @@ class Entry(models.Model):
 
     def update_vote(self, rate, change=False):
         k = Decimal("2") if change else Decimal("1")
-        self.vote_rate = F("vote_rate") + rate * k
-        self.save()
+        Entry.objects_all.filter(pk=self.pk).update(vote_rate=F("vote_rate") + rate * k)
 
 
 class Comment(models.Model):
@@ -1,11 +1,17 @@
 from django.db import models
 
+from dictionary.models.managers.m2m import TopicFollowingManager
+
 
 class TopicFollowing(models.Model):
     topic = models.ForeignKey("Topic", on_delete=models.CASCADE)
     author = models.ForeignKey("Author", on_delete=models.CASCADE)
     read_at = models.DateTimeField(auto_now_add=True)
     date_created = models.DateTimeField(auto_now_add=True)
+    unread_count = models.PositiveIntegerField(default=0)
+    """Number of entries published after read_at (excluding the ones by author or blocked authors)."""
+
+    objects = TopicFollowingManager()
 
 
 class EntryFavorites(models.Model):
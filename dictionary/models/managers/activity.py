@@ -0,0 +1,255 @@
+import datetime
+from contextlib import suppress
+
+from django.apps import apps
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F, Max, OuterRef, Q, Value
+from django.db.models.functions import Greatest, TruncHour
+
+from redis.exceptions import RedisError
+
+from dictionary.conf import settings
+from dictionary.utils import batched, time_threshold, truncate_hour
+from dictionary.utils.autocomplete import TopicCompletion
+from dictionary.utils.db import SubQueryCount
+from dictionary.utils.ranking import PopularRanking
+
+
+def upsert(manager, lookup, update, defaults):
+    """Update the object matching lookup, create it (with defaults) if there is no such object."""
+    if manager.filter(**lookup).update(**update):
+        return
+
+    try:
+        with transaction.atomic():
+            manager.create(**lookup, **defaults)
+    except IntegrityError:
+        # Created by a concurrent request in the meantime.
+        manager.filter(**lookup).update(**update)
+
+
+class TopicActivityBucketManager(models.Manager):
+    retention = 48
+    """Buckets older than this many hours are no longer used by topic lists."""
+
+    @property
+    def threshold(self):
+        return truncate_hour(time_threshold(hours=self.retention))
+
+    def purge(self):
+        return self.filter(hour__lt=self.threshold).delete()
+
+
+class FollowupMarkerManager(models.Manager):
+    retention = 120
+    """Markers older than this many hours are no longer used by followups."""
+
+    @property
+    def threshold(self):
+        return time_threshold(hours=self.retention)
+
+    def register_entry(self, entry):
+        """Mark given entry as the latest entry of its author in its topic."""
+        upsert(
+            self,
+            {"author_id": entry.author_id, "topic_id": entry.topic_id},
+            {
+                "last_entry_id": Greatest(F("last_entry_id"), Value(entry.pk)),
+                "last_entry_at": Greatest(F("last_entry_at"), Value(entry.date_created)),
+            },
+            {"last_entry_id": entry.pk, "last_entry_at": entry.date_created},
+        )
+
+    def purge(self):
+        return self.filter(last_entry_at__lt=self.threshold).delete()
+
+
+class TopicActivityManager(models.Manager):
+    batch_size = 2000
+
+    @property
+    def buckets(self):
+        return apps.get_model("dictionary.TopicActivityBucket").objects
+
+    @staticmethod
+    def _update_ranking(method, *args):
+        # Redis being unavailable shouldn't prevent publishing, rankings will
+        # be rebuilt once they get stale.
+        if settings.REDIS_POPULAR_RANKING:
+            with suppress(RedisError):
+                getattr(PopularRanking(), method)(*args)
+
+    @staticmethod
+    def _update_completion(method, *args):
+        if settings.REDIS_AUTOCOMPLETE:
+            with suppress(RedisError):
+                getattr(TopicCompletion(), method)(*args)
+
+    @property
+    def markers(self):
+        return apps.get_model("dictionary.FollowupMarker").objects
+
+    def entry_count(self, topic_id, user=None):
+        """
+        Return the number of published entries by non-novice authors in given
+        topic, excluding the ones by the authors blocked by given user.
+        """
+        queryset = self.filter(topic_id=topic_id)
+
+        if user is None or not user.is_authenticated:
+            return queryset.values_list("entry_count", flat=True).first() or 0
+
+        blocked = apps.get_model("dictionary.Entry").objects.filter(
+            topic_id=OuterRef("topic_id"), author__in=user.blocked.all()
+        )
+        count, blocked_count = queryset.annotate(blocked_count=SubQueryCount(blocked)).values_list(
+            "entry_count", "blocked_count"
+        ).first() or (0, 0)
+        return max(count - blocked_count, 0)
+
+    def register_entry(self, entry):
+        """Account a newly published entry. Call this only once per entry."""
+        novice = entry.author.is_novice
+        latest = "last_novice_entry_at" if novice else "last_entry_at"
+        latest_id = "last_novice_entry_id" if novice else "last_entry_id"
+        count = "novice_entry_count" if novice else "entry_count"
+        date = entry.date_created
+
+        upsert(
+            self,
+            {"topic_id": entry.topic_id},
+            {
+                latest: Greatest(F(latest), Value(date)),
+                latest_id: Greatest(F(latest_id), Value(entry.pk)),
+                count: F(count) + 1,
+            },
+            {latest: date, latest_id: entry.pk, count: 1},
+        )
+        upsert(
+            self.buckets,
+            {"topic_id": entry.topic_id, "hour": truncate_hour(date)},
+            {count: F(count) + 1},
+            {count: 1},
+        )
+
+        if not novice:
+            self._update_ranking("register_entry", entry)
+            self._update_completion("register", entry.topic)
+
+    def refresh(self, topic_ids):
+        """Recalculate the rollup of given topics from their entries."""
+        topic_ids = set(topic_ids)
+
+        if not topic_ids:
+            return
+
+        with transaction.atomic():
+            self.filter(topic_id__in=topic_ids).delete()
+            self.buckets.filter(topic_id__in=topic_ids).delete()
+            self.markers.filter(topic_id__in=topic_ids).delete()
+            self._populate(topic_ids)
+            apps.get_model("dictionary.TopicFollowing").objects.recount(topic_id__in=topic_ids)
+
+        self._update_ranking("refresh", topic_ids)
+        self._update_completion("refresh", topic_ids)
+
+    def refresh_title(self, topic, previous_title):
+        """Call this when the title or the censorship of given topic changes, or when it gets deleted."""
+        self._update_completion("discard", previous_title)
+        self._update_completion("refresh", [topic.pk])
+
+    def refresh_author(self, author):
+        """Recalculate the rollup of the topics given author has published entries in."""
+        entries = apps.get_model("dictionary.Entry").objects_published.filter(author=author)
+        self.refresh(entries.values_list("topic_id", flat=True).distinct())
+
+    def rebuild(self):
+        """Recalculate the rollup of all topics from scratch."""
+        with transaction.atomic():
+            self.buckets.all().delete()
+            self.markers.all().delete()
+            self.all().delete()
+            self._populate()
+
+        self._update_ranking("rebuild")
+        self._update_completion("rebuild")
+
+    def inconsistent(self):
+        """Yield the ids of the topics whose rollup doesn't match their entries."""
+        topics = apps.get_model("dictionary.Topic").objects.order_by("pk").values_list("pk", flat=True)
+
+        for topic_ids in batched(topics.iterator(chunk_size=self.batch_size), self.batch_size):
+            expected_activity, expected_buckets, expected_markers = self._calculate(topic_ids)
+            stored_activity = self.filter(topic_id__in=topic_ids).values(
+                "topic_id",
+                "last_entry_at",
+                "last_novice_entry_at",
+                "last_entry_id",
+                "last_novice_entry_id",
+                "entry_count",
+                "novice_entry_count",
+            )
+            stored_buckets = self.buckets.filter(topic_id__in=topic_ids, hour__gte=self.buckets.threshold).values(
+                "topic_id", "hour", "entry_count", "novice_entry_count"
+            )
+            stored_markers = self.markers.filter(
+                topic_id__in=topic_ids, last_entry_at__gte=self.markers.threshold
+            ).values("topic_id", "author_id", "last_entry_id", "last_entry_at")
+
+            mismatches = set(self._as_map(expected_activity, "topic_id").items()) ^ set(
+                self._as_map(stored_activity, "topic_id").items()
+            )
+            mismatches |= set(self._as_map(expected_buckets, "topic_id", "hour").items()) ^ set(
+                self._as_map(stored_buckets, "topic_id", "hour").items()
+            )
+            mismatches |= set(self._as_map(expected_markers, "topic_id", "author_id").items()) ^ set(
+                self._as_map(stored_markers, "topic_id", "author_id").items()
+            )
+            yield from sorted({key[0] for key, _value in mismatches})
+
+    @staticmethod
+    def _as_map(rows, *keys):
+        return {tuple(row.pop(key) for key in keys): tuple(row.values()) for row in rows}
+
+    def _calculate(self, topic_ids=None):
+        """Calculate rollup rows (as dictionaries) from the entries of given topics, all topics if None."""
+        entries = apps.get_model("dictionary.Entry").objects_all.order_by()
+
+        if topic_ids is not None:
+            entries = entries.filter(topic_id__in=topic_ids)
+
+        markers = (
+            entries.filter(date_created__gte=self.markers.threshold)
+            .values("topic_id", "author_id")
+            .annotate(last_entry_id=Max("pk"), last_entry_at=Max("date_created"))
+        )
+
+        entries = entries.filter(is_draft=False)
+        novice = Q(author__is_novice=True)
+        activity = entries.values("topic_id").annotate(
+            last_entry_at=Max("date_created", filter=~novice),
+            last_novice_entry_at=Max("date_created", filter=novice),
+            last_entry_id=Max("pk", filter=~novice),
+            last_novice_entry_id=Max("pk", filter=novice),
+            entry_count=Count("pk", filter=~novice),
+            novice_entry_count=Count("pk", filter=novice),
+        )
+        buckets = (
+            entries.filter(date_created__gte=self.buckets.threshold)
+            .annotate(hour=TruncHour("date_created", tzinfo=datetime.timezone.utc))
+            .values("topic_id", "hour")
+            .annotate(entry_count=Count("pk", filter=~novice), novice_entry_count=Count("pk", filter=novice))
+        )
+        return activity, buckets, markers
+
+    def _populate(self, topic_ids=None):
+        activity, buckets, markers = self._calculate(topic_ids)
+
+        for batch in batched(activity.iterator(chunk_size=self.batch_size), self.batch_size):
+            self.bulk_create([self.model(**values) for values in batch])
+
+        for batch in batched(buckets.iterator(chunk_size=self.batch_size), self.batch_size):
+            self.buckets.bulk_create([self.buckets.model(**values) for values in batch])
+
+        for batch in batched(markers.iterator(chunk_size=self.batch_size), self.batch_size):
+            self.markers.bulk_create([self.markers.model(**values) for values in batch])
@@ -1,10 +1,12 @@
 import logging
 
+from django.apps import apps
 from django.contrib.auth.models import UserManager
-from django.db import models
-from django.db.models import BooleanField, Case, Q, When
+from django.db import models, transaction
+from django.db.models import BooleanField, Case, F, Q, When
 from django.utils import timezone
 
+from dictionary.conf import settings
 from dictionary.utils import get_generic_privateuser, time_threshold
 
 logger = logging.getLogger(__name__)
@@ -54,7 +56,9 @@ class AccountTerminationQueueManager(models.Manager):
     @staticmethod
     def terminate_no_trace(user):
         logger.info("User account terminated: %s<->%d", user.username, user.pk)
+        topic_ids = set(user.entry_set(manager="objects_published").values_list("topic_id", flat=True))
         user.delete()
+        apps.get_model("dictionary.TopicActivity").objects.refresh(topic_ids)
 
     def terminate_legacy(self, user):
         if not user.is_novice:
@@ -72,3 +76,53 @@ class AccountTerminationQueueManager(models.Manager):
                 self.terminate_no_trace(termination.author)
             elif termination.state == "LE":
                 self.terminate_legacy(termination.author)
+
+
+class KarmaChangeManager(models.Manager):
+    @staticmethod
+    def update_karma(changes):
+        """Add given amounts to the karma of the authors, in a single query."""
+        apps.get_model("dictionary.Author").objects.filter(pk__in=changes).update(
+            karma=Case(*(When(pk=pk, then=F("karma") + amount) for pk, amount in changes.items()))
+        )
+
+    def apply(self, changes):
+        """
+        Apply given karma changes, a mapping of author ids to amounts. Changes
+        are written to the ledger if KARMA_LEDGER is set, so that the rows of
+        the authors don't get locked.
+        """
+        changes = {pk: amount for pk, amount in changes.items() if amount}
+
+        if not changes:
+            return
+
+        if settings.KARMA_LEDGER:
+            self.bulk_create(self.model(author_id=pk, amount=amount) for pk, amount in changes.items())
+        else:
+            self.update_karma(changes)
+
+    def fold(self, batch_size=1000):
+        """Move the changes in the ledger to the karma of their authors, return the number of folded changes."""
+        folded = 0
+
+        while True:
+            with transaction.atomic():
+                # Concurrent folds skip each other's rows, so no change is applied twice.
+                rows = list(
+                    self.select_for_update(skip_locked=True)
+                    .order_by("pk")
+                    .values_list("pk", "author_id", "amount")[:batch_size]
+                )
+
+                if not rows:
+                    return folded
+
+                changes = {}
+
+                for _pk, author_id, amount in rows:
+                    changes[author_id] = changes.get(author_id, 0) + amount
+
+                self.update_karma(changes)
+                self.filter(pk__in=[row[0] for row in rows]).delete()
+                folded += len(rows)
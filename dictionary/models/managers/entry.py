@@ -2,18 +2,21 @@ from django.db import models
 from django.db.models import Q
 
 
-class EntryManager(models.Manager):
-    # Includes ONLY the PUBLISHED entries by NON-NOVICE authors
+class EntryManagerAll(models.Manager):
+    # Includes ALL entries (entries by novices, drafts)
+
     def get_queryset(self):
-        return super().get_queryset().exclude(Q(is_draft=True) | Q(author__is_novice=True))
+        # Search vectors are only used in filters, don't fetch them.
+        return super().get_queryset().defer("search_vector")
 
 
-class EntryManagerAll(models.Manager):
-    # Includes ALL entries (entries by novices, drafts)
-    pass
+class EntryManager(EntryManagerAll):
+    # Includes ONLY the PUBLISHED entries by NON-NOVICE authors
+    def get_queryset(self):
+        return super().get_queryset().exclude(Q(is_draft=True) | Q(author__is_novice=True))
 
 
-class EntryManagerOnlyPublished(models.Manager):
+class EntryManagerOnlyPublished(EntryManagerAll):
     # Includes ONLY the PUBLISHED entries (entries by NOVICE users still visible)
 
     def get_queryset(self):
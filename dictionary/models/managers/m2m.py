@@ -0,0 +1,27 @@
+from django.apps import apps
+from django.db import models
+from django.db.models import F, OuterRef
+
+from dictionary.utils.db import SubQueryCount
+
+
+class TopicFollowingManager(models.Manager):
+    def register_entry(self, entry):
+        """Increase unread counts of the followers. Call this once a non-novice entry is published."""
+        return (
+            self.filter(topic_id=entry.topic_id)
+            .exclude(author_id=entry.author_id)
+            .exclude(author__blocked=entry.author_id)
+            .update(unread_count=F("unread_count") + 1)
+        )
+
+    def recount(self, **filters):
+        """Recalculate unread counts of the followings that match given filters."""
+        new_entries = (
+            apps.get_model("dictionary.Entry")
+            .objects.filter(topic=OuterRef("topic"), date_created__gte=OuterRef("read_at"))
+            .exclude(author=OuterRef("author"))
+            .exclude(author__blocked_by=OuterRef("author"))
+            .only("id")
+        )
+        return self.filter(**filters).update(unread_count=SubQueryCount(new_entries))
@@ -1,7 +1,13 @@
+from collections import Counter
 from contextlib import suppress
 
-from django.db import models
-from django.db.models import Count, Max, Q
+from django.apps import apps
+from django.db import models, transaction
+from django.db.models import Case, Exists, F, OuterRef, Q, Subquery, Value, When
+
+from dictionary.conf import settings
+from dictionary.utils import smart_lower
+from dictionary.utils.db import SubQueryCount
 
 
 class MessageManager(models.Manager):
@@ -13,23 +19,193 @@ class MessageManager(models.Manager):
         message = self.create(sender=sender, recipient=recipient, body=body, has_receipt=has_receipt)
         return message
 
+    @staticmethod
+    def permitted(pairs):
+        """
+        Set based counterpart of Author.can_send_message(), return the
+        (sender, recipient) pairs in which the sender can message the
+        recipient. Relations of all pairs are fetched in two queries.
+        """
+        author_model = apps.get_model("dictionary.Author")
+        preference = author_model.MessagePref
+        pairs = [(sender, recipient) for sender, recipient in pairs if sender != recipient]
+        # Generic superuser can message anyone.
+        checked = [pair for pair in pairs if pair[0].username != settings.GENERIC_SUPERUSER_USERNAME]
+        rejected = {
+            (sender.pk, recipient.pk)
+            for sender, recipient in checked
+            if recipient.is_frozen
+            or recipient.is_private
+            or not recipient.is_active
+            or recipient.message_preference == preference.DISABLED
+            or (sender.is_novice and recipient.message_preference == preference.AUTHOR_ONLY)
+        }
+
+        if checked:
+            senders = {sender.pk for sender, _ in checked}
+            recipients = {recipient.pk for _, recipient in checked}
+            following = set(
+                author_model.following.through.objects.filter(
+                    from_author__in=recipients, to_author__in=senders
+                ).values_list("from_author_id", "to_author_id")
+            )
+            blocked = set(
+                author_model.blocked.through.objects.filter(
+                    from_author__in=senders | recipients, to_author__in=senders | recipients
+                ).values_list("from_author_id", "to_author_id")
+            )
+            rejected.update(
+                (sender.pk, recipient.pk)
+                for sender, recipient in checked
+                if (
+                    recipient.message_preference == preference.FOLLOWING_ONLY
+                    and (recipient.pk, sender.pk) not in following
+                )
+                or (recipient.pk, sender.pk) in blocked
+                or (sender.pk, recipient.pk) in blocked
+            )
+
+        return [(sender, recipient) for sender, recipient in pairs if (sender.pk, recipient.pk) not in rejected]
+
+    def bulk_compose(self, messages):
+        """
+        Bulk counterpart of compose(), for system and mass messages. Given
+        (sender, recipient, body) tuples, send the messages that are permitted
+        (see permitted()) and return them. Takes a constant number of
+        queries regardless of the number of messages.
+        """
+        messages = list(messages)
+        permitted = {
+            (sender.pk, recipient.pk)
+            for sender, recipient in self.permitted((sender, recipient) for sender, recipient, _body in messages)
+        }
+        return self.bulk_deliver(
+            [
+                self.model(
+                    sender=sender,
+                    recipient=recipient,
+                    body=body,
+                    has_receipt=sender.allow_receipts and recipient.allow_receipts,
+                )
+                for sender, recipient, body in messages
+                if (sender.pk, recipient.pk) in permitted
+            ]
+        )
+
+    def bulk_deliver(self, messages):
+        """
+        Save given (unsaved) messages and add them to the conversations of
+        their senders and recipients, like compose() and the deliver_message
+        signal do, in a constant number of queries. Missing conversations are
+        created and their last message and unread count columns are updated.
+        Permissions are not checked and no signals are sent.
+        """
+        for message in messages:
+            message.body = smart_lower(message.body).strip()
+
+        if not messages:
+            return []
+
+        conversation_model = apps.get_model("dictionary.Conversation")
+        through = conversation_model.messages.through
+        pairs = {pair for m in messages for pair in ((m.sender_id, m.recipient_id), (m.recipient_id, m.sender_id))}
+        holders = {holder for holder, _ in pairs}
+
+        with transaction.atomic():
+            messages = self.bulk_create(messages)
+            conversation_model.objects.bulk_create(
+                (conversation_model(holder_id=holder, target_id=target) for holder, target in pairs),
+                ignore_conflicts=True,
+            )
+            conversations = {
+                (holder, target): pk
+                for pk, holder, target in conversation_model.objects.filter(
+                    holder_id__in=holders, target_id__in=holders
+                ).values_list("pk", "holder_id", "target_id")
+            }
+            through.objects.bulk_create(
+                through(conversation_id=conversations[pair], message_id=m.pk)
+                for m in messages
+                for pair in ((m.sender_id, m.recipient_id), (m.recipient_id, m.sender_id))
+            )
+            conversation_model.objects.record(messages, conversations)
+
+        return messages
+
 
 class ConversationManager(models.Manager):
     def list_for_user(self, user, search_term=None):
-        # List conversation list for user, provide search_term to search in messages
+        """
+        List the conversations of given user, the ones with the latest messages
+        first. Provide search_term to search in messages and target nicks.
+        """
+        conversations = self.filter(holder=user)
 
         if search_term:
-            base = self.filter(
-                Q(holder=user)
-                & (Q(messages__body__icontains=search_term) | Q(messages__recipient__username__icontains=search_term)),
+            matches = apps.get_model("dictionary.Message").objects.filter(
+                Q(body__icontains=search_term) | Q(recipient__username__icontains=search_term),
+                conversation=OuterRef("pk"),
+            )
+            conversations = conversations.filter(Exists(matches))
+
+        return conversations.order_by("-last_message_at")
+
+    def record(self, messages, conversations):
+        """
+        Reflect given (saved) messages on the last message and unread count
+        columns of their conversations, given as {(holder id, target id): pk}.
+        The last message of a conversation is only replaced by a later one, as
+        concurrent deliveries may be recorded out of order.
+        """
+        latest, unread = {}, Counter()
+
+        for message in messages:
+            unread[conversations[(message.recipient_id, message.sender_id)]] += 1
+
+            for pair in ((message.sender_id, message.recipient_id), (message.recipient_id, message.sender_id)):
+                pk = conversations[pair]
+
+                if pk not in latest or (message.sent_at, message.pk) > (latest[pk].sent_at, latest[pk].pk):
+                    latest[pk] = message
+
+        if not latest:
+            return 0
+
+        def later(message):
+            return (
+                Q(last_message_at__isnull=True)
+                | Q(last_message_at__lt=message.sent_at)
+                | Q(last_message_at=message.sent_at)
+                & (Q(latest_message__isnull=True) | Q(latest_message__lt=message.pk))
             )
-        else:
-            base = self.filter(holder=user)
 
-        return base.annotate(
-            message_sent_last=Max("messages__sent_at"),
-            unread_count=Count("messages", filter=Q(messages__recipient=user, messages__read_at__isnull=True)),
-        ).order_by("-message_sent_last")
+        newer = {pk: Q(pk=pk) & later(message) for pk, message in latest.items()}
+        return self.filter(pk__in=latest).update(
+            latest_message=Case(
+                *(When(newer[pk], then=Value(message.pk)) for pk, message in latest.items()),
+                default=F("latest_message"),
+                output_field=models.IntegerField(),
+            ),
+            last_message_at=Case(
+                *(When(newer[pk], then=Value(message.sent_at)) for pk, message in latest.items()),
+                default=F("last_message_at"),
+                output_field=models.DateTimeField(),
+            ),
+            unread_count=F("unread_count")
+            + Case(*(When(pk=pk, then=Value(count)) for pk, count in unread.items()), default=Value(0)),
+        )
+
+    def refresh(self, **filters):
+        """Recalculate the last message and unread count columns of the conversations that match given filters."""
+        messages = apps.get_model("dictionary.Message").objects.filter(conversation=OuterRef("pk"))
+        latest = messages.order_by("-sent_at", "-pk")
+        return self.filter(**filters).update(
+            latest_message=Subquery(latest.values("pk")[:1]),
+            last_message_at=Subquery(latest.values("sent_at")[:1]),
+            unread_count=SubQueryCount(
+                messages.filter(recipient=OuterRef("holder"), read_at__isnull=True).order_by().only("id")
+            ),
+        )
 
     def with_user(self, sender, recipient):
         with suppress(self.model.DoesNotExist):
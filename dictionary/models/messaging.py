@@ -1,7 +1,9 @@
 import json
 
 from django.db import models
+from django.db.models import F
 from django.db.models.constraints import UniqueConstraint
+from django.db.models.functions import Greatest
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.functional import cached_property
@@ -36,6 +38,11 @@ class Message(models.Model):
         super().save(*args, **kwargs)
 
     def mark_read(self):
+        if self.read_at is None:
+            Conversation.objects.filter(
+                holder=self.recipient_id, target=self.sender_id, messages=self, unread_count__gt=0
+            ).update(unread_count=F("unread_count") - 1)
+
         self.read_at = timezone.now()
         self.save()
 
@@ -82,10 +89,16 @@ class Conversation(models.Model):
     messages = models.ManyToManyField(Message)
     date_created = models.DateTimeField(auto_now_add=True)
 
+    latest_message = models.ForeignKey(Message, null=True, editable=False, on_delete=models.SET_NULL, related_name="+")
+    last_message_at = models.DateTimeField(null=True, editable=False)
+    unread_count = models.PositiveIntegerField(default=0, editable=False)
+    """Last message, its date and the number of unread messages of the holder, kept in sync as messages change."""
+
     objects = ConversationManager()
 
     class Meta:
         constraints = [UniqueConstraint(fields=["holder", "target"], name="unique_conversation")]
+        indexes = [models.Index(fields=["holder", "-last_message_at"])]
 
     def __str__(self):
         return f"<Conversation> holder-> {self.holder.username}, target-> {self.target.username}"
@@ -119,6 +132,15 @@ class Conversation(models.Model):
 
         return self.delete()
 
+    def mark_read(self):
+        """Mark the messages received by the holder as read."""
+        read = self.messages.filter(recipient=self.holder_id, read_at__isnull=True).update(read_at=timezone.now())
+
+        if read:
+            # Messages delivered in the meantime stay unread.
+            Conversation.objects.filter(pk=self.pk).update(unread_count=Greatest(F("unread_count") - read, 0))
+            self.unread_count = max(self.unread_count - read, 0)
+
     @property
     def last_message(self):
         return self.messages.latest("sent_at")
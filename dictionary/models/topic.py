@@ -1,15 +1,22 @@
-from django.db import models
+from functools import partial
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
+from django.db.models import F, Q
 from django.shortcuts import reverse
 from django.utils.translation import gettext, gettext_lazy as _
 
 from uuslug import uuslug
 
+from dictionary.models.activity import TopicActivity
 from dictionary.models.author import Author
 from dictionary.models.category import Category
 from dictionary.models.m2m import TopicFollowing
 from dictionary.models.managers.topic import TopicManager, TopicManagerPublished
 from dictionary.models.messaging import Message
 from dictionary.utils import get_generic_superuser, i18n_lower
+from dictionary.utils.search import search_vector
 from dictionary.utils.validators import validate_topic_title, validate_user_text
 
 
@@ -45,16 +52,13 @@ class Topic(models.Model):
         help_text=_("When checked, users will be able to suggest channels to this topic."),
     )
 
-    mirrors = models.ManyToManyField(
-        "self",
+    mirror_group = models.ForeignKey(
+        "MirrorGroup",
+        null=True,
         blank=True,
-        verbose_name=_("Title disambiguation"),
-        help_text=_(
-            "<p style='color: #ba2121'><b>Warning!</b> The topics that you enter will automatically"
-            " get related disambiguations. For this reason you should be working on a main topic that you"
-            " selected.<br> Removing a topic from will cause the removal of <b>ALL</b> disambiguations, so"
-            " you should note down the topics that you don't want to be removed to add them later.</p>"
-        ),
+        editable=False,
+        on_delete=models.DO_NOTHING,  # Groups are deleted once they are empty.
+        related_name="topics",
     )
 
     media = models.TextField(blank=True, verbose_name=_("Media links"))
@@ -97,10 +101,22 @@ class Topic(models.Model):
         help_text=_("<i>Might not always correspond to first entry.</i>"),
     )
 
+    search_vector = models.GeneratedField(
+        expression=search_vector("title"),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
     objects = TopicManager()
     objects_published = TopicManagerPublished()
 
     class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"]),
+            # Autocompletion, see dictionary.utils.autocomplete
+            models.Index(fields=["title"], name="topic_title_prefix", opclasses=["varchar_pattern_ops"]),
+            GinIndex(fields=["title"], name="topic_title_trigram", opclasses=["gin_trgm_ops"]),
+        ]
         permissions = (("move_topic", _("Can move topics")),)
         verbose_name = _("topic")
         verbose_name_plural = _("topics")
@@ -108,50 +124,130 @@ class Topic(models.Model):
     def __str__(self):
         return str(self.title)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Used to determine whether autocompletion needs to be updated on save.
+        instance._completion = (instance.__dict__.get("title"), instance.__dict__.get("is_censored"))
+        return instance
+
     def save(self, *args, **kwargs):
         self.title = i18n_lower(self.title)
         self.slug = uuslug(self.title, instance=self)
         super().save(*args, **kwargs)
 
+        previous = getattr(self, "_completion", None)
+        current = (self.title, self.__dict__.get("is_censored"))
+
+        if previous is not None and previous != current:
+            TopicActivity.objects.refresh_title(self, previous[0])
+            self._completion = current
+
+    def delete(self, *args, **kwargs):
+        deleted = super().delete(*args, **kwargs)
+        TopicActivity.objects.refresh_title(self, self.title)
+        return deleted
+
     def get_absolute_url(self):
         return reverse("topic", kwargs={"slug": self.slug})
 
+    @property
+    def mirrors(self):
+        """Other topics in the disambiguation group of this topic."""
+        if self.mirror_group_id is None:
+            return Topic.objects.none()
+
+        return Topic.objects.filter(mirror_group=self.mirror_group_id).exclude(pk=self.pk)
+
+    def add_mirrors(self, topics):
+        """Merge given topics, along with their own groups, into the disambiguation group of this topic."""
+        pks = {topic.pk for topic in topics} - {self.pk}
+
+        if not pks:
+            return
+
+        with transaction.atomic():
+            if self.mirror_group_id is None:
+                self.mirror_group = MirrorGroup.objects.create()
+
+            merged = set(
+                Topic.objects.filter(pk__in=pks, mirror_group__isnull=False)
+                .exclude(mirror_group=self.mirror_group_id)
+                .values_list("mirror_group", flat=True)
+            )
+            Topic.objects.filter(Q(pk__in=pks | {self.pk}) | Q(mirror_group__in=merged)).update(
+                mirror_group=self.mirror_group_id
+            )
+            MirrorGroup.objects.filter(pk__in=merged).delete()
+
+    def remove_mirrors(self, topics):
+        """Remove given topics from the disambiguation group of this topic."""
+        if self.mirror_group_id is None:
+            return
+
+        pks = {topic.pk for topic in topics} - {self.pk}
+
+        with transaction.atomic():
+            self.mirrors.filter(pk__in=pks).update(mirror_group=None)
+
+            if not self.mirrors.exists():
+                Topic.objects.filter(pk=self.pk).update(mirror_group=None)
+                MirrorGroup.objects.filter(pk=self.mirror_group_id).delete()
+                self.mirror_group = None
+
+    def set_mirrors(self, topics):
+        pks = {topic.pk for topic in topics}
+        current = set(self.mirrors.values_list("pk", flat=True))
+        self.remove_mirrors(Topic(pk=pk) for pk in current - pks)
+        self.add_mirrors(Topic(pk=pk) for pk in pks - current)
+
     def follow_check(self, user):
         return TopicFollowing.objects.filter(topic=self, author=user).exists()
 
     def register_wishes(self, fulfiller_entry=None):
+        """
+        Fulfill the wishes of this topic in the background (see fulfill_wishes),
+        once the current transaction commits.
+        """
+
+        if (fulfiller_entry is not None and fulfiller_entry.is_draft) or not self.wishes.exists():
+            return
+
+        from dictionary.tasks import fulfill_wishes
+
+        entry_id = fulfiller_entry.pk if fulfiller_entry is not None else None
+        transaction.on_commit(partial(fulfill_wishes.delay, self.pk, entry_id))
+
+    def fulfill_wishes(self, fulfiller_entry=None):
         """To delete fulfilled wishes and inform wishers."""
 
-        if not (self.wishes.exists() and self.has_entries):
+        if not self.has_entries:
             return None
 
         invoked_by_entry = fulfiller_entry is not None
-        wishes = self.wishes.all().select_related("author")
-
-        for wish in wishes:
-            self_fulfillment = invoked_by_entry and fulfiller_entry.author == wish.author
-
-            if self_fulfillment:
-                continue
-
-            message = (
-                gettext(
-                    "`%(title)s`, the topic you wished for, had an entry"
-                    " entered by `@%(username)s`: (see: #%(entry)d)"
-                )
-                % {
-                    "title": self.title,
-                    "username": fulfiller_entry.author.username,
-                    "entry": fulfiller_entry.pk,
-                }
-                if invoked_by_entry
-                else gettext("`%(title)s`, the topic you wished for, is now populated with some entries.")
-                % {"title": self.title}
+        wishes = list(self.wishes.select_related("author"))
+        message = (
+            gettext(
+                "`%(title)s`, the topic you wished for, had an entry"
+                " entered by `@%(username)s`: (see: #%(entry)d)"
             )
-
-            Message.objects.compose(get_generic_superuser(), wish.author, message)
-
-        return wishes.delete()
+            % {
+                "title": self.title,
+                "username": fulfiller_entry.author.username,
+                "entry": fulfiller_entry.pk,
+            }
+            if invoked_by_entry
+            else gettext("`%(title)s`, the topic you wished for, is now populated with some entries.")
+            % {"title": self.title}
+        )
+
+        sender = get_generic_superuser()
+        Message.objects.bulk_compose(
+            (sender, wish.author, message)
+            for wish in wishes
+            if not (invoked_by_entry and fulfiller_entry.author_id == wish.author_id)  # self fulfillment
+        )
+        return self.wishes.filter(pk__in=[wish.pk for wish in wishes]).delete()
 
     def wish_collection(self):
         return self.wishes.select_related("author")
@@ -166,13 +262,30 @@ class Topic(models.Model):
 
     @property
     def entry_count(self):
-        return self.entries(manager="objects_published").count()
+        # Novice entries included.
+        return (
+            TopicActivity.objects.filter(topic=self)
+            .values_list(F("entry_count") + F("novice_entry_count"), flat=True)
+            .first()
+            or 0
+        )
 
     @property
     def has_entries(self):
         return self.entries.exclude(is_draft=True).exists()
 
 
+class MirrorGroup(models.Model):
+    """
+    Disambiguation group, i.e. topics with the same title. Groups are merged
+    and split with set based updates, see Topic.add_mirrors() and
+    Topic.remove_mirrors().
+    """
+
+    def __str__(self):
+        return f"{self.__class__.__name__} #{self.pk}"
+
+
 class Wish(models.Model):
     author = models.ForeignKey("Author", on_delete=models.CASCADE, related_name="wishes", verbose_name=_("Author"))
     topic = models.ForeignKey("Topic", on_delete=models.CASCADE, related_name="wishes", verbose_name=_("Topic"))
@@ -1,6 +1,6 @@
 # flake8: noqa
 from .m2m import (
-    update_topic_disambiguation,
+    invalidate_blocked,
     update_vote_rate_downvote,
     update_vote_rate_favorite,
     update_vote_rate_upvote,
@@ -1,5 +1,6 @@
-from functools import wraps
+from functools import partial, wraps
 
+from django.db import transaction
 from django.db.models import F
 from django.db.models.signals import m2m_changed
 from django.dispatch import receiver
@@ -7,7 +8,7 @@ from django.dispatch import receiver
 from dictionary.conf import settings
 from dictionary.models.author import Author
 from dictionary.models.entry import Entry
-from dictionary.models.topic import Topic
+from dictionary.utils.autocomplete import invalidate_blocked_ids
 
 
 def entrym2m(m2msignal):
@@ -62,33 +63,23 @@ def update_vote_rate_downvote(action, entries, **kwargs):
         entries.update(vote_rate=F("vote_rate") + rate)
 
 
-@receiver(m2m_changed, sender=Topic.mirrors.through)
-def update_topic_disambiguation(instance, action, pk_set, **kwargs):
-    """Signal to auto update all mirrors of given topic's related objects."""
+@receiver(m2m_changed, sender=Author.blocked.through)
+def invalidate_blocked(instance, action, reverse, pk_set, **kwargs):
+    """
+    Signal to invalidate cached blockages (see blocked_ids) of the authors
+    involved, once the change is committed. Otherwise, a concurrent read could
+    cache the blockages prior to the change. Related ids of a clear are
+    captured before the rows are deleted.
+    """
 
-    appended_topics = Topic.objects.filter(pk__in=pk_set)
-    current = instance.mirrors.all()
+    if action == "pre_clear":
+        related = instance.blocked_by.all() if reverse else instance.blocked.all()
+        instance._cleared_blocked_ids = set(related.values_list("pk", flat=True))
+        return
 
-    if action not in ("post_add", "post_remove"):
+    if action == "post_clear":
+        pk_set = instance.__dict__.pop("_cleared_blocked_ids", set())
+    elif action not in ("post_add", "post_remove"):
         return
 
-    for topic in appended_topics:
-        related = topic.mirrors.all()
-
-        for mirror in related:
-            if mirror != instance:
-                if action == "post_add":
-                    if mirror not in current:
-                        instance.mirrors.add(mirror)
-                else:
-                    if mirror in current:
-                        instance.mirrors.remove(mirror)
-
-        for neighbor in current:
-            if neighbor != topic:
-                if neighbor not in related:
-                    if action == "post_add":
-                        topic.mirrors.add(neighbor)
-                else:
-                    if action == "post_remove":
-                        topic.mirrors.remove(neighbor)
+    transaction.on_commit(partial(invalidate_blocked_ids, instance.pk, *pk_set))
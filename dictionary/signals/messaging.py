@@ -8,7 +8,8 @@ from dictionary.models.messaging import Conversation, Message
 def deliver_message(instance, created, **kwargs):
     """
     Creates a conversation if user messages the other for the first time.
-    Adds messages to conversation.
+    Adds messages to conversation and updates their last message and unread
+    count columns.
     """
 
     if not created:
@@ -17,14 +18,30 @@ def deliver_message(instance, created, **kwargs):
     holder, _ = instance.sender.conversations.get_or_create(target=instance.recipient)
     target, _ = instance.recipient.conversations.get_or_create(target=instance.sender)
 
-    holder.messages.add(instance)
-    target.messages.add(instance)
+    Conversation.messages.through.objects.bulk_create(
+        [
+            Conversation.messages.through(conversation=holder, message=instance),
+            Conversation.messages.through(conversation=target, message=instance),
+        ]
+    )
+    Conversation.objects.record(
+        [instance],
+        {(holder.holder_id, holder.target_id): holder.pk, (target.holder_id, target.target_id): target.pk},
+    )
 
 
 @receiver(m2m_changed, sender=Conversation.messages.through)
-def delete_orphan_messages_individual(action, pk_set, **kwargs):
-    if action == "post_remove" and not Conversation.objects.filter(messages__in=pk_set).exists():
-        Message.objects.filter(pk__in=pk_set).delete()
+def delete_orphan_messages_individual(instance, action, pk_set, reverse, **kwargs):
+    if action != "post_remove":
+        return
+
+    if reverse:
+        Conversation.objects.refresh(pk__in=pk_set)
+        pk_set = {instance.pk}
+    else:
+        Conversation.objects.refresh(pk=instance.pk)
+
+    Message.objects.filter(pk__in=pk_set).exclude(conversation__isnull=False).delete()
 
 
 @receiver(pre_delete, sender=Conversation)
@@ -4,8 +4,22 @@ from django.contrib.auth.models import Permission
 from django.db.models import Count, Q
 
 from dictionary.conf import settings
-from dictionary.models import AccountTerminationQueue, Author, BackUp, GeneralReport, Image, UserVerification
+from dictionary.models import (
+    AccountTerminationQueue,
+    Author,
+    BackUp,
+    Entry,
+    FollowupMarker,
+    GeneralReport,
+    Image,
+    KarmaChange,
+    Topic,
+    TopicActivityBucket,
+    UserVerification,
+)
 from dictionary.utils import time_threshold
+from dictionary.utils.sampling import EntryPool
+from dictionary.utils.votes import VoteLimits
 from djdict import celery_app
 
 
@@ -14,6 +28,15 @@ def process_backup(backup_id):
     BackUp.objects.get(id=backup_id).process()
 
 
+@celery_app.task
+def fulfill_wishes(topic_id, entry_id=None):
+    topic = Topic.objects.filter(pk=topic_id).first()
+    entry = Entry.objects_all.select_related("author").filter(pk=entry_id).first() if entry_id is not None else None
+
+    if topic is not None:
+        topic.fulfill_wishes(fulfiller_entry=entry)
+
+
 # Periodic tasks
 
 
@@ -25,6 +48,10 @@ def setup_periodic_tasks(sender, **kwargs):
     sender.add_periodic_task(timedelta(hours=12), purge_verifications)
     sender.add_periodic_task(timedelta(hours=14), purge_reports)
     sender.add_periodic_task(timedelta(hours=16), grant_perm_suggestion)
+    sender.add_periodic_task(timedelta(hours=1), purge_topic_activity)
+    sender.add_periodic_task(timedelta(hours=6), reconcile_vote_limits)
+    sender.add_periodic_task(timedelta(minutes=1), fold_karma_ledger)
+    sender.add_periodic_task(timedelta(minutes=5), refill_random_pool)
 
 
 @celery_app.task
@@ -47,6 +74,34 @@ def purge_images():
         image.delete()
 
 
+@celery_app.task
+def purge_topic_activity():
+    """Delete hourly topic activity buckets and followup markers that are no longer used."""
+    TopicActivityBucket.objects.purge()
+    FollowupMarker.objects.purge()
+
+
+@celery_app.task
+def reconcile_vote_limits():
+    """Reload vote limit counters that drifted from the votes in the database."""
+    if settings.REDIS_VOTE_LIMITS:
+        for voter_id in VoteLimits.inconsistent():
+            VoteLimits(voter_id).load()
+
+
+@celery_app.task
+def fold_karma_ledger():
+    """Move the changes in the karma ledger to the karma of their authors."""
+    KarmaChange.objects.fold()
+
+
+@celery_app.task
+def refill_random_pool():
+    """Refill the pool of random entries of the home page, if it is running low or stale."""
+    if settings.REDIS_RANDOM_POOL and settings.INDEX_TYPE == "random_records":
+        EntryPool().refill()
+
+
 @celery_app.task
 def commit_user_deletions():
     """Delete (marked) users."""
@@ -3,8 +3,10 @@ from html import unescape
 from urllib.parse import quote_plus
 
 from django import template
+from django.conf import settings as django_settings
+from django.core.cache import cache
 from django.template import defaultfilters
-from django.utils import timezone
+from django.utils import timezone, translation
 from django.utils.html import escape, mark_safe
 from django.utils.translation import gettext as _, gettext_lazy, pgettext_lazy
 
@@ -12,6 +14,7 @@ from dateutil.parser import parse
 
 from dictionary.conf import settings
 from dictionary.utils import RE_WEBURL, RE_WEBURL_NC, i18n_lower as _i18n_lower
+from dictionary.utils.search import search_terms
 
 register = template.Library()
 
@@ -65,24 +68,29 @@ def q_unescape(string):
     return quote_plus(unescape(string))
 
 
-def linkify(weburl_match):
+RE_INTERNAL_ENTRY = re.compile(r"^/entry/([0-9]+)/?$")
+RE_INTERNAL_TOPIC = re.compile(r"^/topic/([-a-zA-Z0-9]+)/?$")
+RE_INTERNAL_IMAGE = re.compile(r"^/img/([a-z0-9]{8})/?$")
+
+
+def linkify(domain, path):
     """Linkify given url. If the url is internal convert it to appropriate tag if possible."""
-    domain, path = weburl_match.group(1), weburl_match.group(2) or ""
+    path = path or ""
 
     if domain.endswith(settings.DOMAIN) and len(path) > 7:
         # Internal links (entries and topics)
 
-        if permalink := re.match(r"^/entry/([0-9]+)/?$", path):
+        if permalink := RE_INTERNAL_ENTRY.match(path):
             return f'({SEE}: <a href="{path}">#{permalink.group(1)}</a>)'
 
-        if topic := re.match(r"^/topic/([-a-zA-Z0-9]+)/?$", path):
+        if topic := RE_INTERNAL_TOPIC.match(path):
             # Notice as we convert slug to title, this doesn't optimally translate
             # into original title, especially in non-English languages.
             slug = topic.group(1)
             guess = slug.replace("-", " ").strip()
             return f'({SEE}: <a href="{path}">{guess}</a>)'
 
-        if image := re.match(r"^/img/([a-z0-9]{8})/?$", path):
+        if image := RE_INTERNAL_IMAGE.match(path):
             return f'<a role="button" tabindex="0" data-img="/img/{image.group(1)}" aria-expanded="false">{IMAGE}</a>'
 
     path_repr = f"/...{path[-32:]}" if len(path) > 35 else path  # Shorten long urls
@@ -91,61 +99,137 @@ def linkify(weburl_match):
     return f'<a rel="ugc nofollow noopener" target="_blank" title="{url}" href="{url}">{domain}{path_repr}</a>'
 
 
-@register.filter
-def formatted(raw_entry):
+class Formatter:
     """
-    Entry formatting/linkifying regex logic.
+    Compiles given (pattern, handler) rules into a single regex, so that the
+    text is tokenized in one pass. At each position, rules are tried in the
+    given order and the first one that matches is replaced by the return value
+    of its handler, which takes the groups of the pattern as arguments. The
+    replaced text is not looked at again.
     """
 
-    if not raw_entry:
-        return ""
+    def __init__(self, rules):
+        self.handlers = {}
+        patterns = []
+        index = 0
+
+        for pattern, handler in rules:
+            # Each pattern is enclosed in a group, which is the last one to be
+            # closed when the pattern matches, so match.lastindex tells the rule.
+            groups = re.compile(pattern).groups
+            self.handlers[index + 1] = (handler, index + 1, index + 1 + groups)
+            patterns.append(f"({pattern})")
+            index += groups + 1
+
+        self.regex = re.compile("|".join(patterns))
+
+    def _replace(self, match):
+        handler, start, end = self.handlers[match.lastindex]
+        return handler(*match.groups()[start:end])
+
+    def format(self, text):
+        return self.regex.sub(self._replace, text)
+
 
-    entry = escape(raw_entry)  # Prevent XSS
-    replacements = (
+def _labelled_link(domain, path, label):
+    # Label might have references and links in it, which were formatted as well
+    # before the labelled link.
+    return f'<a rel="ugc nofollow noopener" target="_blank" href="{domain}{path or ""}">{FORMATTER.format(label)}</a>'
+
+
+FORMATTER = Formatter(
+    (
         # Reference
-        (rf"\({SEE_EXPR}: #{RE_ENTRY_CHARSET}\)", rf'({SEE}: <a href="/entry/\1/">#\1</a>)'),
+        (rf"\({SEE_EXPR}: #{RE_ENTRY_CHARSET}\)", lambda pk: f'({SEE}: <a href="/entry/{pk}/">#{pk}</a>)'),
         (
             rf"\({SEE_EXPR}: (?!<)(@?{RE_TOPIC_CHARSET})\)",
-            lambda m: rf'({SEE}: <a href="/topic/?q={q_unescape(m.group(1))}">{m.group(1)}</a>)',
+            lambda title, _: f'({SEE}: <a href="/topic/?q={q_unescape(title)}">{title}</a>)',
         ),
         # Swh
         (
             rf"`:{RE_TOPIC_CHARSET}`",
-            lambda m: rf'<a data-sup="({SEE}: {m.group(1)})" href="/topic/?q={q_unescape(m.group(1))}" title="({SEE}: {m.group(1)})">*</a>',  # noqa
+            lambda title: f'<a data-sup="({SEE}: {title})" href="/topic/?q={q_unescape(title)}" title="({SEE}: {title})">*</a>',  # noqa
         ),
         # Reference with no indicator
-        (rf"`#{RE_ENTRY_CHARSET}`", r'<a href="/entry/\1/">#\1</a>'),
-        (rf"`(@?{RE_TOPIC_CHARSET})`", lambda m: rf'<a href="/topic/?q={q_unescape(m.group(1))}">{m.group(1)}</a>'),
+        (rf"`#{RE_ENTRY_CHARSET}`", lambda pk: f'<a href="/entry/{pk}/">#{pk}</a>'),
+        (rf"`(@?{RE_TOPIC_CHARSET})`", lambda title, _: f'<a href="/topic/?q={q_unescape(title)}">{title}</a>'),
         # Search
         (
             rf"\({SEARCH_EXPR}: (@?{RE_TOPIC_CHARSET})\)",
-            rf'({SEARCH}: <a data-keywords="\1" class="quicksearch" role="button" tabindex="0">\1</a>)',
+            lambda keywords, _: f'({SEARCH}: <a data-keywords="{keywords}" class="quicksearch" role="button" tabindex="0">{keywords}</a>)',  # noqa
         ),
         # Image
-        (IMAGE_REGEX, rf'<a role="button" tabindex="0" data-img="/img/\1" aria-expanded="false">{IMAGE}</a>'),
-        # Links. Order matters. In order to hinder clash between labelled and linkified:
-        # Find links with label, then encapsulate them in anchor tag, which adds " character before the
-        # link. Then we find all other links which don't have " at the start.
-        # Users can't send " character, they send the escaped version: &quot;
         (
-            rf"\[{RE_WEBURL} (?!\s|{RE_WEBURL_NC})([a-z0-9 ğçıöşü#&@()_+=':%/\",.!?*~`\[{{}}<>^;\\|-]+)(?<!\s)\]",
-            r'<a rel="ugc nofollow noopener" target="_blank" href="\1\2">\3</a>',
+            IMAGE_REGEX,
+            lambda slug: f'<a role="button" tabindex="0" data-img="/img/{slug}" aria-expanded="false">{IMAGE}</a>',
         ),
+        # Links. Labelled links come first, so that their urls don't get linkified on their own.
+        # Users can't send " character, they send the escaped version: &quot;
         (
-            rf"(?<!\"){RE_WEBURL}",
-            linkify,
+            rf"\[{RE_WEBURL} (?!\s|{RE_WEBURL_NC})([a-z0-9 ğçıöşü#&@()_+=':%/\",.!?*~`\[{{}}<>^;\\|-]+)(?<!\s)\]",
+            _labelled_link,
         ),
+        (rf"(?<!\"){RE_WEBURL}", linkify),
     )
+)
+
+
+@register.filter
+def formatted(raw_entry):
+    """
+    Entry formatting/linkifying logic, see FORMATTER.
+    """
+
+    if not raw_entry:
+        return ""
+
+    return mark_safe(FORMATTER.format(escape(raw_entry)))  # Escape to prevent XSS
+
+
+ENTRY_HTML_VERSION = 2
+"""Increment this when 'formatted' starts to yield different HTML, so that stored HTML is discarded."""
+
+
+def entry_html_key(entry, language=None):
+    edited = int(entry.date_edited.timestamp() * 1e6) if entry.date_edited else 0
+    return f"entry_html_v{ENTRY_HTML_VERSION}_{entry.pk}_{edited}_{language or translation.get_language()}"
+
+
+def store_entry_html(entries):
+    """Render given entries in each language and store their HTML. See ENTRY_HTML_CACHE_TIMEOUT."""
+    rendered = {}
+
+    for language, _name in django_settings.LANGUAGES:
+        with translation.override(language):
+            rendered.update({entry_html_key(entry, language): formatted(entry.content) for entry in entries})
+
+    cache.set_many(rendered, timeout=settings.ENTRY_HTML_CACHE_TIMEOUT)
+
+
+def prefetch_entry_html(entries):
+    """Fetch the stored HTML of given entries with a single cache lookup, to be used by 'formatted_entry'."""
+    keys = {entry_html_key(entry): entry for entry in entries}
+    stored = cache.get_many(keys)
+
+    for key, entry in keys.items():
+        entry.html = stored.get(key)
+
+
+@register.filter
+def formatted_entry(entry):
+    """Stored HTML of given entry, formatted on the fly (and stored) if it's missing."""
+    html = entry.html if hasattr(entry, "html") else cache.get(entry_html_key(entry))
 
-    for tag in replacements:
-        entry = re.sub(*tag, entry)
+    if html is None:
+        html = formatted(entry.content)
+        cache.set(entry_html_key(entry), html, timeout=settings.ENTRY_HTML_CACHE_TIMEOUT)
 
-    return mark_safe(entry)
+    return mark_safe(html)
 
 
 @register.filter
 def mark(formatted_entry, words):
-    for word in sorted(words.split(), key=len, reverse=True):
+    for word in sorted(search_terms(words), key=len, reverse=True):
         tag = (rf"({re.escape(escape(word))})(?!(.(?!<(a|mark)))*<\/(a|mark)>)", r"<mark>\1</mark>")
         formatted_entry = re.sub(*tag, formatted_entry)
     return mark_safe(formatted_entry)
@@ -21,6 +21,19 @@ def url_replace(request, field, value):
     return dict_.urlencode()
 
 
+@register.simple_tag
+def page_url(request, page_obj, number):
+    """url_replace for pages, also sets the cursor of the page if the paginator supports seeking."""
+    dict_ = request.GET.copy()
+    dict_["page"] = number
+    dict_.pop("c", None)
+
+    if hasattr(page_obj, "cursor") and (cursor := page_obj.cursor(number)):
+        dict_["c"] = cursor
+
+    return dict_.urlencode()
+
+
 @register.simple_tag
 def firstofany(*args_list):
     for arg in args_list:
@@ -1,8 +1,47 @@
-from django.http import Http404
-from django.test import TestCase, override_settings
+import json
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import IntegrityError, connection
+from django.http import Http404, HttpResponse
+from django.shortcuts import reverse
+from django.template import engines
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone, translation
+
+from django_redis import get_redis_connection
 
 from dictionary.conf import settings
-from dictionary.models import Author, Conversation, Entry, Message, Topic
+from dictionary.middleware.instrumentation import InstrumentationMiddleware
+from dictionary.models import (
+    Author,
+    Category,
+    Comment,
+    Conversation,
+    DownvotedEntries,
+    Entry,
+    KarmaChange,
+    Message,
+    Topic,
+    TopicActivity,
+    TopicFollowing,
+    UpvotedEntries,
+)
+from dictionary.utils.autocomplete import TopicCompletion, complete_authors, complete_topics
+from dictionary.utils.instrumentation import Recorder, ViewStatistics
+from dictionary.utils.managers import TopicListManager, TopicQueryHandler, entry_prefetch
+from dictionary.utils.ranking import PopularRanking
+from dictionary.utils.sampling import EntryPool, random_entry_ids
+from dictionary.utils.search import headline, highlight, search_query, search_terms
+from dictionary.utils.serializers import LeftFrame
+from dictionary.utils.useragents import UserAgentCache
+from dictionary.utils.views import KeysetPaginator, SafePaginator
+from dictionary.utils.votes import EntryVote, VoteLimits, vote_counts
 
 
 class EntryModelManagersTests(TestCase):
@@ -105,6 +144,13 @@ class ConversationModelManagersTest(TestCase):
         self.assertIn(self.conversation_4_6, conversation_list_3)
         self.assertIn(self.conversation_4_7, conversation_list_3)
 
+        # Latest messages first, in one query
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                [self.conversation_4_7, self.conversation_4_6, self.conversation_4_5],
+                list(Conversation.objects.list_for_user(self.author_4).select_related("target", "latest_message")),
+            )
+
     def test_list_for_user_with_search_term(self):
         # Search by message content
         conversation_list = Conversation.objects.list_for_user(self.author_1, search_term="domates")
@@ -212,3 +258,814 @@ class TopicModelManagersTest(TestCase):
         topics = Topic.objects_published.all()
         self.assertEqual(1, topics.count())
         self.assertIn(self.topic_2, topics)
+
+
+class TopicActivityModelManagersTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.topic = Topic.objects.create_topic("activity")
+        cls.author = Author.objects.create(username="author", email="0", is_novice=False)
+        cls.novice = Author.objects.create(username="novice", email="1")
+
+    def test_register_entry(self):
+        Entry.objects.create(topic=self.topic, author=self.author)
+        entry = Entry.objects.create(topic=self.topic, author=self.author)
+        novice_entry = Entry.objects.create(topic=self.topic, author=self.novice)
+
+        activity = TopicActivity.objects.get(topic=self.topic)
+        self.assertEqual(entry.date_created, activity.last_entry_at)
+        self.assertEqual(novice_entry.date_created, activity.last_novice_entry_at)
+
+        bucket = self.topic.activity_buckets.get()
+        self.assertEqual(2, bucket.entry_count)
+        self.assertEqual(1, bucket.novice_entry_count)
+        self.assertEqual([], list(TopicActivity.objects.inconsistent()))
+
+    def test_drafts(self):
+        draft = Entry.objects_all.create(topic=self.topic, author=self.author, is_draft=True)
+        self.assertFalse(TopicActivity.objects.filter(topic=self.topic).exists())
+
+        draft = Entry.objects_all.get(pk=draft.pk)
+        draft.is_draft = False
+        draft.save()
+        draft.save()  # Saving again should not count twice.
+
+        self.assertEqual(1, self.topic.activity_buckets.get().entry_count)
+
+    def test_delete(self):
+        entry = Entry.objects.create(topic=self.topic, author=self.author)
+        entry.delete()
+
+        self.assertFalse(TopicActivity.objects.filter(topic=self.topic).exists())
+        self.assertFalse(self.topic.activity_buckets.exists())
+
+    def test_entry_count(self):
+        entry = Entry.objects.create(topic=self.topic, author=self.author)
+        Entry.objects.create(topic=self.topic, author=self.novice)
+        Entry.objects_all.create(topic=self.topic, author=self.author, is_draft=True)
+        self.assertEqual(1, TopicActivity.objects.entry_count(self.topic.pk))
+        self.assertEqual(2, self.topic.entry_count)
+
+        user = Author.objects.create(username="user", email="2")
+        self.assertEqual(1, TopicActivity.objects.entry_count(self.topic.pk, user))
+        user.blocked.add(self.author)
+        self.assertEqual(0, TopicActivity.objects.entry_count(self.topic.pk, user))
+
+        entry.delete()
+        self.assertEqual(0, TopicActivity.objects.entry_count(self.topic.pk))
+        self.assertEqual(1, self.topic.entry_count)
+
+    def test_inconsistent_refresh(self):
+        Entry.objects.create(topic=self.topic, author=self.author)
+        TopicActivity.objects.all().delete()
+        self.assertEqual([self.topic.pk], list(TopicActivity.objects.inconsistent()))
+
+        TopicActivity.objects.refresh([self.topic.pk])
+        self.assertEqual([], list(TopicActivity.objects.inconsistent()))
+
+        self.topic.activity_buckets.update(entry_count=5)
+        TopicActivity.objects.rebuild()
+        self.assertEqual([], list(TopicActivity.objects.inconsistent()))
+
+
+class TopicFollowingModelManagersTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.topic = Topic.objects.create_topic("followed")
+        cls.follower = Author.objects.create(username="follower", email="0", is_novice=False)
+        cls.author = Author.objects.create(username="author", email="1", is_novice=False)
+        cls.blocked = Author.objects.create(username="blocked", email="2", is_novice=False)
+        cls.novice = Author.objects.create(username="novice", email="3")
+        cls.follower.blocked.add(cls.blocked)
+        cls.follower.following_topics.add(cls.topic)
+
+    def test_unread_count(self):
+        for author in (self.author, self.author, self.blocked, self.novice, self.follower):
+            Entry.objects.create(topic=self.topic, author=author)
+
+        Entry.objects_all.create(topic=self.topic, author=self.author, is_draft=True)
+        following = TopicFollowing.objects.get(author=self.follower, topic=self.topic)
+        self.assertEqual(2, following.unread_count)
+
+        self.follower.invalidate_unread_topic_count()
+        self.assertEqual(2, self.follower.unread_topic_count["topics"])
+
+        TopicFollowing.objects.update(unread_count=0)
+        TopicFollowing.objects.recount(author=self.follower)
+        following.refresh_from_db()
+        self.assertEqual(2, following.unread_count)
+
+    def test_delete(self):
+        Entry.objects.create(topic=self.topic, author=self.author)
+        Entry.objects.create(topic=self.topic, author=self.author).delete()
+        self.assertEqual(1, TopicFollowing.objects.get(author=self.follower, topic=self.topic).unread_count)
+
+
+class FollowupsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = Author.objects.create(username="author", email="0", is_novice=False)
+        cls.other = Author.objects.create(username="other", email="1", is_novice=False)
+        cls.novice = Author.objects.create(username="novice", email="2")
+        cls.blocked = Author.objects.create(username="blocked", email="3", is_novice=False)
+        cls.author.blocked.add(cls.blocked)
+
+        cls.topic = Topic.objects.create_topic("followed")
+        cls.other_topic = Topic.objects.create_topic("other")
+
+        Entry.objects.create(topic=cls.topic, author=cls.author)
+        Entry.objects.create(topic=cls.other_topic, author=cls.novice)
+
+        for author in (cls.other, cls.other, cls.novice, cls.blocked):
+            Entry.objects.create(topic=cls.topic, author=author)
+
+        Entry.objects.create(topic=cls.other_topic, author=cls.other)
+        Entry.objects_all.create(topic=cls.other_topic, author=cls.other, is_draft=True)
+
+    def test_followups(self):
+        self.assertEqual(
+            [{"title": "followed", "slug": "followed", "count": 2}], list(TopicQueryHandler().followups(self.author))
+        )
+        self.assertEqual(
+            [{"title": "followed", "slug": "followed", "count": 1}, {"title": "other", "slug": "other", "count": 1}],
+            list(TopicQueryHandler().followups(self.novice)),
+        )
+
+        Entry.objects.create(topic=self.topic, author=self.author)
+        self.assertEqual([], list(TopicQueryHandler().followups(self.author)))
+
+    def test_delete(self):
+        entry = Entry.objects.create(topic=self.topic, author=self.author)
+        entry.delete()
+        self.assertEqual(2, TopicQueryHandler().followups(self.author)[0]["count"])
+
+
+class TopicRollupQueryHandlerTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name="kategori")
+        cls.author = Author.objects.create(username="author", email="0", is_novice=False)
+        cls.novice = Author.objects.create(username="novice", email="1")
+        cls.reader = Author.objects.create(username="reader", email="2", is_novice=False)
+        cls.reader.following_categories.add(cls.category)
+
+        cls.categorized = categorized = Topic.objects.create_topic("categorized")
+        categorized.category.add(cls.category)
+        crowded = Topic.objects.create_topic("crowded")
+        pinned = Topic.objects.create_topic("pinned")
+        pinned.is_pinned = True
+        pinned.save()
+
+        for _ in range(10):
+            Entry.objects.create(topic=crowded, author=cls.author)
+
+        Entry.objects.create(topic=categorized, author=cls.author)
+        Entry.objects.create(topic=pinned, author=cls.author)
+        Entry.objects.create(topic=categorized, author=cls.novice)
+        Entry.objects.create(topic=Topic.objects.create_topic("novice only"), author=cls.novice)
+
+    def assertSameResults(self, method, *args):
+        handler = TopicQueryHandler()
+        expected = list(getattr(handler, method)(*args))
+
+        with mock.patch.object(settings, "TOPIC_LIST_ROLLUP", True):
+            self.assertEqual(expected, list(getattr(handler, method)(*args)))
+
+        return expected
+
+    def test_today(self):
+        self.assertEqual(3, len(self.assertSameResults("today", self.reader)))
+        self.reader.allow_uncategorized = False
+        self.assertEqual(1, len(self.assertSameResults("today", self.reader)))
+
+    def test_popular(self):
+        self.assertEqual(["pinned", "crowded"], [item["title"] for item in self.assertSameResults("popular", ())])
+
+    def test_popular_ranking(self):
+        ranking = PopularRanking()
+        ranking.redis.delete(f"{ranking.prefix}:fresh")  # Rebuilds on first call.
+        self.assertEqual(list(TopicQueryHandler().popular(())), ranking.popular(()))
+
+        with mock.patch.object(settings, "REDIS_POPULAR_RANKING", True):
+            for _ in range(11):
+                Entry.objects.create(topic=self.categorized, author=self.author)
+
+            titles = [item["title"] for item in TopicQueryHandler().popular(())]
+            self.assertEqual(["pinned", "categorized", "crowded"], titles)
+
+        self.assertEqual(list(TopicQueryHandler().popular(())), ranking.popular(()))
+        self.assertEqual(list(TopicQueryHandler().popular(("kategori",))), ranking.popular(("kategori",)))
+
+    def test_novices(self):
+        self.assertEqual(2, len(self.assertSameResults("novices")))
+
+    def test_categories(self):
+        self.assertEqual(1, len(self.assertSameResults("generic_category", self.category)))
+        self.assertEqual(2, len(self.assertSameResults("uncategorized")))
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = Author.objects.create(username="author", email="0", is_novice=False)
+
+        for title in ("python", "cooking", "learning python the python way"):
+            Entry.objects.create(topic=Topic.objects.create_topic(title), author=author, content=f"about {title}")
+
+        cls.entry = Entry.objects.create(
+            topic=Topic.objects.get(title="cooking"), author=author, content="boil the pasta & serve"
+        )
+
+    def search(self, **search_keys):
+        return [item["title"] for item in TopicQueryHandler().search(AnonymousUser(), search_keys)]
+
+    def test_topic_search(self):
+        self.assertEqual(
+            ["learning python the python way", "python"], self.search(keywords="python", ordering="relevance")
+        )
+        self.assertEqual(["python"], self.search(keywords="python -learning"))
+        self.assertEqual(["cooking"], self.search(keywords="COOKING", ordering="alpha"))
+        self.assertEqual([], self.search(keywords="pyth"))
+
+    def test_entry_search(self):
+        self.assertEqual([self.entry], list(Entry.objects.filter(search_vector=search_query("pasta"))))
+
+        self.entry.content = "boil the rice"
+        self.entry.save()
+        self.assertFalse(Entry.objects.filter(search_vector=search_query("pasta")).exists())
+        self.assertTrue(Entry.objects.filter(search_vector=search_query("rice")).exists())
+
+    def test_highlight(self):
+        fragment = Entry.objects.annotate(fragment=headline("content", "pasta")).get(pk=self.entry.pk).fragment
+        self.assertEqual("boil the <mark>pasta</mark> &amp; serve", highlight(fragment))
+
+    def test_search_terms(self):
+        self.assertEqual(["a", "phrase", "b"], search_terms('"a phrase" -excluded or b'))
+
+
+class AutoCompleteTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = Author.objects.create(username="author", email="0", is_novice=False, is_active=True)
+        novice = Author.objects.create(username="novice", email="1")
+
+        for title in ("pasta", "fresh pasta", "pastry", "censored pasta", "pas"):
+            Entry.objects.create(topic=Topic.objects.create_topic(title), author=cls.author)
+
+        Topic.objects.filter(title="censored pasta").update(is_censored=True)
+        Entry.objects.create(topic=Topic.objects.create_topic("pasta by novice"), author=novice)
+        Topic.objects.create_topic("pasta without entries")
+
+    def setUp(self):
+        completion = TopicCompletion()
+        completion.redis.delete(completion.key, f"{completion.prefix}:fresh")
+        # Ids of the test database get reused across runs, while the cache persists.
+        cache.delete_pattern("blocked_ids_*")
+
+    def test_complete_topics(self):
+        expected = ["pas", "pasta", "pastry", "fresh pasta"]
+        self.assertEqual(expected, complete_topics("PAS", 7))
+        self.assertEqual(["pas", "pasta"], complete_topics("pas", 2))
+        self.assertEqual(["fresh pasta"], complete_topics("sh pas", 7))
+
+        with mock.patch.object(settings, "REDIS_AUTOCOMPLETE", True):
+            self.assertEqual(expected, complete_topics("pas", 7))
+
+            topic = Topic.objects.get(title="pasta")
+            topic.title = "rice"
+            topic.save()
+            Topic.objects.get(title="pastry").delete()
+            Topic.objects.get(title="pasta by novice").entries.create(author=self.author)
+            self.assertEqual(["pas", "pasta by novice", "fresh pasta"], complete_topics("pas", 7))
+
+            topic = Topic.objects.get(title="pas")
+            topic.is_censored = True
+            topic.save()
+            self.assertEqual(["pasta by novice", "fresh pasta"], complete_topics("pas", 7))
+
+    def test_complete_authors(self):
+        blocked = Author.objects.create(username="author blocked", email="2", is_novice=False, is_active=True)
+        blocker = Author.objects.create(username="author blocker", email="3", is_novice=False, is_active=True)
+        user = Author.objects.create(username="user", email="4", is_novice=False, is_active=True)
+
+        def complete():
+            return [author.username for author in complete_authors(user, "AUTHOR", 3)]
+
+        self.assertEqual(3, len(complete()))
+
+        # Cached blockages are invalidated once the changes are committed.
+        with self.captureOnCommitCallbacks(execute=True):
+            user.blocked.add(blocked)
+            blocker.blocked.add(user)
+            self.assertEqual(3, len(complete()))
+
+        self.assertEqual(["author"], complete())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            user.blocked.clear()
+
+        self.assertEqual({"author", "author blocked"}, set(complete()))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            blocker.blocked.clear()
+
+        self.assertEqual(3, len(complete()))
+        self.assertEqual(3, len(complete_authors(AnonymousUser(), "author", 7)))
+
+
+class EntryPoolTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = Author.objects.create(username="author", email="0", is_novice=False)
+        novice = Author.objects.create(username="novice", email="1")
+        topic = Topic.objects.create_topic("topic")
+        cls.entries = [Entry.objects.create(topic=topic, author=author).pk for _ in range(30)]
+        Entry.objects.create(topic=topic, author=novice)
+        Entry.objects_all.create(topic=topic, author=author, is_draft=True)
+
+    def setUp(self):
+        pool = EntryPool()
+        pool.redis.delete(pool.key, f"{pool.prefix}:fresh")
+
+    def test_random_entry_ids(self):
+        pks = random_entry_ids(10, attempts=10000)
+        self.assertEqual(10, len(set(pks)))
+        self.assertTrue(set(pks) <= set(self.entries))
+
+        # Sparse ids
+        Entry.objects.filter(pk__in=self.entries[:-1]).delete()
+        self.assertEqual([self.entries[-1]], random_entry_ids(10, attempts=10000))
+
+    def test_pool(self):
+        pool = EntryPool()
+
+        with mock.patch.object(settings, "REDIS_RANDOM_POOL", True), mock.patch.object(EntryPool, "low", 10):
+            self.assertEqual(10, len(random_entry_ids(10, attempts=10000)))  # Falls back to the database
+            self.assertTrue(pool.refill())
+            self.assertFalse(pool.refill())
+
+            with self.assertNumQueries(0):
+                drawn = random_entry_ids(10) + random_entry_ids(10) + random_entry_ids(10)
+
+            self.assertEqual(sorted(self.entries), sorted(drawn))
+            self.assertEqual([], pool.draw(10))
+            self.assertTrue(pool.refill())
+
+            with mock.patch.object(EntryPool, "capacity", 5):
+                pool.fill()
+                self.assertEqual(5, len(pool.draw(10)))
+
+                # Ids drawn from a short pool are kept, only the missing ones are found in the database.
+                pool.fill()
+                pooled = pool.redis.lrange(pool.key, 0, -1)
+                pks = random_entry_ids(10, attempts=10000)
+                self.assertEqual([int(pk) for pk in pooled], pks[:5])
+                self.assertEqual(10, len(set(pks)))
+                self.assertEqual([], pool.draw(10))
+
+
+class UserAgentCacheTest(TestCase):
+    mobile = (
+        "Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15"
+        " (KHTML, like Gecko) Version/17.4 Mobile/15E148 Safari/604.1"
+    )
+    desktop = "Mozilla/5.0 (X11; Linux x86_64; rv:125.0) Gecko/20100101 Firefox/125.0"
+
+    def setUp(self):
+        redis = get_redis_connection("default")
+        redis.delete(*redis.keys(f"{UserAgentCache.prefix}:*"), f"{UserAgentCache.prefix}:stats")
+
+    def test_is_mobile(self):
+        cache = UserAgentCache(size=1)
+        self.assertEqual(
+            [True, True, False, False, True],
+            [cache.is_mobile(ua) for ua in (self.mobile, self.mobile, self.desktop, self.desktop, self.mobile)],
+        )
+        self.assertEqual({"hits": 2, "shared_hits": 0, "misses": 3, "size": 1, "hit_ratio": 0.4}, cache.stats())
+
+        with mock.patch.object(settings, "REDIS_USER_AGENT_CACHE", True):
+            first, second = UserAgentCache(size=10), UserAgentCache(size=10)
+            self.assertTrue(first.is_mobile(self.mobile))
+            self.assertTrue(second.is_mobile(self.mobile))
+            self.assertTrue(second.is_mobile(self.mobile))
+            self.assertEqual((1, 1, 0), tuple(second.stats()[field] for field in UserAgentCache.fields))
+
+        cache.report()
+        second.report()
+        self.assertEqual({"hits": 3, "shared_hits": 1, "misses": 3, "hit_ratio": 4 / 7}, UserAgentCache.totals())
+        second.report()  # Only the lookups since the last report are added.
+        self.assertEqual(7, sum(UserAgentCache.totals()[field] for field in UserAgentCache.fields))
+
+    def test_shared_eviction(self):
+        redis = get_redis_connection("default")
+
+        with (
+            mock.patch.object(settings, "REDIS_USER_AGENT_CACHE", True),
+            mock.patch.object(settings, "USER_AGENT_CACHE_SIZE", 1),
+        ):
+            self.assertTrue(UserAgentCache(size=10).is_mobile(self.mobile))
+            self.assertFalse(UserAgentCache(size=10).is_mobile(self.desktop))
+            self.assertEqual(1, redis.hlen(f"{UserAgentCache.prefix}:shared"))
+
+            # The least recently used ones are evicted.
+            first, second = UserAgentCache(size=10), UserAgentCache(size=10)
+            self.assertTrue(first.is_mobile(self.mobile))
+            self.assertFalse(second.is_mobile(self.desktop))
+            self.assertEqual((0, 0), (first.stats()["shared_hits"], second.stats()["shared_hits"]))
+
+            third = UserAgentCache(size=10)
+            self.assertFalse(third.is_mobile(self.desktop))
+            self.assertEqual(1, third.stats()["shared_hits"])
+
+
+class InstrumentationTest(TestCase):
+    def setUp(self):
+        ViewStatistics().reset()
+
+    def view(self, request):
+        Author.objects.count()
+        cache.set("instrumentation_test", 1)
+        cache.get("instrumentation_test")
+        cache.get_many(["instrumentation_test", "instrumentation_missing"])
+        return HttpResponse(engines["django"].from_string("{{ value }}").render({"value": "ok"}))
+
+    def test_middleware(self):
+        with mock.patch.object(settings, "INSTRUMENTATION", True):
+            middleware = InstrumentationMiddleware(self.view)
+
+        with self.assertLogs("dictionary.middleware.instrumentation", "INFO") as logs:
+            response = middleware(RequestFactory().get("/"))
+
+        self.assertEqual(b"ok", response.content)
+        self.assertIn('desc="1 queries"', response["Server-Timing"])
+        self.assertIn('desc="3 gets, 2 hits, 1 sets"', response["Server-Timing"])
+
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(
+            ("-", 1, 3, 2, 1),
+            (line["view"], line["queries"], line["cache_gets"], line["cache_hits"], line["cache_sets"]),
+        )
+        self.assertGreater(line["template"], 0)
+
+        middleware(RequestFactory().get("/"))
+        (row,) = ViewStatistics().averages()
+        self.assertEqual(
+            ("-", 2, 1, 3, 2 / 3),
+            tuple(row[field] for field in ("view", "requests", "queries", "cache_gets", "cache_hit_ratio")),
+        )
+
+    @override_settings(STORAGES={"staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"}})
+    def test_admin(self):
+        ViewStatistics().add("dictionary:topic", dict.fromkeys(Recorder.fields, 1))
+        self.client.force_login(Author.objects.create(username="staff", email="0", is_staff=True, is_active=True))
+        self.assertContains(self.client.get(reverse("admin:instrumentation")), "dictionary:topic")
+        self.client.post(reverse("admin:instrumentation"))
+        self.assertEqual([], ViewStatistics().averages())
+
+    def test_disabled(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            InstrumentationMiddleware(self.view)
+
+    def test_recorder(self):
+        # Queries are recorded without install(), but only within the recorder.
+        with Recorder() as recorder:
+            Author.objects.count()
+
+        Author.objects.count()
+        self.assertEqual(1, recorder.metrics["queries"])
+        self.assertGreater(recorder.metrics["total"], recorder.metrics["sql"])
+
+
+class EntryVoteTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = Author.objects.create(username="author", email="0", is_novice=False)
+        cls.voter = Author.objects.create(username="voter", email="1", is_novice=False)
+        cls.entry = Entry.objects.create(topic=Topic.objects.create_topic("topic"), author=cls.author)
+
+    def vote(self, direction):
+        return EntryVote(self.voter, self.entry, direction).vote()
+
+    def assertState(self, vote_rate, voter_karma, author_karma):
+        self.assertEqual(vote_rate, Entry.objects.get(pk=self.entry.pk).vote_rate)
+        self.assertEqual(voter_karma, Author.objects.get(pk=self.voter.pk).karma)
+        self.assertEqual(author_karma, Author.objects.get(pk=self.author.pk).karma)
+
+    def test_transitions(self):
+        rate, (upvote, downvote, cost) = settings.VOTE_RATES["vote"], settings.KARMA_RATES.values()
+
+        # Savepoint, voter lock and state, vote row, vote rate, karma, savepoint release.
+        with self.assertNumQueries(6):
+            self.assertIsNone(self.vote("upvote"))
+
+        self.assertEqual([self.entry], list(self.voter.upvoted_entries.all()))
+        self.assertState(rate, -cost, upvote)
+
+        self.vote("downvote")
+        self.assertEqual([self.entry], list(self.voter.downvoted_entries.all()))
+        self.assertFalse(self.voter.upvoted_entries.exists())
+        self.assertState(-rate, -cost, -downvote)
+
+        self.vote("downvote")
+        self.assertFalse(self.voter.downvoted_entries.exists())
+        self.assertState(0, 0, 0)
+
+    def test_limits(self):
+        with mock.patch.object(settings, "DAILY_VOTE_LIMIT_PER_USER", 1):
+            self.vote("upvote")
+            other = Entry.objects.create(topic=self.entry.topic, author=self.author)
+            reason = EntryVote(self.voter, other, "downvote").vote()
+            self.assertEqual("this person has taken enough of your votes today, maybe try other users?", reason)
+            self.assertFalse(self.voter.downvoted_entries.exists())
+            # Votes can still be withdrawn.
+            self.assertIsNone(self.vote("upvote"))
+
+    def test_ineligible(self):
+        self.voter.is_novice = True
+        self.vote("upvote")
+        self.assertState(settings.VOTE_RATES["vote"], 0, 0)
+
+
+class KarmaLedgerTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = Author.objects.create(username="author", email="0", is_novice=False)
+        cls.voters = [Author.objects.create(username=f"voter{i}", email=f"{i + 1}", is_novice=False) for i in range(3)]
+        cls.entry = Entry.objects.create(topic=Topic.objects.create_topic("topic"), author=cls.author)
+
+    def karma(self, author):
+        return Author.objects.get(pk=author.pk).karma
+
+    @mock.patch.object(settings, "KARMA_LEDGER", True)
+    def test_fold(self):
+        upvote, _downvote, cost = settings.KARMA_RATES.values()
+
+        for voter in self.voters:
+            EntryVote(voter, self.entry, "upvote").vote()
+
+        EntryVote(self.voters[0], self.entry, "upvote").vote()  # Withdraws, refunds the cost.
+        self.assertEqual(0, self.karma(self.author))
+        self.assertEqual(8, KarmaChange.objects.count())
+
+        self.assertEqual(8, KarmaChange.objects.fold(batch_size=3))
+        self.assertFalse(KarmaChange.objects.exists())
+        self.assertEqual(2 * upvote, self.karma(self.author))
+        self.assertEqual([0, -cost, -cost], [self.karma(voter) for voter in self.voters])
+        self.assertEqual(0, KarmaChange.objects.fold())
+
+    def test_apply(self):
+        KarmaChange.objects.apply({self.author.pk: -1, self.voters[0].pk: 0})
+        self.assertEqual(-1, self.karma(self.author))
+        self.assertFalse(KarmaChange.objects.exists())
+
+
+@mock.patch.object(settings, "REDIS_VOTE_LIMITS", True)
+class VoteLimitsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = Author.objects.create(username="author", email="0", is_novice=False)
+        cls.voter = Author.objects.create(username="voter", email="1", is_novice=False)
+        topic = Topic.objects.create_topic("topic")
+        cls.entries = [Entry.objects.create(topic=topic, author=cls.author) for _ in range(3)]
+
+    def setUp(self):
+        VoteLimits.reset()
+
+    def vote(self, entry, direction="upvote"):
+        with self.captureOnCommitCallbacks(execute=True):
+            return EntryVote(self.voter, entry, direction).vote()
+
+    def test_counts(self):
+        UpvotedEntries.objects.create(author=self.voter, entry=self.entries[0])
+        limits = VoteLimits(self.voter.pk)
+        self.assertEqual((1, 1, 1), limits.counts(self.author.pk))  # Loaded from the database.
+
+        self.vote(self.entries[1], "downvote")
+        self.vote(self.entries[0], "downvote")  # Changes sides.
+        self.assertEqual((2, 2, 2), limits.counts(self.author.pk))
+        self.assertEqual((2, 2, 2), vote_counts(self.voter.pk, self.author.pk))
+        self.assertEqual((2, 0, 0), limits.counts(self.voter.pk))
+
+        self.vote(self.entries[1], "downvote")  # Withdraws.
+        self.assertEqual((1, 1, 1), limits.counts(self.author.pk))
+
+        two_days_ago = timezone.now() - timedelta(days=2)
+        DownvotedEntries.objects.filter(author=self.voter).update(date_created=two_days_ago)
+        limits.load()
+        self.assertEqual((0, 1, 0), limits.counts(self.author.pk))
+
+    def test_limits(self):
+        with mock.patch.object(settings, "DAILY_VOTE_LIMIT_PER_USER", 1):
+            self.assertIsNone(self.vote(self.entries[0]))
+            self.assertIsNotNone(self.vote(self.entries[1]))
+            self.vote(self.entries[0])  # Withdraws.
+            self.assertIsNone(self.vote(self.entries[1]))
+
+    def test_reconcile(self):
+        self.vote(self.entries[0])
+        self.assertEqual([], list(VoteLimits.inconsistent()))
+
+        self.entries[0].delete()
+        self.assertEqual([self.voter.pk], list(VoteLimits.inconsistent()))
+
+        VoteLimits(self.voter.pk).load()
+        self.assertEqual([], list(VoteLimits.inconsistent()))
+
+
+@mock.patch.object(settings, "REDIS_VOTE_LIMITS", True)
+class ConcurrentVoteTest(TransactionTestCase):
+    def setUp(self):
+        VoteLimits.reset()
+        self.author = Author.objects.create(username="author", email="0", is_novice=False)
+        self.voter = Author.objects.create(username="voter", email="1", is_novice=False)
+        topic = Topic.objects.create_topic("topic")
+        self.entries = [Entry.objects.create(topic=topic, author=self.author) for _ in range(3)]
+        EntryVote(self.voter, self.entries[0], "upvote").vote()
+
+    def vote(self, entry, results):
+        try:
+            results.append(EntryVote(self.voter, entry, "upvote").vote())
+        finally:
+            connection.close()
+
+    @mock.patch.object(settings, "DAILY_VOTE_LIMIT_PER_USER", 2)
+    def test_concurrent_votes(self):
+        register, results = VoteLimits.register, []
+
+        def slow_register(*args):
+            # Widens the window between the two votes.
+            time.sleep(0.2)
+            register(*args)
+
+        with mock.patch.object(VoteLimits, "register", slow_register):
+            threads = [threading.Thread(target=self.vote, args=(entry, results)) for entry in self.entries[1:]]
+
+            for thread in threads:
+                thread.start()
+
+            for thread in threads:
+                thread.join()
+
+        # Only one of the votes fits in the daily limit against the author.
+        self.assertEqual(1, results.count(None))
+        self.assertEqual(2, UpvotedEntries.objects.filter(author=self.voter).count())
+        self.assertTrue(VoteLimits(self.voter.pk).is_consistent())
+
+    def test_rollback(self):
+        with mock.patch.object(EntryVote, "_update", side_effect=IntegrityError), self.assertRaises(IntegrityError):
+            EntryVote(self.voter, self.entries[1], "upvote").vote()
+
+        self.assertEqual((1, 1, 1), VoteLimits(self.voter.pk).counts(self.author.pk))
+        self.assertTrue(VoteLimits(self.voter.pk).is_consistent())
+
+
+class TopicListCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = Author.objects.create(username="author", email="0", is_novice=False)
+        Entry.objects.create(topic=Topic.objects.create_topic("uncategorized"), author=author)
+
+    def setUp(self):
+        self.manager = TopicListManager("uncategorized")
+        cache.delete_many([self.manager.cache_key, f"{self.manager.cache_key}_lock"])
+
+    def expire(self):
+        cached_data = cache.get(self.manager.cache_key)
+        cached_data["set_at"] -= timedelta(seconds=settings.DEFAULT_CACHE_TIMEOUT)
+        cache.set(self.manager.cache_key, cached_data)
+
+    def test_stale_while_revalidate(self):
+        self.assertEqual(1, len(TopicListManager("uncategorized").serialized))
+        self.expire()
+
+        # This one gets to recompute the list, the others are served stale list meanwhile.
+        manager = TopicListManager("uncategorized")
+        self.assertFalse(manager.cache_exists)
+        self.assertTrue(TopicListManager("uncategorized").cache_exists)
+
+        # Lock is released once the list is recomputed.
+        self.assertEqual(1, len(manager.serialized))
+        self.assertIsNone(cache.get(f"{manager.cache_key}_lock"))
+        self.assertTrue(TopicListManager("uncategorized").cache_exists)
+
+    def test_wait_for_cache(self):
+        manager = TopicListManager("uncategorized")
+        self.assertFalse(manager.cache_exists)
+
+        with mock.patch.object(TopicListManager, "lock_wait", 0.1):
+            # Nothing to serve; wait for a while and compute the list anyway.
+            self.assertFalse(TopicListManager("uncategorized").cache_exists)
+
+            with mock.patch("dictionary.utils.managers.cache.get", side_effect=[None, {"data": (), "set_at": None}]):
+                self.assertTrue(TopicListManager("uncategorized").cache_exists)
+
+    def test_day_rollover(self):
+        key = TopicListManager("today-in-history").cache_key
+        cache.delete_many([key, f"{key}_lock"])
+        manager = TopicListManager("today-in-history")
+        self.assertEqual(0, len(manager.serialized))
+        cached_data = cache.get(manager.cache_key)
+        cached_data["set_at"] -= timedelta(days=1)
+        cache.set(manager.cache_key, cached_data)
+
+        # The list of the previous day is never served, even while another worker is computing the new one.
+        with mock.patch.object(TopicListManager, "lock_wait", 0.1):
+            self.assertFalse(TopicListManager("today-in-history").cache_exists)
+            self.assertFalse(TopicListManager("today-in-history").cache_exists)
+
+        self.assertEqual(0, len(TopicListManager("today-in-history").serialized))
+        self.assertTrue(TopicListManager("today-in-history").cache_exists)
+
+    def test_left_frame_fragment(self):
+        html = LeftFrame(TopicListManager("uncategorized"), 1).as_html()
+        self.assertIn("uncategorized", html)
+
+        # Cached fragment is served without serializing the frame.
+        with mock.patch.object(LeftFrame, "as_context") as as_context:
+            self.assertEqual(html, LeftFrame(TopicListManager("uncategorized"), 1).as_html())
+            self.assertEqual(html, LeftFrame(TopicListManager("uncategorized"), 1).as_html())
+            as_context.assert_not_called()
+
+        # Fragments are cached per language (and page, theme, etc.).
+        with translation.override("tr"):
+            self.assertNotEqual(html, LeftFrame(TopicListManager("uncategorized"), 1).as_html())
+
+        # Fragment is invalidated along with the list.
+        Entry.objects.create(topic=Topic.objects.create_topic("another"), author=Author.objects.get())
+        TopicListManager("uncategorized").delete_cache()
+        self.assertIn("another", LeftFrame(TopicListManager("uncategorized"), 1).as_html())
+
+
+class EntryPrefetchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.topic = Topic.objects.create_topic("ama")
+        cls.author = Author.objects.create(username="author", email="0", is_novice=False)
+        cls.user = Author.objects.create(username="user", email="1", is_novice=False)
+
+        for _ in range(10):
+            entry = Entry.objects.create(topic=cls.topic, author=cls.author)
+            Comment.objects.create(entry=entry, author=cls.author)
+
+        cls.upvoted, cls.favorited, *_ = Entry.objects.all()
+        cls.user.upvoted_entries.add(cls.upvoted)
+        cls.user.favorite_entries.add(cls.favorited)
+        cls.upvoted.comments.get().downvoted_by.add(cls.user)
+
+    def test_vote_states(self):
+        entries = {entry.pk: entry for entry in entry_prefetch(Entry.objects.all(), self.user, comments=True)}
+
+        self.assertTrue(entries[self.upvoted.pk].is_upvoted)
+        self.assertFalse(entries[self.upvoted.pk].is_downvoted)
+        self.assertFalse(entries[self.upvoted.pk].is_favorited)
+        self.assertTrue(entries[self.favorited.pk].is_favorited)
+        self.assertFalse(entries[self.favorited.pk].is_upvoted)
+        self.assertTrue(entries[self.upvoted.pk].comments.all()[0].is_downvoted)
+        self.assertFalse(entries[self.favorited.pk].comments.all()[0].is_downvoted)
+
+    def test_query_count(self):
+        # Entries, favorites, vote states (3), comments and their vote states (2), regardless of the entry count.
+        for size in (1, 10):
+            with self.assertNumQueries(8):
+                list(entry_prefetch(Entry.objects.all()[:size], self.user, comments=True))
+
+        with self.assertNumQueries(2):
+            list(entry_prefetch(Entry.objects.all(), AnonymousUser()))
+
+
+class KeysetPaginatorTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.topic = Topic.objects.create_topic("pages")
+        cls.author = Author.objects.create(username="author", email="0", is_novice=False)
+
+        for _ in range(25):
+            Entry.objects.create(topic=cls.topic, author=cls.author)
+
+    def test_pages(self):
+        queryset = Entry.objects.filter(topic=self.topic)
+        offset = SafePaginator(queryset.order_by("date_created", "pk"), 4)
+        keyset = KeysetPaginator(queryset, 4)
+
+        for number in offset.page_range:
+            expected = list(offset.page(number))
+            self.assertEqual(expected, list(keyset.page(number)))
+
+            for adjacent in (number - 1, number + 1):
+                if adjacent in offset.page_range:
+                    cursor = KeysetPaginator(queryset, 4).page(adjacent).cursor(number)
+                    self.assertEqual(expected, list(KeysetPaginator(queryset, 4, cursor=cursor).page(number)))
+
+    def test_cursor_mismatch(self):
+        queryset = Entry.objects.filter(topic=self.topic)
+        cursor = KeysetPaginator(queryset, 4).page(2).cursor(3)
+
+        self.assertIsNone(KeysetPaginator(queryset, 4).page(2).cursor(4))
+        self.assertEqual(list(queryset[16:20]), list(KeysetPaginator(queryset, 4, cursor=cursor).page(5)))
+        self.assertEqual(list(queryset[8:12]), list(KeysetPaginator(queryset, 4, cursor="3_x_1").page(3)))
+
+    def test_cached_count(self):
+        with self.assertNumQueries(1):
+            paginator = KeysetPaginator(Entry.objects.filter(topic=self.topic), 4, cached_count=25)
+            self.assertEqual(7, paginator.num_pages)
+            list(paginator.page(7))
@@ -1,26 +1,39 @@
 import datetime
+import gzip
+import json
 import time
 from decimal import Decimal
 from unittest import mock
 
+from django.contrib.auth import SESSION_KEY
 from django.core.cache import cache
 from django.db import IntegrityError
 from django.shortcuts import reverse
 from django.test import TestCase, TransactionTestCase, override_settings
-from django.utils import timezone
+from django.utils import timezone, translation
 
+from dictionary.backends.sessions import indexed
+from dictionary.backends.sessions.utils import flush_all_sessions
 from dictionary.conf import settings
 from dictionary.models import (
     Author,
+    BackUp,
     Category,
     Conversation,
+    ConversationArchive,
     Entry,
     Memento,
     Message,
+    MirrorGroup,
+    PairedSession,
     Topic,
     TopicFollowing,
     UserVerification,
+    Wish,
 )
+from dictionary.tasks import fulfill_wishes
+from dictionary.templatetags.filters import entry_html_key, formatted, formatted_entry, prefetch_entry_html
+from dictionary.utils.serializers import ArchiveSerializer
 
 
 class AuthorModelTests(TestCase):
@@ -294,6 +307,29 @@ class EntryModelTests(TestCase):
         new_entry.save()
         self.assertEqual(self.author, topic_with_no_ownership.created_by)
 
+    def test_stored_html(self):
+        entry = Entry.objects.create(**self.entry_base, content="(see: #1)")
+        entry = Entry.objects_all.get(pk=entry.pk)
+
+        with mock.patch("dictionary.models.entry.store_entry_html") as store:
+            entry.update_vote(Decimal(".2"))
+            store.assert_not_called()
+
+        self.assertEqual(formatted(entry.content), cache.get(entry_html_key(entry)))
+
+        with translation.override("tr"):
+            self.assertIn("bkz", cache.get(entry_html_key(entry)))
+
+        entry.content = "(see: #2)"
+        entry.date_edited = timezone.now()
+        entry.save()
+        self.assertEqual(formatted("(see: #2)"), formatted_entry(entry))
+
+        cache.delete(entry_html_key(entry))
+        prefetch_entry_html([entry])
+        self.assertIsNone(entry.html)
+        self.assertEqual(formatted("(see: #2)"), formatted_entry(entry))
+
     def test_votes(self):
         # Initial vote should be 0
         self.assertEqual(self.entry.vote_rate.conjugate(), Decimal("0"))
@@ -319,6 +355,102 @@ class EntryModelTests(TestCase):
         self.assertEqual(self.entry.vote_rate, Decimal(".6"))
 
 
+@override_settings(SESSION_ENGINE="dictionary.backends.sessions.indexed")
+class PairedSessionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = Author.objects.create(username="user", email="0")
+
+    def setUp(self):
+        indexed.SessionIndex(self.author.pk).redis.delete(indexed.SessionIndex(self.author.pk).key)
+
+    def login(self):
+        session = indexed.SessionStore()
+        session[SESSION_KEY] = str(self.author.pk)
+        session.create()
+        return session
+
+    def test_user(self):
+        with self.assertNumQueries(4):  # Key uniqueness check, savepoint, insert, savepoint release (no user lookup).
+            session = self.login()
+
+        self.assertEqual(self.author.pk, PairedSession.objects.get(session_key=session.session_key).user_id)
+
+    def test_flush_all_sessions(self):
+        index = indexed.SessionIndex(self.author.pk)
+        sessions = [self.login() for _ in range(5)]
+        data = {SESSION_KEY: str(self.author.pk)}
+
+        # Sessions read from the database (e.g. created before switching engines) are indexed and cached too.
+        PairedSession.objects.create(
+            session_key="created-before",
+            session_data=sessions[0].encode(data),
+            user=self.author,
+            expire_date=timezone.now() + datetime.timedelta(days=1),
+        )
+        sessions.append(indexed.SessionStore("created-before"))
+        self.assertEqual(data, sessions[-1].load())
+
+        sessions[1].flush()
+        self.assertEqual(
+            {session.session_key for session in sessions[:1] + sessions[2:]},
+            {key.decode() for key in index.redis.smembers(index.key)},
+        )
+
+        with self.assertNumQueries(1):
+            flush_all_sessions(self.author, keep=sessions[0].session_key)
+
+        self.assertEqual([sessions[0].session_key], list(PairedSession.objects.values_list("session_key", flat=True)))
+        self.assertEqual(data, indexed.SessionStore(sessions[0].session_key).load())
+
+        for session in sessions[2:]:
+            self.assertEqual({}, indexed.SessionStore(session.session_key).load())
+
+
+@override_settings(STORAGES={"default": {"BACKEND": "django.core.files.storage.InMemoryStorage"}})
+class BackUpModelTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Author.objects.create(username=settings.GENERIC_SUPERUSER_USERNAME, email="gsu", is_active=True)
+        cls.author = Author.objects.create(username="user", email="0", is_novice=False)
+        topic = Topic.objects.create_topic("zeki müren")
+
+        for content in ("first", 'with "quotes"', "ünicode"):
+            Entry.objects.create(topic=topic, author=cls.author, content=content)
+
+        Entry.objects.create(topic=topic, author=cls.author, content="draft", is_draft=True)
+        ConversationArchive.objects.create(holder=cls.author, target='some "one"', messages='[{"body": "hey"}]')
+
+    def setUp(self):
+        cache.clear()  # Generic superuser is cached.
+
+    def expected(self):
+        entries = self.author.entry_set(manager="objects_published").select_related("topic")
+        fields = ("topic__title", "content", "date_created", "date_edited")
+        return {
+            "entries": json.loads(ArchiveSerializer().serialize(entries, fields=fields)),
+            "conversations": [{"target": 'some "one"', "messages": [{"body": "hey"}]}],
+        }
+
+    def test_process(self):
+        backup = BackUp.objects.create(author=self.author)
+        backup.process()
+        self.assertTrue(backup.is_ready)
+        self.assertTrue(backup.file.name.endswith(".json"))
+
+        with backup.file.open("rb") as file:
+            self.assertEqual(self.expected(), json.loads(file.read()))
+
+    @mock.patch.object(settings, "COMPRESS_BACKUPS", True)
+    def test_process_compressed(self):
+        backup = BackUp.objects.create(author=self.author)
+        backup.process()
+        self.assertTrue(backup.file.name.endswith(".json.gz"))
+
+        with backup.file.open("rb") as file:
+            self.assertEqual(self.expected(), json.loads(gzip.decompress(file.read())))
+
+
 class MementoModelTests(TransactionTestCase):
     @classmethod
     def setUp(cls):
@@ -382,6 +514,47 @@ class MessageModelTests(TestCase):
         some_message.mark_read()
         self.assertIsNotNone(some_message.read_at)
 
+    def test_bulk_compose(self):
+        pref = Author.MessagePref
+        recipients = [
+            Author.objects.create(username="open", email="3", is_active=True),
+            Author.objects.create(username="inactive", email="4"),
+            Author.objects.create(username="disabled", email="5", is_active=True, message_preference=pref.DISABLED),
+            Author.objects.create(
+                username="following", email="6", is_active=True, message_preference=pref.FOLLOWING_ONLY
+            ),
+            Author.objects.create(
+                username="followed", email="7", is_active=True, message_preference=pref.FOLLOWING_ONLY
+            ),
+            Author.objects.create(username="blocker", email="8", is_active=True),
+            Author.objects.create(username="blocked", email="9", is_active=True),
+            self.author_1,
+        ]
+        recipients[4].following.add(self.author_1)
+        recipients[5].blocked.add(self.author_1)
+        self.author_1.blocked.add(recipients[6])
+
+        self.assertEqual(["open", "followed"], [r.username for r in recipients if self.author_1.can_send_message(r)])
+
+        # Following and blocked pairs, savepoint, messages, conversations (insert & select), links, conversation
+        # columns, savepoint release.
+        for sender, queries in ((self.author_1, 9), (self.generic_superuser, 7)):
+            expected = [recipient for recipient in recipients if sender.can_send_message(recipient)]
+
+            with self.assertNumQueries(queries):
+                sent = Message.objects.bulk_compose((sender, recipient, "Hey") for recipient in recipients)
+
+            self.assertEqual(expected, [message.recipient for message in sent])
+
+            for message in sent:
+                self.assertEqual("hey", message.body)
+                self.assertIn(message, Conversation.objects.get(holder=sender, target=message.recipient).messages.all())
+                self.assertIn(message, Conversation.objects.get(holder=message.recipient, target=sender).messages.all())
+
+        received = Conversation.objects.get(holder=recipients[0], target=self.author_1)
+        self.assertEqual(1, received.unread_count)
+        self.assertEqual(received.last_message, received.latest_message)
+
 
 class ConversationModelTests(TestCase):
     @classmethod
@@ -436,6 +609,48 @@ class ConversationModelTests(TestCase):
         self.assertEqual(some_other_msg, current_conversation_1_2.last_message)
         self.assertEqual(some_other_msg, current_conversation_2_1.last_message)
 
+    def test_summary_columns(self):
+        def summary(holder, target):
+            conversation = Conversation.objects.get(holder=holder, target=target)
+            return conversation.latest_message, conversation.last_message_at, conversation.unread_count
+
+        first = Message.objects.compose(self.author_1, self.author_2, "first")
+        second = Message.objects.compose(self.author_1, self.author_2, "second")
+        reply = Message.objects.compose(self.author_2, self.author_1, "reply")
+
+        self.assertEqual((reply, reply.sent_at, 1), summary(self.author_1, self.author_2))
+        self.assertEqual((reply, reply.sent_at, 2), summary(self.author_2, self.author_1))
+
+        first.mark_read()
+        self.assertEqual(1, summary(self.author_2, self.author_1)[2])
+
+        conversation = Conversation.objects.get(holder=self.author_2, target=self.author_1)
+        conversation.mark_read()
+        self.assertEqual(0, conversation.unread_count)
+        self.assertEqual(0, summary(self.author_2, self.author_1)[2])
+        self.assertIsNotNone(Message.objects.get(pk=second.pk).read_at)
+
+        # Deleting a message for one side only
+        conversation.messages.remove(reply)
+        self.assertEqual((second, second.sent_at, 0), summary(self.author_2, self.author_1))
+        self.assertEqual((reply, reply.sent_at, 1), summary(self.author_1, self.author_2))
+        self.assertTrue(Message.objects.filter(pk=reply.pk).exists())
+
+        # Orphan messages are deleted
+        Conversation.objects.get(holder=self.author_1, target=self.author_2).messages.remove(reply)
+        self.assertFalse(Message.objects.filter(pk=reply.pk).exists())
+        self.assertEqual((second, second.sent_at, 0), summary(self.author_1, self.author_2))
+
+        self.assertEqual(0, self.author_1.unread_message_count)
+        again = Message.objects.compose(self.author_2, self.author_1, "again")
+        self.assertEqual(1, Author.objects.get(pk=self.author_1.pk).unread_message_count)
+
+        # Concurrent deliveries recorded out of order don't replace the last message with an earlier one.
+        conversations = {(c.holder_id, c.target_id): c.pk for c in Conversation.objects.all()}
+        Conversation.objects.record([first], conversations)
+        self.assertEqual((again, again.sent_at, 1), summary(self.author_1, self.author_2))
+        self.assertEqual((again, again.sent_at, 1), summary(self.author_2, self.author_1))
+
 
 class TopicModelTest(TransactionTestCase):
     @classmethod
@@ -485,6 +700,66 @@ class TopicModelTest(TransactionTestCase):
         weird_topic = Topic.objects.create_topic("WINTER")
         self.assertEqual("winter", weird_topic.title)
 
+    def test_wishes(self):
+        cache.clear()  # Generic superuser is cached.
+        Author.objects.create(username=settings.GENERIC_SUPERUSER_USERNAME, email="gsu", is_active=True)
+        wishers = [Author.objects.create(username=f"wisher{i}", email=f"w{i}", is_active=True) for i in range(3)]
+
+        for author in [*wishers, self.author]:
+            Wish.objects.create(topic=self.some_topic, author=author)
+
+        Message.objects.compose(wishers[0], Author.objects.get(username=settings.GENERIC_SUPERUSER_USERNAME), "hey")
+
+        with mock.patch("dictionary.tasks.fulfill_wishes.delay") as delay:
+            Entry.objects.create(topic=self.some_topic, author=self.author, is_draft=True)
+            delay.assert_not_called()
+            entry = Entry.objects.create(topic=self.some_topic, author=self.author)
+            delay.assert_called_once_with(self.some_topic.pk, entry.pk)
+
+        fulfill_wishes(self.some_topic.pk, entry.pk)
+        self.assertFalse(Wish.objects.exists())
+
+        for wisher in wishers:
+            conversation = Conversation.objects.get(holder=wisher)
+            self.assertEqual(f"(see: #{entry.pk})", conversation.last_message.body[-len(f"(see: #{entry.pk})") :])
+
+        self.assertEqual(2, Conversation.objects.get(holder=wishers[0]).messages.count())
+        self.assertEqual(6, Conversation.objects.count())
+        self.assertFalse(Conversation.objects.filter(holder=self.author).exists())  # Self fulfillment.
+
+    def test_mirrors(self):
+        topics = [self.some_topic, *(Topic.objects.create_topic(f"zeki müren {i}") for i in range(1, 6))]
+
+        def groups():
+            return sorted(
+                sorted(topic.title[-1] for topic in group.topics.all()) for group in MirrorGroup.objects.all()
+            )
+
+        self.assertFalse(self.some_topic.mirrors.exists())
+        topics[1].add_mirrors(topics[2:4])
+        topics[4].add_mirrors([topics[5]])
+        self.assertEqual([["1", "2", "3"], ["4", "5"]], groups())
+
+        # Merging groups takes a constant number of queries: transaction, new group, groups to merge, update, delete.
+        with self.assertNumQueries(6):
+            topics[0].add_mirrors([topics[1], topics[4]])
+
+        self.assertEqual([["1", "2", "3", "4", "5", "n"]], groups())
+        self.assertEqual(set(topics[1:]), set(topics[0].mirrors))
+
+        topics[3].refresh_from_db()
+        topics[3].remove_mirrors([topics[0]])
+        topics[0].refresh_from_db()
+        self.assertIsNone(topics[0].mirror_group)
+        self.assertEqual({topics[1], topics[2], topics[4], topics[5]}, set(topics[3].mirrors))
+
+        topics[1].refresh_from_db()
+        topics[1].set_mirrors([topics[2]])
+        self.assertEqual([["1", "2"]], groups())
+        topics[2].refresh_from_db()
+        topics[2].remove_mirrors([topics[1]])
+        self.assertFalse(MirrorGroup.objects.exists())
+
     def test_absolute_url(self):
         absolute_url = reverse("topic", kwargs={"slug": self.some_topic.slug})
         self.assertEqual(absolute_url, self.some_topic.get_absolute_url())
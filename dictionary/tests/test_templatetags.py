@@ -0,0 +1,41 @@
+import json
+from pathlib import Path
+
+from django.test import SimpleTestCase
+from django.utils import translation
+
+from dictionary.templatetags.filters import formatted
+from dictionary.utils import smart_lower
+
+
+class FormattedFilterTest(SimpleTestCase):
+    """
+    Golden outputs (data/formatted.json) were recorded from the former
+    implementation of 'formatted', which applied each rule as a separate
+    re.sub over the whole text. Only exception is '(search: `x`)', which used
+    to yield nested anchors as the keywords were formatted as a reference first.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.golden = json.loads((Path(__file__).parent / "data" / "formatted.json").read_text(encoding="utf-8"))
+
+    def test_golden(self):
+        for language, cases in self.golden.items():
+            with translation.override(language):
+                for text, expected in cases:
+                    with self.subTest(language=language, text=text):
+                        self.assertEqual(expected, formatted(text))
+
+
+class SmartLowerTest(SimpleTestCase):
+    def test_smart_lower(self):
+        self.assertEqual("plain text", smart_lower("PLAIN Text"))
+        self.assertEqual("see https://example.com/Path and", smart_lower("SEE https://example.com/Path AND"))
+        self.assertEqual(
+            "[https://example.com/A label] http://b.com/X", smart_lower("[https://example.com/A LABEL] http://b.com/X")
+        )
+
+        with translation.override("tr"):
+            self.assertEqual("ıi", smart_lower("Iİ"))
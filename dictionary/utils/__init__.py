@@ -1,6 +1,7 @@
 import datetime
 import re
 from contextlib import suppress
+from itertools import islice
 
 from django.contrib.auth import get_user_model
 from django.http import Http404
@@ -52,18 +53,18 @@ def i18n_lower(value):
     return value.translate(lower_map).lower()
 
 
+RE_URL_SPLIT = re.compile(f"({RE_WEBURL_NC})")
+
+
 def smart_lower(value):
-    url_nc = re.compile(f"({RE_WEBURL_NC})")
+    # Links should not be lowered. Splitting by a capturing group yields links
+    # at odd indices.
+    substrings = RE_URL_SPLIT.split(value)
 
-    # Links should not be lowered
-    if url_nc.search(value):
-        substrings = url_nc.split(value)
-        for idx, substr in enumerate(substrings):
-            if not url_nc.match(substr):
-                substrings[idx] = i18n_lower(substr)
-        return "".join(substrings)
+    for idx in range(0, len(substrings), 2):
+        substrings[idx] = i18n_lower(substrings[idx])
 
-    return i18n_lower(value)
+    return "".join(substrings)
 
 
 def parse_date_or_none(date_string, delta=None, dayfirst=True, **timedelta_kwargs):
@@ -105,6 +106,18 @@ def time_threshold(**timedelta_kwargs):
     return timezone.now() - datetime.timedelta(**timedelta_kwargs)
 
 
+def batched(iterable, size):
+    """Yield lists of given size from iterable, the last one might be shorter."""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def truncate_hour(date):
+    """Round given aware datetime down to the hour (in UTC)."""
+    return date.astimezone(datetime.timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
 @cached_context
 def get_generic_superuser():
     return get_user_model().objects.get(username=settings.GENERIC_SUPERUSER_USERNAME)
@@ -0,0 +1,164 @@
+import uuid
+from contextlib import suppress
+
+from django.apps import apps
+from django.core.cache import cache
+from django.db.models import Q
+
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+
+from dictionary.conf import settings
+from dictionary.utils import batched, i18n_lower
+
+
+class TopicCompletion:
+    """
+    Prefix index of the titles of published and uncensored topics, for
+    autocompletion. Titles are kept in a Redis sorted set in which every
+    member has the same score, so that ZRANGEBYLEX yields the titles starting
+    with a prefix in alphabetical order. See REDIS_AUTOCOMPLETE.
+
+    Titles are added as their topics get published and re-checked when their
+    topics change. The set is rebuilt at least once in every 'freshness'
+    seconds, which drops the titles of deleted topics.
+    """
+
+    prefix = "autocomplete"
+    freshness = 86400  # seconds
+
+    def __init__(self):
+        self.redis = get_redis_connection("default")
+        self.key = f"{self.prefix}:topics"
+
+    @staticmethod
+    def published():
+        return apps.get_model("dictionary.Topic").objects.filter(activity__entry_count__gt=0, is_censored=False)
+
+    def register(self, topic):
+        if not topic.is_censored:
+            self.redis.zadd(self.key, {topic.title: 0})
+
+    def discard(self, *titles):
+        if titles:
+            self.redis.zrem(self.key, *titles)
+
+    def refresh(self, topic_ids):
+        """Re-check the titles of given topics."""
+        topics = dict(apps.get_model("dictionary.Topic").objects.filter(pk__in=topic_ids).values_list("pk", "title"))
+
+        if not topics:
+            return
+
+        published = self.published().filter(pk__in=topics).values_list("title", flat=True)
+        pipe = self.redis.pipeline()
+        pipe.zrem(self.key, *topics.values())
+
+        if titles := dict.fromkeys(published, 0):
+            pipe.zadd(self.key, titles)
+
+        pipe.execute()
+
+    def rebuild(self):
+        """Rebuild the set from scratch. Completions are served from the old set in the meantime."""
+        temporary = f"{self.prefix}:topics:{uuid.uuid4().hex}"
+        titles = self.published().order_by().values_list("title", flat=True).iterator(chunk_size=10000)
+
+        try:
+            for batch in batched(titles, 10000):
+                self.redis.zadd(temporary, dict.fromkeys(batch, 0))
+
+            pipe = self.redis.pipeline()
+
+            if self.redis.exists(temporary):
+                pipe.rename(temporary, self.key)
+            else:
+                pipe.delete(self.key)
+
+            pipe.set(f"{self.prefix}:fresh", 1, ex=self.freshness)
+            pipe.execute()
+        finally:
+            self.redis.delete(temporary)
+
+    def complete(self, prefix, limit):
+        """
+        Return the titles starting with given (lowercase) prefix, in
+        alphabetical order. Return None if the set is stale and someone else
+        is already rebuilding it.
+        """
+
+        if not self.redis.exists(f"{self.prefix}:fresh"):
+            if not self.redis.set(f"{self.prefix}:rebuilding", 1, nx=True, ex=60):
+                return None
+
+            try:
+                self.rebuild()
+            finally:
+                self.redis.delete(f"{self.prefix}:rebuilding")
+
+        prefix = prefix.encode()
+        titles = self.redis.zrangebylex(self.key, b"[" + prefix, b"(" + prefix + b"\xff", start=0, num=limit)
+        return [title.decode() for title in titles]
+
+
+def complete_topics(lookup, limit):
+    """
+    Return the titles of published and uncensored topics that start with
+    given lookup, followed by the ones that contain it. Infix matches are
+    served by a trigram index, which needs at least 3 characters.
+    """
+    lookup = i18n_lower(lookup)
+    titles = None
+
+    if settings.REDIS_AUTOCOMPLETE:
+        with suppress(RedisError):
+            titles = TopicCompletion().complete(lookup, limit)
+
+    published = TopicCompletion.published()
+
+    if titles is None:
+        titles = list(
+            published.filter(title__startswith=lookup).order_by("title").values_list("title", flat=True)[:limit]
+        )
+
+    if len(titles) < limit and len(lookup) >= 3:
+        infix = published.filter(title__contains=lookup).exclude(title__startswith=lookup)
+        titles += infix.values_list("title", flat=True)[: limit - len(titles)]
+
+    return titles
+
+
+def blocked_ids(user):
+    """Return the ids of the authors that given user blocked or is blocked by."""
+
+    def query():
+        through = apps.get_model("dictionary.Author").blocked.through
+        pairs = through.objects.filter(Q(from_author=user) | Q(to_author=user)).values_list(
+            "from_author_id", "to_author_id"
+        )
+        return frozenset(pk for pair in pairs for pk in pair) - {user.pk}
+
+    return cache.get_or_set(f"blocked_ids_{user.pk}", query, 86400)
+
+
+def invalidate_blocked_ids(*user_ids):
+    """Call this when the blockages of given users change."""
+    cache.delete_many([f"blocked_ids_{pk}" for pk in user_ids])
+
+
+def complete_authors(user, lookup, limit):
+    """
+    Return accessible authors whose nickname starts with given lookup.
+    Authors blocked by (or blocking) given user are excluded by their cached
+    ids, so that no more than 'limit' rows are read.
+    """
+    authors = (
+        apps.get_model("dictionary.Author")
+        .objects_accessible.filter(username__istartswith=lookup)
+        .only("username", "slug", "is_novice")
+    )
+
+    if user.is_authenticated and (excluded := blocked_ids(user)):
+        authors = authors.exclude(pk__in=excluded)
+
+    return list(authors[:limit])
@@ -5,6 +5,7 @@ from urllib.parse import parse_qsl, quote, unquote
 
 from django.core.exceptions import PermissionDenied
 from django.http import Http404
+from django.template.loader import render_to_string
 from django.utils.functional import LazyObject, cached_property
 from django.utils.translation import gettext as _
 
@@ -33,7 +34,9 @@ class LeftFrameProcessor:
         self.user = request.user
         self.cookies = request.COOKIES
         self.response = response
+        self.theme = getattr(request, "theme", None)
         self.context = self._get_context
+        self.html = self._get_html
 
     def get_cookie(self, key):
         value = self.cookies.get(key)
@@ -99,20 +102,35 @@ class LeftFrameProcessor:
                 self.delete_cookie("lfea")
         return {}
 
-    def _get_context(self, manager=None, attempt=1):
+    @cached_property
+    def _frame(self):
+        return self._get_frame()
+
+    def _get_frame(self, manager=None, attempt=1):
         if attempt > 3:
-            return {"safename": _("something went wrong. try reloading the page.")}
+            return None
 
         try:
             handler = manager or TopicListManager(
                 self.slug, self.user, self._year, self._search_keys, self._tab, self._exclusions, self._extra
             )
-            context = LeftFrame(handler, page=self._page).as_context()
         except (Http404, PermissionDenied):
             self.set_cookie("lfac", settings.DEFAULT_CATEGORY)
-            return self._get_context(manager=TopicListManager(settings.DEFAULT_CATEGORY), attempt=attempt + 1)
+            return self._get_frame(manager=TopicListManager(settings.DEFAULT_CATEGORY), attempt=attempt + 1)
+
+        return LeftFrame(handler, page=self._page)
+
+    def _get_context(self):
+        if self._frame is None:
+            return {"safename": _("something went wrong. try reloading the page.")}
+
+        return self._frame.as_context()
+
+    def _get_html(self):
+        if self._frame is None:
+            return render_to_string("dictionary/includes/left_frame_content.html", {"lf": self._get_context()})
 
-        return context
+        return self._frame.as_html(self.theme)
 
 
 def left_frame_fallback(request):
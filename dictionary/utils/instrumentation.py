@@ -0,0 +1,192 @@
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+from functools import wraps
+
+from django.core.cache import caches
+from django.db import connections
+from django.template.backends.django import Template
+
+from django_redis import get_redis_connection
+
+_recorder = ContextVar("instrumentation_recorder", default=None)
+
+
+class Recorder:
+    """
+    Collects the SQL, cache and template metrics of a request, see
+    INSTRUMENTATION. Nested cache calls and template renders (e.g. get_many
+    implemented with get, templates rendered within templates) are counted
+    once, by their outermost call.
+    """
+
+    fields = ("queries", "sql", "cache_gets", "cache_hits", "cache_sets", "cache", "template", "total")
+    """Metrics, durations (sql, cache, template and total) are in milliseconds."""
+
+    def __init__(self):
+        self.metrics = dict.fromkeys(self.fields, 0)
+        self.busy = set()
+        self._stack = ExitStack()
+        self._start = None
+
+    def __enter__(self):
+        self._token = _recorder.set(self)
+
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self._execute))
+
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics["total"] = (time.perf_counter() - self._start) * 1000
+        self._stack.close()
+        _recorder.reset(self._token)
+
+    def _execute(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.metrics["queries"] += 1
+            self.metrics["sql"] += (time.perf_counter() - start) * 1000
+
+    def server_timing(self):
+        """Return the value of Server-Timing header."""
+        m = self.metrics
+        return ", ".join(
+            (
+                f'sql;dur={m["sql"]:.1f};desc="{m["queries"]} queries"',
+                f'cache;dur={m["cache"]:.1f};desc="{m["cache_gets"]} gets, {m["cache_hits"]} hits,'
+                f' {m["cache_sets"]} sets"',
+                f"template;dur={m['template']:.1f}",
+                f"total;dur={m['total']:.1f}",
+            )
+        )
+
+
+def _timed(func, metric, count=None):
+    """Wrap func so that its calls (made while recording a request) are timed and counted."""
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        recorder = _recorder.get()
+
+        if recorder is None or metric in recorder.busy:
+            return func(*args, **kwargs)
+
+        recorder.busy.add(metric)
+        start = time.perf_counter()
+
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            recorder.busy.discard(metric)
+            recorder.metrics[metric] += (time.perf_counter() - start) * 1000
+
+        if count is not None:
+            count(recorder.metrics, result, *args, **kwargs)
+
+        return result
+
+    wrapper.instrumented = True
+    return wrapper
+
+
+def _count_get(metrics, result, _cache, _key, default=None, *args, **kwargs):
+    metrics["cache_gets"] += 1
+    metrics["cache_hits"] += result is not default
+
+
+def _count_get_many(metrics, result, _cache, keys, *args, **kwargs):
+    metrics["cache_gets"] += len(keys)
+    metrics["cache_hits"] += len(result)
+
+
+def _count_set(metrics, _result, *args, **kwargs):
+    metrics["cache_sets"] += 1
+
+
+def _count_set_many(metrics, _result, _cache, data, *args, **kwargs):
+    metrics["cache_sets"] += len(data)
+
+
+def install():
+    """Wrap the methods of cache backends and Django templates, so that their calls can be recorded."""
+    targets = {
+        type(caches[alias]): {
+            "get": _count_get,
+            "get_many": _count_get_many,
+            "set": _count_set,
+            "add": _count_set,
+            "set_many": _count_set_many,
+        }
+        for alias in caches.settings
+    }
+    targets[Template] = {"render": None}
+
+    for cls, methods in targets.items():
+        for name, count in methods.items():
+            method = getattr(cls, name)
+
+            if not getattr(method, "instrumented", False):
+                setattr(cls, name, _timed(method, "template" if cls is Template else "cache", count))
+
+
+class ViewStatistics:
+    """
+    Per-view sums of the metrics of the requests, kept in Redis hashes so
+    that the statistics of all processes are gathered in one place.
+    """
+
+    prefix = "instrumentation"
+
+    def __init__(self):
+        self.redis = get_redis_connection("default")
+
+    def add(self, view, metrics):
+        pipe = self.redis.pipeline()
+        pipe.sadd(f"{self.prefix}:views", view)
+        pipe.hincrby(f"{self.prefix}:{view}", "requests", 1)
+
+        for field, value in metrics.items():
+            if isinstance(value, int):
+                pipe.hincrby(f"{self.prefix}:{view}", field, value)
+            else:
+                pipe.hincrbyfloat(f"{self.prefix}:{view}", field, value)
+
+        pipe.execute()
+
+    def averages(self):
+        """Return the average metrics per request of each view, slowest views first."""
+        views = sorted(view.decode() for view in self.redis.smembers(f"{self.prefix}:views"))
+        pipe = self.redis.pipeline()
+
+        for view in views:
+            pipe.hgetall(f"{self.prefix}:{view}")
+
+        rows = []
+
+        for view, sums in zip(views, pipe.execute()):
+            requests = int(sums.get(b"requests", 0))
+
+            if not requests:
+                continue
+
+            averages = {field: float(sums.get(field.encode(), 0)) / requests for field in Recorder.fields}
+            gets = averages["cache_gets"]
+            rows.append(
+                {
+                    "view": view,
+                    "requests": requests,
+                    "cache_hit_ratio": averages["cache_hits"] / gets if gets else None,
+                    **averages,
+                }
+            )
+
+        return sorted(rows, key=lambda row: row["total"], reverse=True)
+
+    def reset(self):
+        views = self.redis.smembers(f"{self.prefix}:views")
+        self.redis.delete(f"{self.prefix}:views", *(f"{self.prefix}:{view.decode()}" for view in views))
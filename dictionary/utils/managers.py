@@ -1,13 +1,17 @@
 import hashlib
+import math
+import random
+import time
+from contextlib import suppress
 from decimal import Decimal
 from functools import wraps
 from typing import List, Union
 
 from django.contrib.auth.models import AnonymousUser
+from django.contrib.postgres.search import SearchRank
 from django.core.cache import cache
 from django.core.exceptions import PermissionDenied
-from django.db import connection
-from django.db.models import CharField, Count, Exists, F, Max, OuterRef, Prefetch, Q, Subquery, Value
+from django.db.models import CharField, Count, Exists, F, Max, OuterRef, Prefetch, Q, Subquery, Sum, Value
 from django.db.models.functions import Coalesce, Concat, Greatest
 from django.http import Http404
 from django.shortcuts import get_object_or_404
@@ -15,11 +19,115 @@ from django.utils import timezone
 from django.utils.translation import gettext as _
 
 from dateutil.relativedelta import relativedelta
+from redis.exceptions import RedisError
 
 from dictionary.conf import settings
-from dictionary.models import Author, Category, Comment, DownvotedEntries, Entry, EntryFavorites, Topic, UpvotedEntries
-from dictionary.utils import parse_date_or_none, time_threshold
+from dictionary.models import (
+    Author,
+    Category,
+    Comment,
+    DownvotedEntries,
+    Entry,
+    FollowupMarker,
+    Topic,
+    TopicActivityBucket,
+    UpvotedEntries,
+)
+from dictionary.utils import parse_date_or_none, time_threshold, truncate_hour
+from dictionary.utils.db import SubQueryCount
 from dictionary.utils.decorators import for_public_methods
+from dictionary.utils.ranking import PopularRanking
+from dictionary.utils.search import search_query
+
+
+class TopicRollupQueryHandler:
+    """
+    Counterparts of TopicQueryHandler methods that make use of topic activity
+    rollup instead of aggregating over entries. See TOPIC_LIST_ROLLUP setting.
+    """
+
+    values = ("title", "slug")
+
+    @staticmethod
+    def counter(hours, novice=False):
+        """Count entries (from hourly buckets) that were written in given hours."""
+        threshold = truncate_hour(time_threshold(hours=hours))
+        buckets = (
+            TopicActivityBucket.objects.filter(topic=OuterRef("pk"), hour__gte=threshold)
+            .order_by()
+            .values("topic")
+            .annotate(count=Sum("novice_entry_count" if novice else "entry_count"))
+            .values("count")
+        )
+        return Coalesce(Subquery(buckets), 0)
+
+    def recent(self, novice=False):
+        """Topics with entries in last 24 hours."""
+        latest = "activity__last_novice_entry_at" if novice else "activity__last_entry_at"
+        return (
+            Topic.objects.values(*self.values)
+            .filter(**{f"{latest}__gte": time_threshold(hours=24)}, is_censored=False)
+            .annotate(latest=F(latest), count=self.counter(24, novice=novice))
+        )
+
+    def today(self, user):
+        through = Topic.category.through.objects.filter(topic=OuterRef("pk"))
+        categories = Exists(through.filter(category__in=user.following_categories.all()))
+
+        if user.allow_uncategorized:
+            categories |= ~Exists(through)
+
+        return self.recent().filter(categories).exclude(created_by__in=user.blocked.all()).order_by("-latest")
+
+    def popular(self, exclusions):
+        return (
+            Topic.objects.values(*self.values)
+            .filter(
+                Q(activity__last_entry_at__gte=time_threshold(hours=24))
+                | Q(is_pinned=True, activity__last_entry_at__isnull=False),
+                is_censored=False,
+            )
+            .annotate(count=self.counter(24))
+            .filter(Q(count__gte=10) | Q(is_pinned=True))
+            .exclude(category__slug__in=exclusions)
+            .alias(q1=self.counter(3), q2=self.counter(6), q3=self.counter(12), latest=F("activity__last_entry_at"))
+            .order_by("-is_pinned", "-q1", "-q2", "-q3", "-count", "-latest")
+        )
+
+    def novices(self):
+        return self.recent(novice=True).order_by("-latest")
+
+    def generic_category(self, category):
+        return self.recent().filter(category=category).order_by("-latest")
+
+    def uncategorized(self):
+        return self.recent().filter(category=None).order_by("-latest")
+
+
+def ranking_compatible(method):
+    """Serve the list from PopularRanking, if REDIS_POPULAR_RANKING is set. Fall back to given method otherwise."""
+
+    @wraps(method)
+    def wrapped(self, *args, **kwargs):
+        if settings.REDIS_POPULAR_RANKING:
+            with suppress(RedisError):
+                if (data := PopularRanking().popular(*args, **kwargs)) is not None:
+                    return data
+        return method(self, *args, **kwargs)
+
+    return wrapped
+
+
+def rollup_compatible(method):
+    """Delegate the query to TopicRollupQueryHandler, if TOPIC_LIST_ROLLUP is set."""
+
+    @wraps(method)
+    def wrapped(self, *args, **kwargs):
+        if settings.TOPIC_LIST_ROLLUP:
+            return getattr(TopicRollupQueryHandler(), method.__name__)(*args, **kwargs)
+        return method(self, *args, **kwargs)
+
+    return wrapped
 
 
 class TopicQueryHandler:
@@ -41,6 +149,7 @@ class TopicQueryHandler:
     # Queryset values
     values = ("title", "slug")
 
+    @rollup_compatible
     def today(self, user):
         categories = Q(category__in=user.following_categories.all())
 
@@ -69,6 +178,8 @@ class TopicQueryHandler:
             .order_by("-count")
         )
 
+    @ranking_compatible
+    @rollup_compatible
     def popular(self, exclusions):
         def counter(hours):
             return Count("entries", filter=Q(entries__date_created__gte=time_threshold(hours=hours)))
@@ -153,92 +264,34 @@ class TopicQueryHandler:
 
     def followups(self, user):
         """
-        Author: Emre Tuna (https://github.com/emretuna01) <emretuna@outlook.com>
+        List topics on condition that the user has entries in (written in last
+        5 days), along with count of entries that were written after the user's
+        latest entry on that topic. See FollowupMarker.
+        """
 
-        todo: If you can convert this to native orm or create a queryset that will result in same data, please do.
-        Update: An ORM implementation was made, but it was too slow compared to
-        this solution. See: https://gist.github.com/realsuayip/9d2c5365cbe6e43d1fe282a556d0f6d5
+        newer = Q(topic__activity__last_entry_id__gt=F("last_entry_id"))
 
-        I tried to make the sql easy-to-read, but failed as there were many
-        aliases that I couldn't find meaningful names. They are named arbitrarily,
-        if you think you can make it more readable, please do.
+        if user.is_novice:
+            newer |= Q(topic__activity__last_novice_entry_id__gt=F("last_entry_id"))
 
-        Query Description: List topics on condition that the user has entries in
-        (written in last 24 hours), along with count of entries that were
-        written after the user's latest entry on that topic.
-        """
+        new_entries = (
+            Entry.objects_published.filter(topic=OuterRef("topic"), pk__gt=OuterRef("last_entry_id"))
+            .exclude(author__in=user.blocked.all())
+            .only("id")
+        )
 
-        pk = user.pk
-        threshold = time_threshold(hours=120)  # in 5 days
-
-        with connection.cursor() as cursor:
-            cursor.execute(
-                """
-            select
-              s.title,
-              s.slug,
-              s.count
-            from
-              (
-                select
-                  tt.title,
-                  tt.slug,
-                  e.count,
-                  e.max_id
-                from
-                  (
-                    select
-                      z.topic_id,
-                      count(
-                        case
-                        when z.id > k.max_id
-                        and not z.is_draft
-                        and z.author_id not in (
-                          select to_author_id
-                          from dictionary_author_blocked
-                          where from_author_id = k.sender_id
-                        )
-                        and case
-                            when not k.sender_is_novice then
-                            not (select is_novice from dictionary_author where id = z.author_id)
-                            else true end
-                        then z.id end
-                      ) as count,
-                      k.max_id
-                    from
-                      dictionary_entry z
-                      inner join (
-                        select
-                          topic_id,
-                          max(de.id) as max_id,
-                          de.author_id as sender_id,
-                          (select is_novice from dictionary_author where id = de.author_id) as sender_is_novice
-                        from
-                          dictionary_entry de
-                        where
-                          de.date_created >= %s
-                          and de.author_id = %s
-                        group by
-                          author_id,
-                          topic_id
-                      ) k on k.topic_id = z.topic_id
-                    group by
-                      z.topic_id,
-                      k.max_id
-                  ) e
-                  inner join dictionary_topic tt on tt.id = e.topic_id
-              ) s
-            where
-              s.count > 0
-            order by
-              s.max_id desc
-            """,
-                [threshold, pk],
-            )
+        if not user.is_novice:
+            new_entries = new_entries.filter(author__is_novice=False)
 
-            columns = [col[0] for col in cursor.description]
-            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        return (
+            FollowupMarker.objects.filter(newer, author=user, last_entry_at__gte=time_threshold(hours=120))
+            .annotate(title=F("topic__title"), slug=F("topic__slug"), count=SubQueryCount(new_entries))
+            .filter(count__gt=0)
+            .order_by("-last_entry_id")
+            .values("title", "slug", "count")
+        )
 
+    @rollup_compatible
     def novices(self):
         return (
             Topic.objects.values(*self.values)
@@ -266,7 +319,7 @@ class TopicQueryHandler:
         from_date = parse_date_or_none(from_date, dayfirst=False)
         to_date = parse_date_or_none(to_date, dayfirst=False)
 
-        if ordering not in ("alpha", "newer", "popular"):
+        if ordering not in ("alpha", "newer", "popular", "relevance"):
             ordering = "newer"
 
         # Provide a default search term if none present
@@ -287,7 +340,7 @@ class TopicQueryHandler:
             filters["entries__author__username"] = author_nick
 
         if keywords:
-            filters["title__search" if connection.vendor == "postgresql" else "title__icontains"] = keywords
+            filters["search_vector"] = search_query(keywords)
 
         if from_date:
             filters["entries__date_created__gte"] = from_date
@@ -295,7 +348,15 @@ class TopicQueryHandler:
         if to_date:
             filters["entries__date_created__lte"] = to_date
 
-        ordering_map = {"alpha": ["title"], "newer": ["-latest"], "popular": ["-count", "-latest"]}
+        if ordering == "relevance" and not keywords:
+            ordering = "newer"
+
+        ordering_map = {
+            "alpha": ["title"],
+            "newer": ["-latest"],
+            "popular": ["-count", "-latest"],
+            "relevance": ["-rank", "-latest"],
+        }
 
         qs = (
             Topic.objects.values(*self.values)
@@ -303,11 +364,15 @@ class TopicQueryHandler:
             .annotate(count=Count("entries", distinct=True))
         )
 
-        if ordering in ("newer", "popular"):
+        if ordering in ("newer", "popular", "relevance"):
             qs = qs.alias(**self.latest)
 
+        if ordering == "relevance":
+            qs = qs.alias(rank=SearchRank(F("search_vector"), filters["search_vector"]))
+
         return qs.order_by(*ordering_map.get(ordering))[: settings.TOPICS_PER_PAGE_DEFAULT]
 
+    @rollup_compatible
     def generic_category(self, category):
         return (
             Topic.objects.values(*self.values)
@@ -316,6 +381,7 @@ class TopicQueryHandler:
             .order_by("-latest")
         )
 
+    @rollup_compatible
     def uncategorized(self):
         return (
             Topic.objects.values(*self.values)
@@ -365,6 +431,15 @@ class TopicListHandler:
     cache_key = None
     cache_set_at = None
 
+    lock_timeout = 10
+    """Seconds after which the lock for recomputing a list is released anyway."""
+
+    lock_wait = 3
+    """Seconds to wait for another worker to compute a list that has no cached value."""
+
+    _lock_acquired = False
+    _computing_since = None
+
     _available_extras = ("user", "channel")
     """Available external extras."""
 
@@ -531,15 +606,58 @@ class TopicListHandler:
             or settings.DISABLE_CATEGORY_CACHING
         )
 
+    @property
+    def _cache_timeout(self):
+        return settings.EXCLUSIVE_TIMEOUTS.get(self.slug, settings.DEFAULT_CACHE_TIMEOUT)
+
     def _cache_data(self, data):
         if self._caching_allowed:
+            delta = time.monotonic() - self._computing_since if self._computing_since is not None else 0
+            self.cache_set_at = timezone.now()
             cache.set(
                 self.cache_key,
-                {"data": data, "set_at": timezone.now()},
-                settings.EXCLUSIVE_TIMEOUTS.get(self.slug, settings.DEFAULT_CACHE_TIMEOUT),
+                {"data": data, "set_at": self.cache_set_at, "delta": delta},
+                self._cache_timeout + settings.CATEGORY_CACHE_GRACE,
             )
+
+            if self._lock_acquired:
+                cache.delete(f"{self.cache_key}_lock")
+                self._lock_acquired = False
+
         return data
 
+    def _acquire_lock(self):
+        """Make sure that only one worker computes the list. Return True if this is the one."""
+        self._lock_acquired = cache.add(f"{self.cache_key}_lock", 1, self.lock_timeout)
+        return self._lock_acquired
+
+    def _wait_for_cache(self):
+        """Wait for the worker holding the lock to cache the list, return cached value (None if it took too long)."""
+        deadline = time.monotonic() + self.lock_wait
+
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+
+            if (cached_data := cache.get(self.cache_key)) is not None and not self._is_outdated(cached_data):
+                return cached_data
+
+        return None
+
+    def _is_outdated(self, cached_data):
+        """Lists of top and today-in-history belong to a day, the ones cached on another day are never served."""
+        return (
+            self.slug in ("top", "today-in-history")
+            and timezone.localtime(cached_data.get("set_at")).day != timezone.localtime(timezone.now()).day
+        )
+
+    def _is_expired(self, cached_data):
+        set_at, now = cached_data.get("set_at"), timezone.now()
+
+        # Probabilistic early expiration: the closer the expiry and the longer the computation takes, the more
+        # likely a worker will recompute the list before it expires, so the workers don't all miss at once.
+        early = cached_data.get("delta", 0) * -math.log(1 - random.random())
+        return (now - set_at).total_seconds() + early >= self._cache_timeout
+
     def _set_cache_key(self):
         private = f"private_uid_{self.user.id}"
         public = "public"
@@ -578,23 +696,29 @@ class TopicListHandler:
         self.cache_key = f"tlq_{scope}_{self.slug}{year}{tab}{search_keys}{exclusions}{extra}"
 
     def _check_cache(self):
+        """
+        Set cache_exists if the cached list can be served. If the list has
+        expired, only one worker gets to compute it (cache_exists stays False),
+        the others are served the stale list until it is recomputed. If there
+        is nothing to serve (including the lists of a previous day, see
+        _is_outdated), the others wait for the worker for a while.
+        """
+
         self._set_cache_key()
         cached_data = cache.get(self.cache_key)
 
+        if cached_data is not None and self._is_outdated(cached_data):
+            cached_data = None
+
         if cached_data is None:
+            if self._acquire_lock() or (cached_data := self._wait_for_cache()) is None:
+                return
+        elif self._is_expired(cached_data) and self._acquire_lock():
             return
 
-        # Cached data detected, check if the day has changed for top or
-        # today-in-history (if not, leave cache_exists False to fetch fresh data).
-        if self.slug in ("top", "today-in-history"):
-            if timezone.localtime(cached_data.get("set_at")).day == timezone.localtime(timezone.now()).day:
-                self.cache_exists = True
-        else:
-            self.cache_exists = True
-
-        if self.cache_exists:
-            self._cached_data = cached_data.get("data")
-            self.cache_set_at = cached_data.get("set_at")
+        self.cache_exists = True
+        self._cached_data = cached_data.get("data")
+        self.cache_set_at = cached_data.get("set_at")
 
     def delete_cache(self, flush=False, delimiter=False):
         """
@@ -620,6 +744,29 @@ class TopicListHandler:
 
         return True
 
+    def _fragment_key(self, name):
+        return f"{self.cache_key}_fragment_{self.cache_set_at.timestamp()}_{name}"
+
+    def cached_fragment(self, name, render):
+        """
+        Return a fragment rendered from the list, e.g. the HTML of the left
+        frame, cached along with the list. Fragment keys include the time the
+        list was cached, so they are invalidated together with the list.
+        :param name: Identifies the fragment, e.g. page number and language.
+        :param render: Called to render the fragment if it is not cached.
+        """
+
+        if self.cache_exists and (fragment := cache.get(self._fragment_key(name))) is not None:
+            return fragment
+
+        fragment = render()
+
+        # Rendering caches the list, if it wasn't cached already.
+        if self._caching_allowed and self.cache_set_at is not None:
+            cache.set(self._fragment_key(name), fragment, self._cache_timeout + settings.CATEGORY_CACHE_GRACE)
+
+        return fragment
+
     @property
     def serialized(self):
         # Serialize topic queryset data, cache it and return it.
@@ -627,6 +774,7 @@ class TopicListHandler:
             return self._cached_data
 
         if self.data is None:
+            self._computing_since = time.monotonic()
             self.data = self._get_data()
 
         # Notice: caching the queryset will evaluate it anyway
@@ -751,6 +899,17 @@ class UserStatsQueryHandler:
         )
 
 
+def vote_state_prefetch(user, *relations):
+    """
+    Prefetch the vote states of the user for given m2m relations of entries (or
+    comments), e.g. "upvoted_by" -> "is_upvoted", in one query per relation.
+    Notice: Vote states are lists, either empty or containing the user.
+    """
+    voters = Author.objects.filter(pk=user.pk).only("id")
+    attrs = {"upvoted_by": "is_upvoted", "downvoted_by": "is_downvoted", "favorited_by": "is_favorited"}
+    return [Prefetch(relation, queryset=voters, to_attr=attrs[relation]) for relation in relations]
+
+
 def entry_prefetch(queryset, user, comments=False):
     """
     Given an entry queryset, optimize it to be shown in templates (entry.html).
@@ -760,6 +919,9 @@ def entry_prefetch(queryset, user, comments=False):
     """
     prefetch = [Prefetch("favorited_by", queryset=Author.objects.only("id"))]
 
+    if user.is_authenticated:
+        prefetch.extend(vote_state_prefetch(user, "upvoted_by", "downvoted_by", "favorited_by"))
+
     if comments:
         comments_qs = (
             Comment.objects.annotate(rating=Count("upvoted_by", distinct=True) - Count("downvoted_by", distinct=True))
@@ -779,20 +941,11 @@ def entry_prefetch(queryset, user, comments=False):
         )
 
         if user.is_authenticated:
-            vote_states = dict(
-                zip(
-                    ("is_upvoted", "is_downvoted"),
-                    (
-                        Exists(model.objects.filter(author=user, comment=OuterRef("pk")))
-                        for model in (Comment.upvoted_by.through, Comment.downvoted_by.through)
-                    ),
-                )
-            )
-            comments_qs = comments_qs.annotate(**vote_states)
+            comments_qs = comments_qs.prefetch_related(*vote_state_prefetch(user, "upvoted_by", "downvoted_by"))
 
         prefetch.append(Prefetch("comments", queryset=comments_qs))
 
-    base = (
+    return (
         queryset.select_related("author", "topic")
         .prefetch_related(*prefetch)
         .only(
@@ -811,18 +964,3 @@ def entry_prefetch(queryset, user, comments=False):
             "topic__slug",
         )
     )
-
-    if user.is_authenticated:
-        vote_states = dict(
-            zip(
-                ("is_upvoted", "is_downvoted", "is_favorited"),
-                (
-                    Exists(model.objects.filter(author=user, entry=OuterRef("pk")))
-                    for model in (UpvotedEntries, DownvotedEntries, EntryFavorites)
-                ),
-            )
-        )
-
-        return base.annotate(**vote_states)
-
-    return base
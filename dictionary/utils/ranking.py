@@ -0,0 +1,149 @@
+import datetime
+import time
+import uuid
+from collections import Counter, defaultdict
+
+from django.apps import apps
+from django.db.models import F, Q
+
+from django_redis import get_redis_connection
+
+
+class PopularRanking:
+    """
+    Ranking engine for 'popular'. Non-novice entry publications are counted in
+    time-bucketed Redis sorted sets (topic id -> entry count), so that the list
+    can be served without aggregating over entries. See REDIS_POPULAR_RANKING.
+
+    Counts are refreshed from the database at least once in every 'freshness'
+    seconds. Windows (3, 6, 12 and 24 hours) are rounded down to the start of
+    their first bucket, so they might include 'bucket_size' seconds more.
+    """
+
+    prefix = "popular"
+    bucket_size = 600  # seconds
+    freshness = 3600  # seconds
+    threshold = 10  # Minimum number of entries in last 24 hours to be listed.
+
+    def __init__(self):
+        self.redis = get_redis_connection("default")
+
+    def _bucket(self, timestamp):
+        return int(timestamp // self.bucket_size)
+
+    def _key(self, bucket):
+        return f"{self.prefix}:{bucket}"
+
+    def _keys(self, hours, now):
+        """Keys of the buckets that cover the last given hours."""
+        return [self._key(bucket) for bucket in range(self._bucket(now - hours * 3600), self._bucket(now) + 1)]
+
+    def _expire_at(self, bucket):
+        return (bucket + 1) * self.bucket_size + 86400
+
+    def register_entry(self, entry):
+        bucket = self._bucket(entry.date_created.timestamp())
+        pipe = self.redis.pipeline()
+        pipe.zincrby(self._key(bucket), 1, entry.topic_id)
+        pipe.expireat(self._key(bucket), self._expire_at(bucket))
+        pipe.execute()
+
+    def refresh(self, topic_ids):
+        """Recount the entries of given topics."""
+        topic_ids = list(set(topic_ids))
+
+        if not topic_ids:
+            return
+
+        now = time.time()
+        pipe = self.redis.pipeline()
+
+        for key in self._keys(24, now):
+            pipe.zrem(key, *topic_ids)
+
+        self._populate(pipe, now, topic_ids)
+        pipe.execute()
+
+    def rebuild(self):
+        """Recount the entries of all topics."""
+        now = time.time()
+        pipe = self.redis.pipeline()
+        pipe.delete(*self._keys(24, now))
+        self._populate(pipe, now)
+        pipe.set(f"{self.prefix}:fresh", 1, ex=self.freshness)
+        pipe.execute()
+
+    def _populate(self, pipe, now, topic_ids=None):
+        since = datetime.datetime.fromtimestamp(self._bucket(now - 86400) * self.bucket_size, tz=datetime.timezone.utc)
+        entries = apps.get_model("dictionary.Entry").objects.filter(date_created__gte=since)
+
+        if topic_ids is not None:
+            entries = entries.filter(topic_id__in=topic_ids)
+
+        buckets = defaultdict(Counter)
+
+        for topic_id, date_created in entries.order_by().values_list("topic_id", "date_created").iterator():
+            buckets[self._bucket(date_created.timestamp())][topic_id] += 1
+
+        for bucket, counts in buckets.items():
+            pipe.zadd(self._key(bucket), counts)
+            pipe.expireat(self._key(bucket), self._expire_at(bucket))
+
+    def popular(self, exclusions):
+        """
+        Return the data of 'popular' in TopicQueryHandler format, ordered the
+        same. Return None if the counts are stale and someone else is already
+        refreshing them.
+        """
+
+        if not self.redis.exists(f"{self.prefix}:fresh"):
+            if not self.redis.set(f"{self.prefix}:rebuilding", 1, nx=True, ex=60):
+                return None
+
+            try:
+                self.rebuild()
+            finally:
+                self.redis.delete(f"{self.prefix}:rebuilding")
+
+        now = time.time()
+        windows = {hours: f"{self.prefix}:window:{uuid.uuid4().hex}" for hours in (3, 6, 12, 24)}
+        pipe = self.redis.pipeline()
+
+        for hours, key in windows.items():
+            pipe.zunionstore(key, self._keys(hours, now))
+            pipe.expire(key, 60)
+
+        pipe.zrangebyscore(windows[24], self.threshold, "+inf")
+        candidates = pipe.execute()[-1]
+
+        topics = list(
+            apps.get_model("dictionary.Topic")
+            .objects.filter(
+                Q(pk__in=[int(pk) for pk in candidates]) | Q(is_pinned=True),
+                activity__last_entry_at__isnull=False,
+                is_censored=False,
+            )
+            .exclude(category__slug__in=exclusions)
+            .values("pk", "title", "slug", "is_pinned", latest=F("activity__last_entry_at"))
+        )
+
+        if not topics:
+            self.redis.delete(*windows.values())
+            return []
+
+        pks = [topic["pk"] for topic in topics]
+        pipe = self.redis.pipeline()
+
+        for key in windows.values():
+            pipe.zmscore(key, pks)
+
+        pipe.delete(*windows.values())
+        *scores, _ = pipe.execute()
+        counts = [[int(score or 0) for score in window] for window in scores]
+
+        ranking = sorted(
+            zip(topics, *counts),
+            key=lambda row: (row[0]["is_pinned"], *row[1:], row[0]["latest"]),
+            reverse=True,
+        )
+        return [{"title": topic["title"], "slug": topic["slug"], "count": count} for topic, *_, count in ranking]
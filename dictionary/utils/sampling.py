@@ -0,0 +1,117 @@
+import random
+import uuid
+from contextlib import suppress
+
+from django.apps import apps
+from django.db.models import Max, Min
+
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+
+from dictionary.conf import settings
+from dictionary.utils import batched
+
+
+class EntryPool:
+    """
+    Shuffled pool of the ids of the entries that may show up in the home page
+    (see INDEX_TYPE), kept in a Redis list so that random entries are drawn
+    in a single LPOP. Drawn ids are removed from the pool, so they don't show
+    up again until it gets refilled. See REDIS_RANDOM_POOL.
+
+    The pool is refilled by a periodic task, with a random sample of at most
+    'capacity' ids, once it runs below 'low' ids or at least once in every
+    'freshness' seconds, which drops the ids of deleted entries.
+    """
+
+    prefix = "randompool"
+    capacity = 10000
+    low = 2000
+    freshness = 3600  # seconds
+
+    def __init__(self):
+        self.redis = get_redis_connection("default")
+        self.key = f"{self.prefix}:entries"
+
+    @staticmethod
+    def eligible():
+        return apps.get_model("dictionary.Entry").objects.order_by().values_list("pk", flat=True)
+
+    def fill(self):
+        """
+        Replace the pool with a new sample. Ids are drawn from the old pool in
+        the meantime. The sample is taken in the database (ORDER BY random()
+        LIMIT capacity, a bounded top-N sort) and streamed into the pool, so
+        the ids of all entries are never loaded.
+        """
+        sample = self.eligible().order_by("?")[: self.capacity].iterator(chunk_size=2000)
+        temporary = f"{self.prefix}:entries:{uuid.uuid4().hex}"
+        filled = False
+
+        try:
+            for batch in batched(sample, 2000):
+                self.redis.rpush(temporary, *batch)
+                filled = True
+
+            pipe = self.redis.pipeline()
+
+            if filled:
+                pipe.rename(temporary, self.key)
+            else:
+                pipe.delete(self.key)
+
+            pipe.set(f"{self.prefix}:fresh", 1, ex=self.freshness)
+            pipe.execute()
+        finally:
+            self.redis.delete(temporary)
+
+    def refill(self):
+        """Fill the pool if it is running low or stale. Return True if it was filled."""
+        pipe = self.redis.pipeline()
+        pipe.llen(self.key)
+        pipe.exists(f"{self.prefix}:fresh")
+        size, fresh = pipe.execute()
+
+        if fresh and size >= self.low:
+            return False
+
+        self.fill()
+        return True
+
+    def draw(self, count):
+        """Remove and return at most count ids from the pool."""
+        return [int(pk) for pk in self.redis.lpop(self.key, count) or ()]
+
+
+def random_entry_ids(size, attempts=200):
+    """
+    Return the ids of (at most) given number of random entries. Ids are drawn
+    from EntryPool if REDIS_RANDOM_POOL is set. Otherwise (or to make up for
+    the ids missing from a short pool), random ids between the smallest and
+    largest ids are guessed in batches, checking up to 'attempts' guesses.
+    """
+    drawn = []
+
+    if settings.REDIS_RANDOM_POOL:
+        with suppress(RedisError):
+            if len(drawn := EntryPool().draw(size)) == size:
+                return drawn
+
+    size -= len(drawn)
+    model = apps.get_model("dictionary.Entry")
+    # Bounds of all entries are index lookups, ineligible guesses are filtered out along with the missing ones.
+    bounds = model.objects_all.order_by().aggregate(min=Min("pk"), max=Max("pk"))
+    entries = model.objects.order_by()
+
+    if bounds["min"] is None:
+        return drawn
+
+    found, seen = [], set(drawn)
+
+    while len(found) < size and attempts > 0:
+        guesses = {random.randint(bounds["min"], bounds["max"]) for _ in range(min(attempts, 50))} - seen  # nosec
+        attempts -= 50
+        seen |= guesses
+        found.extend(entries.filter(pk__in=guesses).values_list("pk", flat=True))
+
+    return drawn + found[:size]
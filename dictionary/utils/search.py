@@ -0,0 +1,51 @@
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchVector
+from django.utils.html import escape, mark_safe
+
+SEARCH_CONFIG = "simple"
+"""
+Text search configuration of the stored search vectors (Topic.search_vector
+and Entry.search_vector). 'simple' doesn't stem words, so it works the same
+for every language.
+"""
+
+HIGHLIGHT_START, HIGHLIGHT_STOP = "\x02", "\x03"
+"""Delimiters of the matching words in headlines, users can't send control characters."""
+
+
+def search_vector(field):
+    return SearchVector(field, config=SEARCH_CONFIG)
+
+
+def search_query(keywords):
+    """Parse keywords the way web search engines do, e.g. "quoted phrases" and -excluded words."""
+    return SearchQuery(keywords, config=SEARCH_CONFIG, search_type="websearch")
+
+
+def search_terms(keywords):
+    """
+    Return the words that search_query(keywords) looks for, i.e. without
+    quotes, operators and excluded (-prefixed) words.
+    """
+    terms = (word.strip('"') for word in keywords.split() if not word.startswith("-"))
+    return [term for term in terms if term and term.lower() != "or"]
+
+
+def headline(field, keywords, **options):
+    """
+    Return an expression that yields the fragments of field that match given
+    keywords. Options are passed to ts_headline, e.g. max_fragments=2. Use
+    highlight() to convert the result into HTML.
+    """
+    return SearchHeadline(
+        field,
+        search_query(keywords),
+        config=SEARCH_CONFIG,
+        start_sel=HIGHLIGHT_START,
+        stop_sel=HIGHLIGHT_STOP,
+        **options,
+    )
+
+
+def highlight(fragment):
+    """Escape given headline fragment and mark its matching words with <mark> tags."""
+    return mark_safe(escape(fragment).replace(HIGHLIGHT_START, "<mark>").replace(HIGHLIGHT_STOP, "</mark>"))
@@ -1,8 +1,10 @@
 from contextlib import suppress
 
 from django.core.paginator import Paginator
-from django.core.serializers.json import Serializer
+from django.core.serializers.json import DjangoJSONEncoder, Serializer
+from django.template.loader import render_to_string
 from django.utils.functional import cached_property
+from django.utils.translation import get_language
 
 from dictionary.conf import settings
 from dictionary.utils.decorators import cached_context
@@ -42,6 +44,33 @@ class ArchiveSerializer(Serializer):
         return self._current
 
 
+def write_archive(author, stream, chunk_size=2000):
+    """
+    Write the backup document of given author, i.e. their published entries
+    (in ArchiveSerializer format) and archived conversations, to given text
+    stream. Rows are fetched and written in chunks, so memory usage doesn't
+    grow with the number of entries.
+    """
+
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    fields = ("content", "date_created", "date_edited", "topic__title")
+    entries = author.entry_set(manager="objects_published").values_list(*fields).iterator(chunk_size=chunk_size)
+    conversations = author.conversationarchive_set.values_list("target", "messages").iterator(chunk_size=100)
+
+    stream.write('{"entries": [')
+
+    for index, entry in enumerate(entries):
+        stream.write(("," if index else "") + encoder.encode(dict(zip(fields, entry))))
+
+    stream.write('], "conversations": [')
+
+    for index, (target, messages) in enumerate(conversations):
+        # Messages are already serialized.
+        stream.write(f'{"," if index else ""}{{"target": {encoder.encode(target)}, "messages": {messages}}}')
+
+    stream.write("]}")
+
+
 class PlainSerializer:
     """
     A surface-level 'serializer' that creates a dictionary from 'public'
@@ -95,7 +124,7 @@ class LeftFrame(PlainSerializer):
     Note: Check out PlainSerializer before you append any attribute or method.
     """
 
-    exclude = ("as_context",)
+    exclude = ("as_context", "as_html")
 
     def __init__(self, manager, page):
         """
@@ -172,11 +201,14 @@ class LeftFrame(PlainSerializer):
     @cached_property
     def page(self):
         """Get current page_obj via Paginator and serialize it using PageSerializer"""
-        user = self._manager.user
-        paginate_by = user.topics_per_page if user.is_authenticated else settings.TOPICS_PER_PAGE_DEFAULT
-        paginator = Paginator(self._manager.serialized, paginate_by)
+        paginator = Paginator(self._manager.serialized, self._paginate_by)
         return PageSerializer(paginator.get_page(self._page)).get_serialized()
 
+    @cached_property
+    def _paginate_by(self):
+        user = self._manager.user
+        return user.topics_per_page if user.is_authenticated else settings.TOPICS_PER_PAGE_DEFAULT
+
     @cached_property
     def tabs(self):
         if self._manager.extra.get("hidetabs") == "yes":
@@ -206,3 +238,14 @@ class LeftFrame(PlainSerializer):
 
     def as_context(self):
         return self.get_serialized()
+
+    def as_html(self, theme=None):
+        """
+        Render the frame, the rendered frame is cached along with the topic list
+        (see TopicListHandler.cached_fragment) so that it is neither serialized
+        nor rendered again until the list changes.
+        """
+        name = f"lf_{self._page}_{self._paginate_by}_{get_language()}_{theme}_{self.refresh_count}"
+        return self._manager.cached_fragment(
+            name, lambda: render_to_string("dictionary/includes/left_frame_content.html", {"lf": self.as_context()})
+        )
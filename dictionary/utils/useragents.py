@@ -0,0 +1,115 @@
+import hashlib
+import time
+from contextlib import suppress
+from functools import lru_cache
+
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+from user_agents import parse
+
+from dictionary.conf import settings
+
+
+class UserAgentCache:
+    """
+    Bounded LRU of the mobile classifications of user agent strings, so that
+    the regex cascade of user_agents.parse runs once per distinct string
+    instead of once per request. Strings that miss the LRU are looked up by
+    their hashes in Redis before being parsed, if REDIS_USER_AGENT_CACHE is
+    set, so that the workers share their classifications. The shared layer is
+    an LRU too, as user agent strings are up to clients: classifications are
+    kept in a hash along with a sorted set of their last use, trimmed to
+    USER_AGENT_CACHE_SIZE entries.
+
+    Lookup counters of each process are added to the totals in Redis once in
+    every 'report_every' lookups, see totals().
+    """
+
+    prefix = "useragents"
+    timeout = 86400 * 7  # seconds, since the last classification stored in Redis
+    report_every = 1000
+    fields = ("hits", "shared_hits", "misses")
+
+    def __init__(self, size):
+        self.classify = lru_cache(maxsize=size)(self._classify)
+        self.shared_hits = 0
+        self.reported = dict.fromkeys(self.fields, 0)
+
+    def is_mobile(self, ua_string):
+        mobile = self.classify(ua_string)
+        info = self.classify.cache_info()
+
+        if (info.hits + info.misses) % self.report_every == 0:
+            self.report()
+
+        return mobile
+
+    def _classify(self, ua_string):
+        if not settings.REDIS_USER_AGENT_CACHE:
+            return parse(ua_string).is_mobile
+
+        digest = hashlib.blake2b(ua_string.encode(), digest_size=16).hexdigest()
+        shared, recent = f"{self.prefix}:shared", f"{self.prefix}:recent"
+
+        with suppress(RedisError):
+            redis = get_redis_connection("default")
+
+            if (stored := redis.hget(shared, digest)) is not None:
+                self.shared_hits += 1
+                redis.zadd(recent, {digest: time.time()}, xx=True)
+                return stored == b"1"
+
+            mobile = parse(ua_string).is_mobile
+            pipe = redis.pipeline()
+            pipe.hset(shared, digest, int(mobile))
+            pipe.zadd(recent, {digest: time.time()})
+            pipe.expire(shared, self.timeout)
+            pipe.expire(recent, self.timeout)
+            pipe.zcard(recent)
+
+            if (excess := pipe.execute()[-1] - settings.USER_AGENT_CACHE_SIZE) > 0:
+                # Evict the least recently used ones.
+                if evicted := [member for member, _ in redis.zpopmin(recent, excess)]:
+                    redis.hdel(shared, *evicted)
+
+            return mobile
+
+        return parse(ua_string).is_mobile
+
+    def stats(self):
+        """Return the lookup counters of this process. Shared hits are the LRU misses found in Redis."""
+        info = self.classify.cache_info()
+        lookups = info.hits + info.misses
+        return {
+            "hits": info.hits,
+            "shared_hits": self.shared_hits,
+            "misses": info.misses - self.shared_hits,
+            "size": info.currsize,
+            "hit_ratio": (info.hits + self.shared_hits) / lookups if lookups else 0,
+        }
+
+    def report(self):
+        """Add the counters collected since the last report to the totals in Redis."""
+        stats = self.stats()
+
+        with suppress(RedisError):
+            pipe = get_redis_connection("default").pipeline()
+
+            for field in self.fields:
+                pipe.hincrby(f"{self.prefix}:stats", field, stats[field] - self.reported[field])
+
+            pipe.execute()
+            self.reported = {field: stats[field] for field in self.fields}
+
+    @classmethod
+    def totals(cls):
+        """Return the lookup counters of all processes, as reported so far."""
+        stored = get_redis_connection("default").hgetall(f"{cls.prefix}:stats")
+        totals = {field: int(stored.get(field.encode(), 0)) for field in cls.fields}
+        lookups = sum(totals.values())
+        totals["hit_ratio"] = (totals["hits"] + totals["shared_hits"]) / lookups if lookups else 0
+        return totals
+
+    @classmethod
+    def reset(cls):
+        get_redis_connection("default").delete(f"{cls.prefix}:stats")
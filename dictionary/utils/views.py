@@ -1,5 +1,9 @@
+import datetime
+
 from django.contrib.auth.mixins import PermissionRequiredMixin
-from django.core.paginator import EmptyPage, Paginator
+from django.core.paginator import EmptyPage, Page, Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
 from django.views.generic import View
 
 from dictionary.utils.mixins import IntermediateActionMixin
@@ -21,3 +25,105 @@ class SafePaginator(Paginator):
             if number > 1:
                 return self.num_pages
             raise
+
+
+class KeysetPage(Page):
+    def cursor(self, number):
+        """Return the cursor to seek given page from this one, None if it is not adjacent."""
+        if not self.object_list:
+            return None
+
+        if number == self.number + 1:
+            direction, obj = "a", self.object_list[-1]
+        elif number == self.number - 1:
+            direction, obj = "b", self.object_list[0]
+        else:
+            return None
+
+        epoch = (obj.date_created - KeysetPaginator.epoch) // datetime.timedelta(microseconds=1)
+        return f"{number}_{direction}_{epoch}_{obj.pk}"
+
+
+class KeysetPaginator(SafePaginator):
+    """
+    Paginates objects by (date_created, id). Pages adjacent to the previously
+    viewed one are seeked with a cursor (see KeysetPage.cursor) instead of
+    skipping over the objects before them with OFFSET. Other pages are sliced
+    from the nearest end of the list, so the last pages are cheap as well.
+
+    Count of the objects may have already been calculated (cached_count).
+    """
+
+    epoch = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+    def __init__(self, object_list, per_page, cursor=None, cached_count=None, **kwargs):
+        self.cursor = self.parse_cursor(cursor)
+        self.cached_count = cached_count
+        super().__init__(object_list.order_by("date_created", "pk"), per_page, **kwargs)
+
+    @cached_property
+    def count(self):
+        if self.cached_count is not None:
+            return self.cached_count
+        return super().count
+
+    @classmethod
+    def parse_cursor(cls, cursor):
+        """Parse cursor into (page number, direction, date, id), return None if it is malformed."""
+        try:
+            number, direction, epoch, pk = cursor.split("_")
+            return (
+                int(number),
+                {"a": "after", "b": "before"}[direction],
+                cls.epoch + datetime.timedelta(microseconds=int(epoch)),
+                int(pk),
+            )
+        except (AttributeError, ValueError, KeyError, OverflowError):
+            return None
+
+    def page(self, number):
+        number = self.validate_number(number)
+        object_list = self._seek(number)
+
+        if object_list is None:
+            object_list = self._slice(number)
+
+        return self._get_page(object_list, number, self)
+
+    def _get_page(self, *args, **kwargs):
+        return KeysetPage(*args, **kwargs)
+
+    def _seek(self, number):
+        # The cursor is ignored if it was generated for another page (e.g. page
+        # selector was used) or the page is at the edges. Edge pages might have
+        # orphans, which are handled in _slice.
+        if self.cursor is None or self.cursor[0] != number or number in (1, self.num_pages):
+            return None
+
+        _number, direction, date, pk = self.cursor
+
+        if direction == "after":
+            queryset = self.object_list.filter(Q(date_created__gt=date) | Q(pk__gt=pk), date_created__gte=date)
+        else:
+            queryset = self.object_list.reverse().filter(
+                Q(date_created__lt=date) | Q(pk__lt=pk), date_created__lte=date
+            )
+
+        object_list = list(queryset[: self.per_page])
+
+        if not object_list:
+            return None
+
+        return object_list if direction == "after" else object_list[::-1]
+
+    def _slice(self, number):
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page
+
+        if top + self.orphans >= self.count:
+            top = self.count
+
+        if bottom <= self.count - top:
+            return list(self.object_list[bottom:top])
+
+        return list(self.object_list.reverse()[self.count - top : self.count - bottom])[::-1]
@@ -0,0 +1,349 @@
+import time
+from contextlib import suppress
+from functools import partial
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Count, Exists, F, OuterRef, Q
+from django.utils.translation import gettext
+
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+
+from dictionary.conf import settings
+from dictionary.utils import batched, time_threshold
+from dictionary.utils.db import SubQueryCount
+
+
+def _vote_models():
+    return apps.get_model("dictionary.UpvotedEntries"), apps.get_model("dictionary.DownvotedEntries")
+
+
+def vote_limit_reason(daily, against, daily_against):
+    """
+    Given the number of the votes of an author in the last 24 hours, all time
+    votes against the author of the entry and the ones in the last 24 hours,
+    return the reason why the author can't vote any more, None if they can.
+    """
+    if daily >= settings.DAILY_VOTE_LIMIT:
+        return gettext("you have used up all the vote claims you have today. try again later.")
+
+    if against is not None:
+        if against >= settings.TOTAL_VOTE_LIMIT_PER_USER:
+            return gettext("sorry, you have been haunting this person for a long time.")
+
+        if daily_against >= settings.DAILY_VOTE_LIMIT_PER_USER:
+            return gettext("this person has taken enough of your votes today, maybe try other users?")
+
+    return None
+
+
+class VoteLimits:
+    """
+    Sliding window vote counters of an author, used to check vote limits in
+    a constant number of Redis commands. See REDIS_VOTE_LIMITS. Keys:
+
+    votelimits:{voter}           Votes of the last 24 hours (entry id -> timestamp).
+    votelimits:{voter}:{target}  All votes on the entries of target author.
+    votelimits:{voter}:targets   Target author ids, to find the keys above.
+    votelimits:{voter}:loaded    Exists while the counters are in sync with the database.
+
+    Counters are loaded from the database when the voter first votes, and
+    reloaded once in every 'freshness' seconds. Reloading also drops the votes
+    deleted without going through EntryVote, e.g. along with their entries.
+    """
+
+    prefix = "votelimits"
+    window = 86400  # seconds
+    freshness = 86400  # seconds
+
+    def __init__(self, voter_id):
+        self.redis = get_redis_connection("default")
+        self.voter_id = voter_id
+        self.key = f"{self.prefix}:{voter_id}"
+
+    def _target_key(self, target_id):
+        return f"{self.key}:{target_id}"
+
+    def counts(self, target_id):
+        """Return the counts expected by vote_limit_reason for the votes against given target author."""
+        since = time.time() - self.window
+        pipe = self.redis.pipeline()
+        pipe.exists(f"{self.key}:loaded")
+        pipe.zremrangebyscore(self.key, "-inf", f"({since}")
+        pipe.zcard(self.key)
+        pipe.zcard(self._target_key(target_id))
+        pipe.zcount(self._target_key(target_id), since, "+inf")
+        loaded, _, daily, against, daily_against = pipe.execute()
+
+        if not loaded:
+            self.load()
+            return self.counts(target_id)
+
+        return daily, against, daily_against
+
+    def register(self, entry_id, target_id, timestamp):
+        pipe = self.redis.pipeline()
+        pipe.zadd(self.key, {entry_id: timestamp})
+        pipe.zadd(self._target_key(target_id), {entry_id: timestamp})
+        pipe.sadd(f"{self.key}:targets", target_id)
+        self._expire(pipe, self.key, self._target_key(target_id), f"{self.key}:targets")
+        pipe.execute()
+
+    def withdraw(self, entry_id, target_id):
+        pipe = self.redis.pipeline()
+        pipe.zrem(self.key, entry_id)
+        pipe.zrem(self._target_key(target_id), entry_id)
+        pipe.execute()
+
+    def _expire(self, pipe, *keys):
+        # Counters of idle voters are dropped, they get loaded again when needed.
+        for key in keys:
+            pipe.expire(key, self.freshness * 2)
+
+    def _fetch(self):
+        """Return the votes of the voter as {target id: {entry id: timestamp}}."""
+        votes = {}
+
+        for model in _vote_models():
+            rows = model.objects.filter(author_id=self.voter_id).values_list(
+                "entry_id", "entry__author_id", "date_created"
+            )
+
+            for entry_id, target_id, date_created in rows:
+                votes.setdefault(target_id, {})[entry_id] = date_created.timestamp()
+
+        return votes
+
+    def _stored(self):
+        """Return the votes kept in Redis, in _fetch() format."""
+        targets = self.redis.smembers(f"{self.key}:targets")
+        pipe = self.redis.pipeline()
+
+        for target_id in targets:
+            pipe.zrange(self._target_key(int(target_id)), 0, -1, withscores=True)
+
+        return {
+            int(target_id): {int(entry_id): score for entry_id, score in votes}
+            for target_id, votes in zip(targets, pipe.execute())
+            if votes
+        }
+
+    def load(self):
+        """(Re)load the counters from the database."""
+        votes = self._fetch()
+        since = time.time() - self.window
+        targets = self.redis.smembers(f"{self.key}:targets")
+        pipe = self.redis.pipeline()
+        pipe.delete(self.key, f"{self.key}:targets", *(self._target_key(int(target_id)) for target_id in targets))
+
+        if recent := {pk: ts for entries in votes.values() for pk, ts in entries.items() if ts >= since}:
+            pipe.zadd(self.key, recent)
+
+        for target_id, entries in votes.items():
+            pipe.zadd(self._target_key(target_id), entries)
+
+        if votes:
+            pipe.sadd(f"{self.key}:targets", *votes)
+
+        self._expire(pipe, self.key, f"{self.key}:targets", *(self._target_key(target_id) for target_id in votes))
+        pipe.set(f"{self.key}:loaded", 1, ex=self.freshness)
+        pipe.execute()
+
+    def clear(self):
+        targets = self.redis.smembers(f"{self.key}:targets")
+        self.redis.delete(
+            self.key,
+            f"{self.key}:targets",
+            f"{self.key}:loaded",
+            *(self._target_key(int(target_id)) for target_id in targets),
+        )
+
+    def is_consistent(self):
+        """Compare the counters against the database. Only meaningful while the counters are loaded."""
+        return self._stored() == self._fetch()
+
+    @classmethod
+    def loaded_voters(cls):
+        """Yield the ids of the voters whose counters are loaded."""
+        redis = get_redis_connection("default")
+
+        for key in redis.scan_iter(match=f"{cls.prefix}:*:loaded", count=1000):
+            yield int(key.decode().split(":")[1])
+
+    @classmethod
+    def inconsistent(cls):
+        """Yield the ids of the voters whose loaded counters don't match their votes in the database."""
+        for voter_id in cls.loaded_voters():
+            if not cls(voter_id).is_consistent():
+                yield voter_id
+
+    @classmethod
+    def reset(cls):
+        """Drop all counters, so that they get loaded from the database again."""
+        redis = get_redis_connection("default")
+
+        for keys in batched(redis.scan_iter(match=f"{cls.prefix}:*", count=1000), 1000):
+            redis.delete(*keys)
+
+
+def _suppressed(func, *args):
+    # Counters are corrected as they get reloaded, a failed update shouldn't fail the vote.
+    with suppress(RedisError):
+        func(*args)
+
+
+def vote_counts(voter_id, target_id=None):
+    """
+    Return the vote counts of given voter, as expected by vote_limit_reason.
+    Counts against the target author are None if target_id is None.
+    """
+    if settings.REDIS_VOTE_LIMITS and target_id is not None:
+        with suppress(RedisError):
+            return VoteLimits(voter_id).counts(target_id)
+
+    h24 = Q(date_created__gte=time_threshold(hours=24))
+    aggregates = {"daily": Count("pk", filter=h24)}
+
+    if target_id is not None:
+        against = Q(entry__author=target_id)
+        aggregates.update(against=Count("pk", filter=against), daily_against=Count("pk", filter=h24 & against))
+
+    counts = [model.objects.filter(author_id=voter_id).aggregate(**aggregates) for model in _vote_models()]
+    return tuple(
+        sum(count.get(name) or 0 for count in counts) if name in aggregates else None
+        for name in ("daily", "against", "daily_against")
+    )
+
+
+class EntryVote:
+    """
+    Upvote or downvote of an entry by an author. vote() carries out the whole
+    transition in a transaction of four statements (five when changing sides):
+
+    1. Lock the row of the voter (so that concurrent votes of the same author
+       are serialized) while fetching their current votes on the entry and
+       their vote counts used in limit checks. Counts are read from Redis
+       instead if REDIS_VOTE_LIMITS is set, in which case a new vote is also
+       registered on the counters before the lock is released (and withdrawn
+       if the transaction fails) so that the next vote of the voter counts it.
+    2. Insert and/or delete vote rows.
+    3. Update the vote rate of the entry.
+    4. Update the karma of the voter and the author of the entry, or append
+       the changes to the karma ledger if KARMA_LEDGER is set.
+
+    Vote rows are written through the 'through' models, so the m2m_changed
+    signals that update vote rates don't fire. If vote() is called within an
+    outer transaction that gets rolled back, the counters keep the vote until
+    they are reloaded.
+    """
+
+    directions = {"upvote": 1, "downvote": -1}
+
+    _reserved = False
+
+    def __init__(self, sender, entry, direction):
+        self.sender, self.entry = sender, entry
+        self.sign = self.directions[direction]
+        self.rate = settings.VOTE_RATES["vote"]
+        self.cost = settings.KARMA_RATES["cost"]
+        self.karma = settings.KARMA_RATES[direction]
+
+        models = _vote_models()
+        self.model, self.opposite = models if self.sign == 1 else reversed(models)
+
+    def _state(self):
+        h24 = Q(date_created__gte=time_threshold(hours=24))
+        against = Q(entry__author=self.entry.author_id)
+        annotations = {}
+
+        for name, model in (("same", self.model), ("opposite", self.opposite)):
+            votes = model.objects.filter(author=OuterRef("pk")).order_by()
+            annotations[f"in_{name}"] = Exists(votes.filter(entry=self.entry.pk))
+
+            if settings.REDIS_VOTE_LIMITS:
+                continue
+
+            annotations[f"{name}_daily"] = SubQueryCount(votes.filter(h24))
+            annotations[f"{name}_against"] = SubQueryCount(votes.filter(against))
+            annotations[f"{name}_daily_against"] = SubQueryCount(votes.filter(h24 & against))
+
+        return (
+            apps.get_model("dictionary.Author")
+            .objects.select_for_update(of=("self",))
+            .filter(pk=self.sender.pk)
+            .annotate(**annotations)
+            .values(*annotations)
+            .get()
+        )
+
+    def vote(self):
+        """Register the vote, or withdraw it if it was already given. Return the reason if the vote is declined."""
+        try:
+            with transaction.atomic():
+                return self._transition()
+        except Exception:
+            if self._reserved:
+                _suppressed(VoteLimits(self.sender.pk).withdraw, self.entry.pk, self.entry.author_id)
+
+            raise
+
+    def _transition(self):
+        state = self._state()
+        eligible = self.sender.is_karma_eligible
+        vote = {"author_id": self.sender.pk, "entry_id": self.entry.pk}
+
+        if state["in_same"]:
+            # Withdraw the vote, refund the cost.
+            self.model.objects.filter(**vote).delete()
+            self._update(-self.rate, self.cost, -self.karma, eligible)
+            self._track("withdraw", self.entry.pk, self.entry.author_id)
+            return None
+
+        if state["in_opposite"]:
+            # Change sides. Both the former vote and the new one count.
+            self.opposite.objects.filter(**vote).delete()
+            created = self.model.objects.create(**vote)
+            karma = settings.KARMA_RATES["upvote"] + settings.KARMA_RATES["downvote"]
+            self._update(2 * self.rate, 0, karma, eligible)
+            self._track("register", self.entry.pk, self.entry.author_id, created.date_created.timestamp())
+            return None
+
+        if reason := vote_limit_reason(*self._counts(state)):
+            return reason
+
+        created = self.model.objects.create(**vote)
+        self._reserve(created.date_created.timestamp())
+        self._update(self.rate, -self.cost, self.karma, eligible)
+        return None
+
+    def _counts(self, state):
+        if settings.REDIS_VOTE_LIMITS:
+            return vote_counts(self.sender.pk, self.entry.author_id)
+
+        return [state[f"same_{n}"] + state[f"opposite_{n}"] for n in ("daily", "against", "daily_against")]
+
+    def _reserve(self, timestamp):
+        """Register a new vote on the counters while the voter is locked. See vote() for withdrawal."""
+        if settings.REDIS_VOTE_LIMITS:
+            with suppress(RedisError):
+                VoteLimits(self.sender.pk).register(self.entry.pk, self.entry.author_id, timestamp)
+                self._reserved = True
+
+    def _track(self, method, *args):
+        """Reflect the change on vote limit counters, once the transaction commits."""
+        if settings.REDIS_VOTE_LIMITS:
+            transaction.on_commit(partial(_suppressed, getattr(VoteLimits(self.sender.pk), method), *args))
+
+    def _update(self, rate, sender_karma, author_karma, eligible):
+        """Apply given changes, in the direction of the vote for the entry and its author."""
+        apps.get_model("dictionary.Entry").objects_all.filter(pk=self.entry.pk).update(
+            vote_rate=F("vote_rate") + self.sign * rate
+        )
+
+        if not eligible:
+            return
+
+        apps.get_model("dictionary.KarmaChange").objects.apply(
+            {self.entry.author_id: self.sign * author_karma, self.sender.pk: sender_karma}
+        )
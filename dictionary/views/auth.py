@@ -7,7 +7,7 @@ from django.conf import settings as django_settings
 from django.contrib import messages as notifications
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.views import LoginView, LogoutView, PasswordChangeView
-from django.http import HttpResponse
+from django.http import FileResponse, HttpResponse
 from django.shortcuts import redirect, render
 from django.urls import reverse_lazy
 from django.utils.translation import gettext as _
@@ -147,7 +147,10 @@ class ChangePassword(LoginRequiredMixin, PasswordChangeView):
             return super().form_invalid(form)
 
         notifications.info(self.request, _("your password has been changed."))
-        return super().form_valid(form)
+        response = super().form_valid(form)
+        # Sessions on other devices would be rejected one by one as they make requests, drop them at once.
+        flush_all_sessions(self.request.user, keep=self.request.session.session_key)
+        return response
 
 
 class ChangeEmail(LoginRequiredMixin, PasswordConfirmMixin, FormView):
@@ -238,11 +241,12 @@ class DownloadBackup(LoginRequiredMixin, View):
             backup = BackUp.objects.get(author=self.request.user, is_ready=True)
             filename = os.path.basename(backup.file.name)
 
-            response = HttpResponse(content_type="application/json")
-
             if django_settings.DEBUG:
-                response.content = backup.file
+                # Stream the file in chunks, instead of reading it into memory.
+                return FileResponse(backup.file.open("rb"), as_attachment=True, filename=filename)
 
+            content_type = "application/gzip" if filename.endswith(".gz") else "application/json"
+            response = HttpResponse(content_type=content_type)
             response["Content-Disposition"] = f'attachment; filename="{filename}"'
             response[settings.XSENDFILE_HEADER_NAME] = backup.file.url
             return response
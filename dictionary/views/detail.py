@@ -6,7 +6,6 @@ from django.core.paginator import Paginator
 from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse
-from django.utils import timezone
 from django.utils.functional import cached_property
 from django.utils.translation import gettext, gettext_lazy as _
 from django.views.generic import DetailView, ListView
@@ -14,6 +13,7 @@ from django.views.generic import DetailView, ListView
 from dictionary.conf import settings
 from dictionary.forms.edit import MementoForm, SendMessageForm
 from dictionary.models import Author, Conversation, ConversationArchive, Entry, Memento, Message
+from dictionary.templatetags.filters import prefetch_entry_html
 from dictionary.utils.decorators import cached_context
 from dictionary.utils.managers import UserStatsQueryHandler, entry_prefetch
 from dictionary.utils.mixins import IntegratedFormMixin
@@ -49,8 +49,7 @@ class Chat(LoginRequiredMixin, IntegratedFormMixin, DetailView):
         chat = self.model.objects.with_user(self.request.user, recipient)
 
         if chat is not None:
-            # Mark read
-            chat.messages.filter(sender=recipient, read_at__isnull=True).update(read_at=timezone.now())
+            chat.mark_read()
             return chat
 
         raise Http404  # users haven't messaged each other yet
@@ -165,6 +164,10 @@ class UserProfile(IntegratedFormMixin, ListView):
         context["tab"] = {"name": self.tab, **self.tabs.get(self.tab)}
         context["profile"] = self.profile
         context["novice_queue"] = self.get_novice_queue()
+
+        if context["tab"]["type"] == "entry":
+            prefetch_entry_html(context["object_list"])
+
         return context
 
     def dispatch(self, request, *args, **kwargs):
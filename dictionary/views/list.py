@@ -10,13 +10,13 @@ from urllib.parse import quote, unquote
 from django.contrib import messages as notifications
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.db import connection
-from django.db.models import Exists, Max, Min, OuterRef, Prefetch, Q
+from django.db.models import Exists, OuterRef, Q
 from django.http import Http404, HttpResponseBadRequest
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.decorators import method_decorator
+from django.utils.functional import cached_property
 from django.utils.translation import gettext as _, gettext_lazy
 from django.views.generic import ListView, TemplateView
 
@@ -34,15 +34,18 @@ from dictionary.models import (
     Entry,
     Message,
     Topic,
+    TopicActivity,
     TopicFollowing,
 )
-from dictionary.templatetags.filters import IMAGE_REGEX, RE_TOPIC_CHARSET, SEE_EXPR
+from dictionary.templatetags.filters import IMAGE_REGEX, RE_TOPIC_CHARSET, SEE_EXPR, prefetch_entry_html
 from dictionary.utils import RE_WEBURL, i18n_lower, proceed_or_404, time_threshold
 from dictionary.utils.decorators import cached_context
 from dictionary.utils.managers import TopicListManager, entry_prefetch
 from dictionary.utils.mixins import IntegratedFormMixin
+from dictionary.utils.sampling import random_entry_ids
+from dictionary.utils.search import search_query
 from dictionary.utils.serializers import LeftFrame
-from dictionary.utils.views import SafePaginator
+from dictionary.utils.views import KeysetPaginator, SafePaginator
 from dictionary.views.edit import EntryCreateMixin
 
 
@@ -79,35 +82,18 @@ class Index(ListView):
         queryset = Entry.objects.filter(pk__in=self.get_pk_set()).order_by()
         return entry_prefetch(queryset, self.request.user)
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        prefetch_entry_html(context["entries"])
+        return context
+
     @method_decorator(cached_context(timeout=page_timeout, prefix="index_view"))
     def get_pk_set(self):
         records = getattr(self, settings.INDEX_TYPE)()
         return list(records)
 
     def random_records(self):
-        qs = Entry.objects.order_by()
-
-        max_pk = qs.aggregate(Max("pk"))["pk__max"]
-        min_pk = qs.aggregate(Min("pk"))["pk__min"]
-
-        if not (min_pk and max_pk):
-            return
-
-        seen, size, attempts = set(), 0, 0
-        while size < self.size:
-            if attempts > 200:
-                return
-            attempts += 1
-
-            next_pk = random.randint(min_pk, max_pk)  # nosec
-            if next_pk in seen:
-                continue
-            seen.add(next_pk)
-
-            found = Entry.objects.filter(pk=next_pk).exists()
-            if found:
-                size += 1
-                yield next_pk
+        return random_entry_ids(self.size)
 
     def nice_records(self):
         nice_pk_set = cached_context(prefix="index_nice_pk_set", timeout=self.nice_cache_timeout)(
@@ -185,10 +171,8 @@ class ConversationList(LoginRequiredMixin, IntegratedFormMixin, ListView):
 
     def get_queryset(self):
         query_term = i18n_lower(self.request.GET.get("search_term", "")).strip() or None
-        return (
-            Conversation.objects.list_for_user(self.request.user, query_term)
-            .select_related("target")
-            .prefetch_related(Prefetch("messages", queryset=Message.objects.select_related("recipient")))
+        return Conversation.objects.list_for_user(self.request.user, query_term).select_related(
+            "target", "latest_message"
         )
 
 
@@ -214,10 +198,9 @@ class ActivityList(LoginRequiredMixin, ListView):
 
     def post(self, *args, **kwargs):
         """Bulk read unread topics."""
-        TopicFollowing.objects.filter(
-            author=self.request.user,
-            topic__in=self.request.user.get_following_topics_with_receipt().filter(is_read=False),
-        ).update(read_at=timezone.now())
+        TopicFollowing.objects.filter(author=self.request.user, unread_count__gt=0).update(
+            read_at=timezone.now(), unread_count=0
+        )
 
         notifications.info(self.request, _("the topics were mark read"))
         return redirect(self.request.path)
@@ -359,6 +342,9 @@ class TopicEntryList(EntryCreateMixin, IntegratedFormMixin, ListView):
     login_required_modes = ("novices", "following", "recent", "acquaintances")
     """These filtering modes require user authentication."""
 
+    offset_modes = ("nice", "nicetoday")
+    """These filtering modes are not ordered by date, so they can't be paginated with KeysetPaginator."""
+
     redirect = False
     """
     When handling queryset, if there are no new entries found, redirect user
@@ -400,16 +386,14 @@ class TopicEntryList(EntryCreateMixin, IntegratedFormMixin, ListView):
             self.redirect = True
             return None
 
-        filters = Q(content__icontains=keywords)
+        # Only indexed conditions, so that the planner can combine them (an unindexed OR would scan the topic).
+        filters = Q(search_vector=search_query(keywords))
 
         if keywords.startswith("@") and (username := keywords[1:]):
             with suppress(Author.DoesNotExist):
                 author = Author.objects.get(username=username)
                 filters |= Q(author=author)
 
-        if connection.vendor == "postgresql":
-            filters |= Q(content__search=keywords)
-
         return self.topic.entries.filter(filters)
 
     def links(self):
@@ -447,6 +431,7 @@ class TopicEntryList(EntryCreateMixin, IntegratedFormMixin, ListView):
 
         if queryset is not None and queryset.exists():
             following.read_at = timezone.now()
+            following.unread_count = 0
             following.save()
             self.request.user.invalidate_unread_topic_count()
             return queryset
@@ -501,6 +486,7 @@ class TopicEntryList(EntryCreateMixin, IntegratedFormMixin, ListView):
 
         entries = context.get("object_list")
         queryset_size = context.get("paginator").count
+        prefetch_entry_html(entries)
 
         if self.request.user.is_authenticated:
             context["drafts"] = Entry.objects_all.filter(is_draft=True, topic=self.topic, author=self.request.user)
@@ -542,7 +528,11 @@ class TopicEntryList(EntryCreateMixin, IntegratedFormMixin, ListView):
                 show_previous = True
                 show_subsequent = True
 
-            if show_subsequent or show_previous:
+            if self.view_mode in ("popular", "today"):
+                # These modes list the latest entries of the topic, so the ones before can be deduced using counts.
+                page_obj = context["page_obj"]
+                previous_entries_count = max(self.entry_count - queryset_size, 0) + page_obj.start_index() - 1
+            elif show_subsequent or show_previous:
                 first_entry_date = first_entry.date_created
 
                 previous_entries_count = self._qs_filter(
@@ -577,7 +567,7 @@ class TopicEntryList(EntryCreateMixin, IntegratedFormMixin, ListView):
         else:
             # Parameters returned no corresponding entries, show ALL entries count to guide the user
             self.view_mode = "regular"
-            context["all_entries_count"] = self._qs_filter(self.regular(), prefetch=False).count()
+            context["all_entries_count"] = self.entry_count
 
         return context
 
@@ -605,6 +595,21 @@ class TopicEntryList(EntryCreateMixin, IntegratedFormMixin, ListView):
 
         return super().dispatch(request)
 
+    def get_paginator(self, queryset, per_page, **kwargs):
+        if self.view_mode in self.offset_modes:
+            return super().get_paginator(queryset, per_page, **kwargs)
+
+        cached_count = self.entry_count if self.view_mode == "regular" and self.topic.exists else None
+
+        return KeysetPaginator(
+            queryset, per_page, cursor=self.request.GET.get("c"), cached_count=cached_count, **kwargs
+        )
+
+    @cached_property
+    def entry_count(self):
+        """Count of the entries in regular mode, read from the entry counter of the topic."""
+        return TopicActivity.objects.entry_count(self.topic.pk, self.request.user)
+
     def get_paginate_by(self, *args):
         return (
             self.request.user.entries_per_page
@@ -1,10 +1,9 @@
 from functools import wraps
 
-from django.db.models import Q
-
 from graphene import Int, List, ObjectType, String
 
-from dictionary.models import Author, Topic
+from dictionary.models import Topic
+from dictionary.utils.autocomplete import complete_authors, complete_topics
 from dictionary_graph.types import AuthorType, TopicType
 
 
@@ -25,14 +24,7 @@ class AuthorAutoCompleteQuery(ObjectType):
     @staticmethod
     @autocompleter
     def resolve_authors(_parent, info, lookup, limit):
-        queryset = Author.objects_accessible.filter(username__istartswith=lookup).only("username", "slug", "is_novice")
-
-        if info.context.user.is_authenticated:
-            blocked = info.context.user.blocked.all()
-            blocked_by = info.context.user.blocked_by.all()
-            return queryset.exclude(Q(pk__in=blocked) | Q(pk__in=blocked_by))[:limit]
-
-        return queryset[:limit]
+        return complete_authors(info.context.user, lookup, limit)
 
 
 class TopicAutoCompleteQuery(ObjectType):
@@ -41,9 +33,7 @@ class TopicAutoCompleteQuery(ObjectType):
     @staticmethod
     @autocompleter
     def resolve_topics(_parent, _info, lookup, limit):
-        return Topic.objects_published.filter(
-            Q(title__istartswith=lookup) | Q(title__icontains=lookup), is_censored=False
-        ).only("title")[:limit]
+        return [Topic(title=title) for title in complete_topics(lookup, limit)]
 
 
 class AutoCompleteQueries(AuthorAutoCompleteQuery, TopicAutoCompleteQuery):
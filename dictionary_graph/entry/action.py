@@ -1,14 +1,14 @@
 from functools import wraps
 
 from django.core.exceptions import PermissionDenied
-from django.db.models import F
 from django.urls import reverse
 from django.utils.translation import gettext as _
 
 from graphene import ID, Int, Mutation, String
 
 from dictionary.conf import settings
-from dictionary.models import Comment, Entry
+from dictionary.models import Comment, Entry, KarmaChange
+from dictionary.utils.votes import EntryVote
 from dictionary_graph.utils import AnonymousUserStorage, login_required
 
 # pylint: disable=too-many-arguments
@@ -50,8 +50,7 @@ class DeleteEntry(Action, Mutation):
 
         if not entry.is_draft:
             # Deduct some karma upon entry deletion.
-            entry.author.karma = F("karma") - 1
-            entry.author.save(update_fields=["karma"])
+            KarmaChange.objects.apply({entry.author_id: -1})
 
         return DeleteEntry(feedback=_("your entry has been deleted"), redirect=redirect_url)
 
@@ -97,138 +96,76 @@ class FavoriteEntry(Action, Mutation):
         return FavoriteEntry(feedback=_("the entry has been favorited"), count=entry.favorited_by.count())
 
 
-def voteaction(mutator):
-    """
-    Checks if sender is actually the owner of the object, gets the Entry object.
-    Handles anonymous votes.
-    """
-
-    @wraps(mutator)
-    def decorator(_root, info, pk):
-        entry, sender = (
-            Entry.objects_published.select_related("author").only("id", "author_id", "author__karma").get(pk=pk),
-            info.context.user,
-        )
+def anonymous_vote(sender, entry, direction):
+    """Vote (or withdraw the vote) on behalf of an anonymous user, whose votes are kept in session."""
+    votes, opposite = sender.upvoted_entries, sender.downvoted_entries
 
-        if entry.author == sender:
-            raise PermissionDenied(_("we couldn't handle your request. try again later."))
-
-        if not sender.is_authenticated:
-            if settings.DISABLE_ANONYMOUS_VOTING:
-                # Fail silently.
-                # We cannot determine if the decorated mutation belongs to
-                # UpvoteEntry or DownvoteEntry, so we return the common ancestor.
-                return Mutation()
-
-            sender = AnonymousUserStorage(info.context)
+    if direction == "downvote":
+        votes, opposite = opposite, votes
 
-        upvoted, downvoted = sender.upvoted_entries, sender.downvoted_entries
-        in_upvoted, in_downvoted = upvoted.filter(pk=pk).exists(), downvoted.filter(pk=pk).exists()
-        exceeded, reason = sender.has_exceeded_vote_limit(against=entry.author)
+    if votes.filter(pk=entry.pk).exists():
+        votes.remove(entry)
+        return None
 
-        constants = (
-            F("karma"),
-            settings.KARMA_RATES["cost"],
-            settings.KARMA_RATES["downvote"],
-            settings.KARMA_RATES["upvote"],
-        )
+    if opposite.filter(pk=entry.pk).exists():
+        opposite.remove(entry)
+        votes.add(entry)
+        return None
 
-        return mutator(_root, entry, sender, upvoted, downvoted, in_upvoted, in_downvoted, constants, exceeded, reason)
+    exceeded, reason = sender.has_exceeded_vote_limit()
 
-    return decorator
+    if exceeded:
+        return reason
 
+    votes.add(entry)
+    return None
 
-class UpvoteEntry(Action, Mutation):
-    """Mutation to upvote an entry."""
 
-    @staticmethod
-    @voteaction
-    def mutate(_root, entry, sender, upvoted, downvoted, in_upvoted, in_downvoted, constants, exceeded, reason):
-        response = UpvoteEntry(feedback=None)
-        karma, cost, downvote_rate, upvote_rate = constants
+def voteaction(direction):
+    """
+    Checks if sender is actually the owner of the object, gets the Entry object.
+    Registers the vote of given direction, handles anonymous votes. Passes the
+    feedback (reason of a declined vote) to the mutator.
+    """
 
-        # User removes the upvote
-        if in_upvoted:
-            upvoted.remove(entry)
+    def decorator(mutator):
+        @wraps(mutator)
+        def wrapper(_root, info, pk):
+            entry, sender = Entry.objects_published.only("id", "author_id").get(pk=pk), info.context.user
 
-            if sender.is_karma_eligible:
-                sender.karma = karma + cost  # refund
-                entry.author.karma = karma - upvote_rate
-                sender.save(update_fields=["karma"])
-                entry.author.save(update_fields=["karma"])
+            if entry.author_id == sender.pk:
+                raise PermissionDenied(_("we couldn't handle your request. try again later."))
 
-            return response
+            if sender.is_authenticated:
+                return mutator(_root, info, EntryVote(sender, entry, direction).vote())
 
-        # User changes from downvote to upvote
-        if in_downvoted:
-            downvoted.remove(entry)
-            upvoted.add(entry)
+            if settings.DISABLE_ANONYMOUS_VOTING:
+                # Fail silently.
+                return mutator(_root, info, None)
 
-            if sender.is_karma_eligible:
-                entry.author.karma = karma + (downvote_rate + upvote_rate)
-                entry.author.save(update_fields=["karma"])
+            return mutator(_root, info, anonymous_vote(AnonymousUserStorage(info.context), entry, direction))
 
-            return response
+        return wrapper
 
-        if exceeded:
-            return UpvoteEntry(feedback=reason)
+    return decorator
 
-        # Usual upvote
-        upvoted.add(entry)
 
-        if sender.is_karma_eligible:
-            sender.karma = karma - cost
-            entry.author.karma = karma + upvote_rate
-            sender.save(update_fields=["karma"])
-            entry.author.save(update_fields=["karma"])
+class UpvoteEntry(Action, Mutation):
+    """Mutation to upvote an entry."""
 
-        return response
+    @staticmethod
+    @voteaction("upvote")
+    def mutate(_root, _info, feedback):
+        return UpvoteEntry(feedback=feedback)
 
 
 class DownvoteEntry(Action, Mutation):
     """Mutation to downvote an entry."""
 
     @staticmethod
-    @voteaction
-    def mutate(_root, entry, sender, upvoted, downvoted, in_upvoted, in_downvoted, constants, exceeded, reason):
-        response = DownvoteEntry(feedback=None)
-        karma, cost, downvote_rate, upvote_rate = constants
-
-        # User removes the downvote
-        if in_downvoted:
-            downvoted.remove(entry)
-
-            if sender.is_karma_eligible:
-                sender.karma = karma + cost  # refund
-                entry.author.karma = karma + downvote_rate
-                sender.save(update_fields=["karma"])
-                entry.author.save(update_fields=["karma"])
-            return response
-
-        # User changes from upvote to downvote
-        if in_upvoted:
-            upvoted.remove(entry)
-            downvoted.add(entry)
-
-            if sender.is_karma_eligible:
-                entry.author.karma = karma - (downvote_rate + upvote_rate)
-                entry.author.save(update_fields=["karma"])
-
-            return response
-
-        if exceeded:
-            return DownvoteEntry(feedback=reason)
-
-        # Usual downvote
-        downvoted.add(entry)
-
-        if sender.is_karma_eligible:
-            sender.karma = karma - cost
-            entry.author.karma = karma - downvote_rate
-            sender.save(update_fields=["karma"])
-            entry.author.save(update_fields=["karma"])
-
-        return response
+    @voteaction("downvote")
+    def mutate(_root, _info, feedback):
+        return DownvoteEntry(feedback=feedback)
 
 
 class VoteComment(Mutation):
@@ -5,7 +5,7 @@ from django.utils.translation import gettext as _
 from graphene import ID, Mutation, String
 
 from dictionary.models import Entry, Topic
-from dictionary.templatetags.filters import formatted
+from dictionary.templatetags.filters import formatted_entry
 from dictionary.utils.validators import validate_user_text
 from dictionary_graph.utils import login_required
 
@@ -32,7 +32,7 @@ class DraftEdit(Mutation):
             entry.save(update_fields=["content", "date_edited"])
             return DraftEdit(
                 pk=entry.pk,
-                content=linebreaksbr(formatted(entry.content)),
+                content=linebreaksbr(formatted_entry(entry)),
                 feedback=_("your changes have been saved as draft"),
             )
 
@@ -49,7 +49,7 @@ class DraftEdit(Mutation):
             entry.save()
             return DraftEdit(
                 pk=entry.pk,
-                content=linebreaksbr(formatted(entry.content)),
+                content=linebreaksbr(formatted_entry(entry)),
                 feedback=_("your entry has been saved as draft"),
             )
 
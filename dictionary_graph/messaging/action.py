@@ -51,9 +51,7 @@ class ArchiveConversation(Mutation):
         )
 
         for conversation in conversations:
-            conversation.messages.filter(recipient=info.context.user, read_at__isnull=True).update(
-                read_at=timezone.now()
-            )
+            conversation.mark_read()
             conversation.archive()
 
         return ArchiveConversation(redirect=reverse("messages-archive"))
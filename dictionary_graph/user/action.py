@@ -5,7 +5,7 @@ from django.utils.translation import gettext as _
 
 from graphene import Mutation, String
 
-from dictionary.models import Author
+from dictionary.models import Author, TopicFollowing
 from dictionary_graph.utils import login_required
 
 
@@ -42,11 +42,13 @@ class Block(Action, Mutation):
     def mutate(_root, info, sender, subject):
         if sender.blocked.filter(pk=subject.pk).exists():
             sender.blocked.remove(subject)
+            TopicFollowing.objects.recount(author=sender)
             return Block(feedback=_("removed blockages"))
 
         sender.following.remove(subject)
         subject.following.remove(sender)
         sender.blocked.add(subject)
+        TopicFollowing.objects.recount(author=sender)
         sender.favorite_entries.remove(*sender.favorite_entries.filter(author__in=[subject]))
         return Block(feedback=_("the person is now blocked"), redirect=info.context.build_absolute_uri(reverse("home")))
 